@@ -1,20 +1,32 @@
 import os
-import fnmatch
 import cv2
+import math
 import shutil
 import logging
+from datetime import date, timedelta
+from typing import Optional
 from skimage.metrics import structural_similarity
 from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.comparison.image_cache import ImageCache
+from boat_detection.comparison.matching import candidate_pairs, resolve_duplicates, assign_matches
 from boat_detection.utils.helpers import ensure_directory
 
 class Comparator:
     def __init__(self, db_manager: DatabaseManager, results_dir: str,
-                 orb_threshold: float = 0.3, ssim_threshold: float = 0.1, time_threshold: float = 1800):
+                 orb_threshold: float = 0.3, ssim_threshold: float = 0.1, time_threshold: float = 1800,
+                 image_cache_bytes: int = 256 * 1024 * 1024, decode_reduction: int = 1,
+                 use_manifest: bool = True, defer_moves: bool = False, match_window: Optional[float] = 86400):
         self.db_manager = db_manager
         self.results_dir = results_dir
         self.orb_threshold = orb_threshold
         self.ssim_threshold = ssim_threshold
         self.time_threshold = time_threshold
+        self.match_window = match_window
+        self.image_cache = ImageCache(max_bytes=image_cache_bytes, reduction=decode_reduction)
+        self.use_manifest = use_manifest
+        self.defer_moves = defer_moves
+        self._manifest_images = {}
+        self.last_peak_window = 0
 
         self.match_dir = os.path.join(self.results_dir, 'matches')
         self.dupe_dir = os.path.join(self.results_dir, 'duplicates')
@@ -24,11 +36,16 @@ class Comparator:
         ensure_directory(self.orphans_dir)
 
     @staticmethod
-    def orb_sim(img1, img2) -> float:
-        orb = cv2.ORB_create()
-        kp_a, desc_a = orb.detectAndCompute(img1, None)
-        kp_b, desc_b = orb.detectAndCompute(img2, None)
+    def orb_descriptors(img):
+        _, descriptors = cv2.ORB_create().detectAndCompute(img, None)
+        return descriptors
 
+    @classmethod
+    def orb_sim(cls, img1, img2) -> float:
+        return cls.orb_match(cls.orb_descriptors(img1), cls.orb_descriptors(img2))
+
+    @staticmethod
+    def orb_match(desc_a, desc_b) -> float:
         if desc_a is None or desc_b is None:
             logging.debug("One of the images has no descriptors. ORB similarity set to 0.")
             return 0.0
@@ -56,134 +73,198 @@ class Comparator:
         logging.debug(f"SSIM similarity: {sim:.4f}")
         return sim
 
-    def perform_comparisons(self):
-        logging.info("Starting perform_comparisons.")
+    def _discover_tracks(self):
+        if self.use_manifest:
+            track_ids = self.db_manager.get_manifest_track_ids()
+            if track_ids:
+                logging.info(f"Found {len(track_ids)} track_ids in the image manifest.")
+                return track_ids, True
 
         track_folders = [f for f in os.listdir(self.results_dir) if
                          f.startswith('track_id_') and os.path.isdir(os.path.join(self.results_dir, f))]
         track_ids = [int(f.split('_')[2]) for f in track_folders if f.split('_')[2].isdigit()]
-        logging.info(f"Found {len(track_ids)} track_ids for comparison.")
-
-        processed = set()
-
-        for i, track_id in enumerate(track_ids):
-            if track_id in processed:
-                continue
-
-            track_id_dir = os.path.join(self.results_dir, f"track_id_{track_id}")
-            images_i = fnmatch.filter(os.listdir(track_id_dir), '*.jpg')
-            images_i_paths = [os.path.join(track_id_dir, img) for img in images_i]
-
-            if not images_i_paths:
-                logging.warning(f"No images found for track_id {track_id}. Skipping.")
-                continue
-
-            img1 = cv2.imread(images_i_paths[0])
-            if img1 is None:
-                logging.warning(f"Failed to read image {images_i_paths[0]}. Skipping track_id {track_id}.")
-                continue
-
-            for j in range(i + 1, len(track_ids)):
-                compare_id = track_ids[j]
-
-                if compare_id in processed:
-                    continue
-
-                compare_id_dir = os.path.join(self.results_dir, f"track_id_{compare_id}")
-                if not os.path.isdir(compare_id_dir):
-                    logging.warning(f"Track ID directory {compare_id_dir} does not exist. Skipping.")
-                    continue
-
-                images_j = fnmatch.filter(os.listdir(compare_id_dir), '*.jpg')
-                images_j_paths = [os.path.join(compare_id_dir, img) for img in images_j]
-
-                if not images_j_paths:
-                    logging.warning(f"No images found for compare_id {compare_id}. Skipping.")
-                    continue
-
-                img2 = cv2.imread(images_j_paths[0])
-                if img2 is None:
-                    logging.warning(f"Failed to read image {images_j_paths[0]}. Skipping compare_id {compare_id}.")
-                    continue
-
-                orb_score = self.orb_sim(img1, img2)
-                ssim_score = self.structural_sim(img1, img2)
-
-                if orb_score > self.orb_threshold and ssim_score > self.ssim_threshold:
-                    launch_time_i = self.db_manager.get_boat_launch_time(track_id)
-                    launch_time_j = self.db_manager.get_boat_launch_time(compare_id)
-
-                    if launch_time_i is None or launch_time_j is None:
-                        logging.warning(f"Missing launch times for Track IDs {track_id} or {compare_id}. Skipping.")
-                        continue
-
-                    time_diff = abs(launch_time_i - launch_time_j)
-
-                    if time_diff > self.time_threshold:
-                        logging.info(f"Boat ID {track_id} matched with Boat ID {compare_id} (Time diff: {time_diff}s).")
-
-                        self.db_manager.cursor.execute('''
-                            UPDATE boats
-                            SET matchID = ?, status = 'Match'
-                            WHERE track_id = ?
-                        ''', (compare_id, track_id))
-                        self.db_manager.conn.commit()
-
-                        for img in images_i:
-                            src = os.path.join(track_id_dir, img)
-                            dest = os.path.join(self.match_dir, f"track_id_{track_id}_{img}")
-                            shutil.move(src, dest)
-
-                        for img in images_j:
-                            src = os.path.join(compare_id_dir, img)
-                            dest = os.path.join(self.match_dir, f"track_id_{compare_id}_{img}")
-                            shutil.move(src, dest)
-
-                        processed.add(compare_id)
-                        break
-
-                    else:
-                        logging.info(
-                            f"Boat ID {track_id} marked as Duplicate of Boat ID {compare_id} (Time diff: {time_diff}s).")
-
-                        self.db_manager.cursor.execute('''
-                            UPDATE boats
-                            SET status = 'Duplicate', matchID = ?
-                            WHERE track_id = ?
-                        ''', (compare_id, track_id))
-                        self.db_manager.conn.commit()
-
-                        for img in images_i:
-                            src = os.path.join(track_id_dir, img)
-                            dest = os.path.join(self.dupe_dir, f"track_id_{track_id}_{img}")
-                            shutil.move(src, dest)
-
-                        for img in images_j:
-                            src = os.path.join(compare_id_dir, img)
-                            dest = os.path.join(self.dupe_dir, f"track_id_{compare_id}_{img}")
-                            shutil.move(src, dest)
+        return track_ids, False
+
+    def _track_images(self, track_id: int, from_manifest: bool):
+        if from_manifest:
+            if track_id not in self._manifest_images:
+                rows = self.db_manager.get_detection_images(track_id)
+                self._manifest_images[track_id] = [row[1] for row in rows]
+            return self._manifest_images[track_id]
+
+        track_id_dir = os.path.join(self.results_dir, f"track_id_{track_id}")
+        if not os.path.isdir(track_id_dir):
+            logging.warning(f"Track ID directory {track_id_dir} does not exist. Skipping.")
+            return []
+        return [os.path.join(track_id_dir, img) for img in self.image_cache.list_images(track_id_dir)]
+
+    def _classify(self, track_id: int, image_paths, category: str, dest_dir: str, from_manifest: bool):
+        if from_manifest:
+            self.db_manager.classify_detection_images(track_id, category, dest_dir)
+            self._manifest_images.pop(track_id, None)
+            return
+
+        for src in image_paths:
+            dest = os.path.join(dest_dir, f"track_id_{track_id}_{os.path.basename(src)}")
+            shutil.move(src, dest)
+        self.image_cache.invalidate_directory(os.path.join(self.results_dir, f"track_id_{track_id}"))
+
+    def apply_pending_moves(self, batch_size: int = 500) -> int:
+        moved = 0
+        while True:
+            batch = self.db_manager.get_pending_image_moves(limit=batch_size)
+            if not batch:
+                break
+            for image_id, src, dest in batch:
+                if os.path.exists(src):
+                    shutil.move(src, dest)
+                elif not os.path.exists(dest):
+                    logging.warning(f"Detection image {src} is missing; recording it at {dest} anyway.")
+            self.db_manager.complete_image_moves([row[0] for row in batch])
+            moved += len(batch)
+        if moved:
+            logging.info(f"Moved {moved} classified detection images.")
+        return moved
+
+    def _representative_image(self, track_id: int, from_manifest: bool):
+        image_paths = self._track_images(track_id, from_manifest)
+        if not image_paths:
+            logging.warning(f"No images found for track_id {track_id}. Skipping.")
+            return None
+        image = self.image_cache.read(image_paths[0])
+        if image is None:
+            logging.warning(f"Failed to read image {image_paths[0]}. Skipping track_id {track_id}.")
+        return image
+
+    def _pair_score(self, first: tuple, second: tuple) -> Optional[float]:
+        # first and second are (image, ORB descriptors) of the two tracks.
+        (img1, desc1), (img2, desc2) = first, second
+        if img1 is None or img2 is None:
+            return None
+        orb_score = self.orb_match(desc1, desc2)
+        if orb_score <= self.orb_threshold:
+            return None
+        ssim_score = self.structural_sim(img1, img2)
+        if ssim_score <= self.ssim_threshold:
+            return None
+        return orb_score + ssim_score
+
+    def _day_window(self, first_day: str, last_day: str):
+        # Tracks launched from first_day to last_day, and the set also holding the days either side
+        # that a match window can reach into.
+        max_gap = max(self.time_threshold, self.match_window or 0)
+        pad = timedelta(days=math.ceil(max_gap / 86400))
+        core = set(self.db_manager.get_track_ids_by_day(first_day, last_day))
+        if not core:
+            logging.warning(f"No tracks launched from {first_day} to {last_day}. Launch days are only recorded "
+                            f"when tracking runs with absolute_time enabled.")
+        padded = set(self.db_manager.get_track_ids_by_day((date.fromisoformat(first_day) - pad).isoformat(),
+                                                          (date.fromisoformat(last_day) + pad).isoformat()))
+        return core, padded
+
+    def perform_comparisons(self, first_day: Optional[str] = None, last_day: Optional[str] = None):
+        logging.info("Starting perform_comparisons.")
 
-                        processed.add(track_id)
-                        break
+        track_ids, from_manifest = self._discover_tracks()
+        core = None
+        if first_day is not None or last_day is not None:
+            first_day, last_day = first_day or last_day, last_day or first_day
+            core, padded = self._day_window(first_day, last_day)
+            track_ids = [track_id for track_id in track_ids if track_id in padded]
+            logging.info(f"Comparing launches from {first_day} to {last_day}: {len(core)} tracks, "
+                         f"{len(padded) - len(core)} more from neighbouring days.")
+        logging.info(f"Found {len(track_ids)} track_ids for comparison.")
+        self._manifest_images = {}
 
+        states = self.db_manager.get_boat_states(track_ids)
+        launch_times = {track_id: states[track_id][1] for track_id in track_ids
+                        if track_id in states and states[track_id][1] is not None}
         for track_id in track_ids:
-            if track_id not in processed:
-                self.db_manager.cursor.execute('SELECT status FROM boats WHERE track_id = ?', (track_id,))
-                result = self.db_manager.cursor.fetchone()
-                if result and result[0] not in ['Retrieved', 'Match']:
-                    self.db_manager.cursor.execute('''
-                        UPDATE boats
-                        SET status = 'Orphan'
-                        WHERE track_id = ?
-                    ''', (track_id,))
-                    self.db_manager.conn.commit()
-                    logging.info(f"Boat ID {track_id} marked as Orphan.")
-
-                    track_id_dir = os.path.join(self.results_dir, f"track_id_{track_id}")
-                    images = fnmatch.filter(os.listdir(track_id_dir), '*.jpg')
-                    for img in images:
-                        src = os.path.join(track_id_dir, img)
-                        dest = os.path.join(self.orphans_dir, f"track_id_{track_id}_{img}")
-                        shutil.move(src, dest)
-
+            if track_id not in launch_times:
+                logging.warning(f"Missing launch time for Track ID {track_id}. Skipping.")
+
+        max_gap = None if self.match_window is None else max(self.time_threshold, self.match_window)
+        pairs = candidate_pairs(launch_times, max_gap)
+        if core is not None:
+            # Pairs entirely outside the requested days belong to another window's run.
+            pairs = [pair for pair in pairs if pair[0] in core or pair[1] in core]
+        logging.info(f"Scoring {len(pairs)} candidate pairs among {len(launch_times)} tracks.")
+
+        # Pairs come ordered by the earlier track's launch, so a track is only needed from its first pair
+        # to its last. Its image and descriptors are loaded once on first use and dropped after the last,
+        # keeping memory to the tracks inside one match window rather than all of them.
+        last_use = {}
+        for index, (earlier, later, _) in enumerate(pairs):
+            last_use[earlier] = last_use[later] = index
+        window = {}
+        self.last_peak_window = 0
+        duplicate_pairs, match_pairs = [], []
+        for index, (earlier, later, gap) in enumerate(pairs):
+            for track_id in (earlier, later):
+                if track_id not in window:
+                    image = self._representative_image(track_id, from_manifest)
+                    window[track_id] = (image, None if image is None else self.orb_descriptors(image))
+            self.last_peak_window = max(self.last_peak_window, len(window))
+            score = self._pair_score(window[earlier], window[later])
+            for track_id in (earlier, later):
+                if last_use[track_id] == index:
+                    del window[track_id]
+            if score is None:
+                continue
+            if gap > self.time_threshold:
+                match_pairs.append((earlier, later, score))
+            else:
+                duplicate_pairs.append((earlier, later, score))
+
+        duplicates = resolve_duplicates(duplicate_pairs)
+        matches = assign_matches([pair for pair in match_pairs
+                                  if pair[0] not in duplicates and pair[1] not in duplicates])
+
+        for duplicate_id, canonical_id in sorted(duplicates.items()):
+            logging.info(f"Boat ID {duplicate_id} marked as Duplicate of Boat ID {canonical_id} "
+                         f"(Time diff: {launch_times[duplicate_id] - launch_times[canonical_id]}s).")
+        self.db_manager.cursor.executemany('''
+            UPDATE boats
+            SET status = 'Duplicate', matchID = ?
+            WHERE track_id = ?
+        ''', [(canonical_id, duplicate_id) for duplicate_id, canonical_id in sorted(duplicates.items())])
+
+        for launch_id, retrieve_id, _ in matches:
+            logging.info(f"Boat ID {launch_id} matched with Boat ID {retrieve_id} "
+                         f"(Time diff: {launch_times[retrieve_id] - launch_times[launch_id]}s).")
+        self.db_manager.cursor.executemany('''
+            UPDATE boats
+            SET matchID = ?, status = 'Match'
+            WHERE track_id = ?
+        ''', [(retrieve_id, launch_id) for launch_id, retrieve_id, _ in matches])
+
+        matched = {track_id for launch_id, retrieve_id, _ in matches for track_id in (launch_id, retrieve_id)}
+        orphans = [track_id for track_id in track_ids
+                   if (core is None or track_id in core) and track_id not in matched and track_id not in duplicates
+                   and track_id in states and states[track_id][0] not in ['Retrieved', 'Match']]
+        self.db_manager.cursor.executemany('''
+            UPDATE boats
+            SET status = 'Orphan'
+            WHERE track_id = ?
+        ''', [(track_id,) for track_id in orphans])
+        self.db_manager.conn.commit()
+
+        for duplicate_id in sorted(duplicates):
+            self._classify(duplicate_id, self._track_images(duplicate_id, from_manifest), 'Duplicate',
+                           self.dupe_dir, from_manifest)
+        for track_id in sorted(matched):
+            self._classify(track_id, self._track_images(track_id, from_manifest), 'Match',
+                           self.match_dir, from_manifest)
+        for track_id in orphans:
+            logging.info(f"Boat ID {track_id} marked as Orphan.")
+            self._classify(track_id, self._track_images(track_id, from_manifest), 'Orphan',
+                           self.orphans_dir, from_manifest)
+
+        if from_manifest and not self.defer_moves:
+            self.apply_pending_moves()
+
+        logging.info(f"Comparison results: {len(matches)} matches, {len(duplicates)} duplicates, "
+                     f"{len(orphans)} orphans.")
+        self.image_cache.log_stats()
+        self.image_cache.clear()
         logging.info("Completed perform_comparisons.")
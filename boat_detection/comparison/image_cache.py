@@ -0,0 +1,82 @@
+import os
+import fnmatch
+import logging
+import cv2
+from collections import OrderedDict
+from typing import List
+
+# cv2.imread flags that let libjpeg decode straight to 1/2, 1/4 or 1/8 resolution.
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class ImageCache:
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, reduction: int = 1):
+        if reduction not in REDUCED_DECODE_FLAGS:
+            raise ValueError(f"Decode reduction must be one of {sorted(REDUCED_DECODE_FLAGS)}, got {reduction}.")
+        self.max_bytes = max_bytes
+        self.reduction = reduction
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Decoded images and directory listings share one LRU and one byte budget.
+        self._entries = OrderedDict()
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def _put(self, key, value, size: int):
+        self._discard(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def read(self, path: str):
+        key = ('image', path)
+        image = self._get(key)
+        if image is None:
+            image = cv2.imread(path, REDUCED_DECODE_FLAGS[self.reduction])
+            if image is not None:
+                self._put(key, image, image.nbytes)
+        return image
+
+    def list_images(self, directory: str, pattern: str = '*.jpg') -> List[str]:
+        key = ('listing', directory, pattern)
+        names = self._get(key)
+        if names is None:
+            names = fnmatch.filter(os.listdir(directory), pattern)
+            self._put(key, names, sum(len(name) for name in names) + 64 * (len(names) + 1))
+        return names
+
+    def invalidate_directory(self, directory: str) -> None:
+        prefix = os.path.join(directory, '')
+        for key in [k for k in self._entries if (k[0] == 'listing' and k[1] == directory)
+                    or (k[0] == 'image' and k[1].startswith(prefix))]:
+            self._discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def log_stats(self) -> None:
+        logging.info(f"Image cache: {self.hits} hits, {self.misses} misses, "
+                     f"{self.current_bytes / (1024 * 1024):.1f} MiB held in {len(self._entries)} entries.")
@@ -0,0 +1,100 @@
+import math
+import numpy as np
+import networkx as nx
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from typing import Dict, List, Optional, Tuple
+
+Pair = Tuple[int, int, float]
+
+
+def candidate_pairs(launch_times: Dict[int, float], max_gap: Optional[float]) -> List[Pair]:
+    # (earlier, later, gap) for every pair of tracks at most max_gap seconds apart.
+    # Sorting by time first keeps the work proportional to the pairs in the window.
+    max_gap = math.inf if max_gap is None else max_gap
+    ordered = sorted(launch_times.items(), key=lambda item: (item[1], item[0]))
+    times = np.array([time for _, time in ordered], dtype=np.float64)
+    pairs = []
+    for index, (track_id, time) in enumerate(ordered):
+        end = int(np.searchsorted(times, time + max_gap, side='right'))
+        for other in range(index + 1, end):
+            pairs.append((track_id, ordered[other][0], float(times[other] - time)))
+    return pairs
+
+
+def resolve_duplicates(pairs: List[Pair]) -> Dict[int, int]:
+    # pairs are (earlier, later, score). The later track becomes a duplicate of the
+    # earlier one, strongest pairs first; a track is never both canonical and duplicate.
+    duplicates = {}
+    canonical = set()
+    for earlier, later, _ in sorted(pairs, key=lambda pair: (-pair[2], pair[0], pair[1])):
+        if earlier in duplicates or later in duplicates or later in canonical:
+            continue
+        duplicates[later] = earlier
+        canonical.add(earlier)
+    return duplicates
+
+
+def _assign_bipartite(component: List[Pair]) -> List[Pair]:
+    # Launch and retrieve tracks are disjoint here, so the assignment solver is exact. Each row
+    # and column also gets its own zero-cost "unmatched" cell; every other cell without a
+    # candidate pair is masked out, so the solver can never pick a pair that is not a candidate.
+    launches = sorted({pair[0] for pair in component})
+    retrieves = sorted({pair[1] for pair in component})
+    row_of = {track_id: index for index, track_id in enumerate(launches)}
+    col_of = {track_id: index for index, track_id in enumerate(retrieves)}
+    n, m = len(launches), len(retrieves)
+
+    cost = np.full((n + m, m + n), np.inf)
+    cost[n:, m:] = 0.0
+    cost[np.arange(n), m + np.arange(n)] = 0.0
+    cost[n + np.arange(m), np.arange(m)] = 0.0
+    for launch, retrieve, score in component:
+        cost[row_of[launch], col_of[retrieve]] = -score
+
+    rows, cols = linear_sum_assignment(cost)
+    return [(launches[row], retrieves[col], -float(cost[row, col]))
+            for row, col in zip(rows, cols) if row < n and col < m]
+
+
+def _assign_general(component: List[Pair]) -> List[Pair]:
+    # A track that is the retrieve of one pair and the launch of another makes the problem a
+    # general matching, which the blossom algorithm solves exactly.
+    graph = nx.Graph()
+    for launch, retrieve, score in component:
+        graph.add_edge(launch, retrieve, weight=score)
+    scores = {(launch, retrieve): score for launch, retrieve, score in component}
+    matched = []
+    for a, b in nx.max_weight_matching(graph):
+        launch, retrieve = (a, b) if (a, b) in scores else (b, a)
+        matched.append((launch, retrieve, scores[(launch, retrieve)]))
+    return matched
+
+
+def assign_matches(pairs: List[Pair]) -> List[Pair]:
+    # pairs are (launch, retrieve, score) with the launch track seen first. Finds the matching
+    # with the highest total score in which every track is used at most once, one connected
+    # component of the candidate graph at a time so each problem stays small.
+    if not pairs:
+        return []
+    track_ids = sorted({track_id for pair in pairs for track_id in pair[:2]})
+    index_of = {track_id: index for index, track_id in enumerate(track_ids)}
+    rows = np.array([index_of[pair[0]] for pair in pairs])
+    cols = np.array([index_of[pair[1]] for pair in pairs])
+    graph = coo_matrix((np.ones(len(pairs)), (rows, cols)), shape=(len(track_ids), len(track_ids)))
+    _, labels = connected_components(graph, directed=False)
+
+    components: Dict[int, List[Pair]] = {}
+    for pair, row in zip(pairs, rows):
+        components.setdefault(int(labels[row]), []).append(pair)
+
+    matches = []
+    for component in components.values():
+        launches = {pair[0] for pair in component}
+        retrieves = {pair[1] for pair in component}
+        if launches & retrieves:
+            matches.extend(_assign_general(component))
+        else:
+            matches.extend(_assign_bipartite(component))
+    return sorted(matches)
@@ -1,13 +1,113 @@
 import os
 import yaml
+from collections.abc import Mapping
+from numbers import Real
 from dotenv import load_dotenv
-from typing import List, Optional
+from typing import List, Optional, Set
 import logging
 
-class Config:
+from boat_detection.utils.helpers import load_config
+from boat_detection.utils.clip_time import CLIP_TIME_SOURCES, DEFAULT_TIME_PATTERN
+
+# Keys a running process picks up when the config file changes; everything else
+# (paths, model, backend, service layout) only takes effect after a restart.
+RUNTIME_KEYS = ('movement_threshold', 'valid_detection_count', 'track_timeout', 'detection_confidence',
+                'frame_stride', 'cameras')
+
+# Filled in from .env when config.yaml leaves them out.
+ENV_KEYS = {
+    'videos_dir': 'VIDEOS_DIR',
+    'output_dir': 'OUTPUT_DIR',
+    'results_dir': 'RESULTS_DIR',
+    'logs_dir': 'LOGS_DIR',
+    'detection_images_dir': 'DETECTION_IMAGES_DIR',
+    'models_dir': 'MODELS_DIR',
+    'model_path': 'MODEL_PATH',
+    'database_dir': 'DATABASE_DIR',
+    'database_path': 'DATABASE_PATH',
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, Real) and not isinstance(value, bool)
+
+
+def _non_negative(value) -> bool:
+    return _is_number(value) and value >= 0
+
+
+def _fraction(value) -> bool:
+    return _is_number(value) and 0 <= value <= 1
+
+
+def _positive_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+
+def _core_count(value) -> bool:
+    return value is None or value == 'auto' or _positive_int(value)
+
+
+def _optional_mapping(value) -> bool:
+    return value is None or isinstance(value, dict)
+
+
+def _clip_time_sources(value) -> bool:
+    return isinstance(value, list) and all(source in CLIP_TIME_SOURCES for source in value)
+
+
+VALIDATORS = {
+    'movement_threshold': (_non_negative, 'a non-negative number'),
+    'valid_detection_count': (_positive_int, 'a positive integer'),
+    'track_timeout': (_non_negative, 'a non-negative number'),
+    'detection_confidence': (_fraction, 'a number between 0 and 1'),
+    'frame_stride': (_positive_int, 'a positive integer'),
+    'cameras': (_optional_mapping, 'a mapping of camera names to settings'),
+    'orb_threshold': (_fraction, 'a number between 0 and 1'),
+    'ssim_threshold': (_fraction, 'a number between 0 and 1'),
+    'time_threshold': (_non_negative, 'a non-negative number'),
+    'checkpoint_interval': (_non_negative, 'a non-negative number'),
+    'ingest_stable_seconds': (_non_negative, 'a non-negative number'),
+    'tile_size': (_positive_int, 'a positive integer'),
+    'reid_similarity': (_fraction, 'a number between 0 and 1'),
+    'reid_max_age': (_non_negative, 'a non-negative number'),
+    'reid_lost_after': (_non_negative, 'a non-negative number'),
+    'tile_overlap': (_fraction, 'a number between 0 and 1'),
+    'service_port': (_positive_int, 'a positive integer'),
+    'comparison_cache_mb': (_non_negative, 'a non-negative number'),
+    'shedding_max_lag': (_non_negative, 'a non-negative number'),
+    'shedding_recover_lag': (_non_negative, 'a non-negative number'),
+    'shedding_hold': (_non_negative, 'a non-negative number'),
+    'work_queue_max_attempts': (_positive_int, 'a positive integer'),
+    'work_queue_lease_seconds': (_non_negative, 'a non-negative number'),
+    'work_queue_heartbeat': (_non_negative, 'a non-negative number'),
+    'cpu_budget': (_core_count, "a positive number of cores or 'auto'"),
+    'cpu_shares': (_optional_mapping, 'a mapping of roles to shares'),
+    'activity_threshold': (_fraction, 'a number between 0 and 1'),
+    'activity_padding': (_non_negative, 'a non-negative number'),
+    'activity_merge_gap': (_non_negative, 'a non-negative number'),
+    'clip_time_sources': (_clip_time_sources, f"a list drawn from {list(CLIP_TIME_SOURCES)}"),
+}
+
+
+def validate_config(values: dict) -> List[str]:
+    errors = []
+    for key, (check, expected) in VALIDATORS.items():
+        if key in values and not check(values[key]):
+            errors.append(f"'{key}' must be {expected}, got {values[key]!r}")
+    return errors
+
+
+class Config(Mapping):
+    # Read-only mapping over config.yaml, so it can be passed wherever a config dict
+    # is expected. Keys missing from the file fall back to the property defaults below,
+    # for get, [] and 'in' alike; .env fills in the paths the file leaves out. Keys whose
+    # default is a share of cpu_budget (render_workers, service_comparison_workers) have no
+    # property, so get() falls through to the caller's budget-derived value.
     def __init__(self, config_path: str = 'config.yaml'):
         self.config_path = config_path
         self.config = {}
+        self._signature = None
         self.load_environment()
         self.load_config()
 
@@ -16,86 +116,516 @@ class Config:
         load_dotenv(dotenv_path=dotenv_path)
         logging.info(f"Environment variables loaded from {dotenv_path}.")
 
+    def _file_signature(self):
+        stat = os.stat(self.config_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> dict:
+        values = load_config(self.config_path) or {}
+        if not isinstance(values, dict):
+            raise ValueError(f"Configuration file {self.config_path} must contain a mapping.")
+        for key, variable in ENV_KEYS.items():
+            if key not in values and os.getenv(variable):
+                values[key] = os.getenv(variable)
+        errors = validate_config(values)
+        if errors:
+            raise ValueError(f"Invalid configuration in {self.config_path}: {'; '.join(errors)}.")
+        return values
+
     def load_config(self):
         try:
-            with open(self.config_path, 'r') as file:
-                self.config = yaml.safe_load(file)
-                logging.info(f"Configuration loaded from {self.config_path}.")
+            signature = self._file_signature()
         except FileNotFoundError:
             logging.error(f"Configuration file {self.config_path} not found.")
             raise
-        except yaml.YAMLError as e:
-            logging.error(f"Error parsing the configuration file: {e}")
-            raise
+        self.config = self._read()
+        self._signature = signature
+
+    def reload_if_changed(self) -> Set[str]:
+        # Re-reads the file if it changed and applies the runtime keys; returns the keys
+        # whose values changed. A broken edit is logged and the current values are kept.
+        try:
+            signature = self._file_signature()
+        except OSError as e:
+            logging.error(f"Cannot check {self.config_path} for changes: {e}")
+            return set()
+        if signature == self._signature:
+            return set()
+        self._signature = signature
+        try:
+            values = self._read()
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            logging.error(f"Ignoring changed configuration in {self.config_path}: {e}")
+            return set()
+
+        changed = {key for key in set(values) | set(self.config) if values.get(key) != self.config.get(key)}
+        fixed = sorted(changed - set(RUNTIME_KEYS))
+        if fixed:
+            logging.warning(f"Config keys {fixed} changed in {self.config_path}; they take effect after a restart.")
+        applied = changed & set(RUNTIME_KEYS)
+        for key in applied:
+            if key in values:
+                self.config[key] = values[key]
+            else:
+                self.config.pop(key)
+        if applied:
+            logging.info(f"Reloaded {sorted(applied)} from {self.config_path}.")
+        return applied
+
+    @classmethod
+    def _has_default(cls, key) -> bool:
+        return isinstance(key, str) and isinstance(getattr(cls, key, None), property)
 
     def get(self, key: str, default: Optional[object] = None) -> Optional[object]:
-        return self.config.get(key, default)
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key: str):
+        if key in self.config:
+            return self.config[key]
+        if self._has_default(key):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.config or self._has_default(key)
+
+    def __iter__(self):
+        return iter(self.config)
+
+    def __len__(self) -> int:
+        return len(self.config)
 
     # Example property methods for easy access
     @property
     def videos_dir(self) -> str:
-        return self.get('videos_dir', 'data/input/videos')
+        return self.config.get('videos_dir', 'data/input/videos')
 
     @property
     def output_dir(self) -> str:
-        return self.get('output_dir', 'data/output/processed_videos')
+        return self.config.get('output_dir', 'data/output/processed_videos')
 
     @property
     def results_dir(self) -> str:
-        return self.get('results_dir', 'data/results')
+        return self.config.get('results_dir', 'data/results')
 
     @property
     def logs_dir(self) -> str:
-        return self.get('logs_dir', 'data/results/logs')
+        return self.config.get('logs_dir', 'data/results/logs')
 
     @property
     def detection_images_dir(self) -> str:
-        return self.get('detection_images_dir', 'data/results/detection_images')
+        return self.config.get('detection_images_dir', 'data/results/detection_images')
 
     @property
     def models_dir(self) -> str:
-        return self.get('models_dir', 'data/models')
+        return self.config.get('models_dir', 'data/models')
 
     @property
     def model_path(self) -> str:
-        return self.get('model_path', 'trainedPrototypewithCars2.pt')
+        return self.config.get('model_path', 'trainedPrototypewithCars2.pt')
 
     @property
     def database_dir(self) -> str:
-        return self.get('database_dir', 'data/databases')
+        return self.config.get('database_dir', 'data/databases')
 
     @property
     def database_path(self) -> str:
-        return self.get('database_path', os.path.join(self.database_dir, 'boats.db'))
+        return self.config.get('database_path', os.path.join(self.database_dir, 'boats.db'))
 
     @property
     def movement_threshold(self) -> int:
-        return self.get('movement_threshold', 100)
+        return self.config.get('movement_threshold', 100)
 
     @property
     def valid_detection_count(self) -> int:
-        return self.get('valid_detection_count', 5)
+        return self.config.get('valid_detection_count', 5)
+
+    @property
+    def track_timeout(self) -> float:
+        return self.config.get('track_timeout', 30)
+
+    @property
+    def detection_confidence(self) -> float:
+        return self.config.get('detection_confidence', 0.5)
+
+    @property
+    def frame_stride(self) -> int:
+        return self.config.get('frame_stride', 1)
+
+    @property
+    def detection_cache(self) -> bool:
+        return self.config.get('detection_cache', False)
+
+    @property
+    def detection_cache_dir(self) -> str:
+        return self.config.get('detection_cache_dir', os.path.join(self.results_dir, 'detection_cache'))
+
+    @property
+    def detection_log(self) -> bool:
+        return self.config.get('detection_log', False)
+
+    @property
+    def detection_logs_dir(self) -> str:
+        return self.config.get('detection_logs_dir', os.path.join(self.results_dir, 'detection_logs'))
+
+    @property
+    def write_annotated_video(self) -> bool:
+        return self.config.get('write_annotated_video', True)
+
+    @property
+    def render_backend(self) -> str:
+        return self.config.get('render_backend', 'opencv')
+
+    @property
+    def render_codec(self) -> Optional[str]:
+        return self.config.get('render_codec')
+
+    @property
+    def render_chunk_seconds(self) -> float:
+        return self.config.get('render_chunk_seconds', 60)
+
+    @property
+    def checkpoints_dir(self) -> str:
+        return self.config.get('checkpoints_dir', os.path.join(self.results_dir, 'checkpoints'))
+
+    @property
+    def checkpoint_interval(self) -> int:
+        return self.config.get('checkpoint_interval', 0)
+
+    @property
+    def bulk_shards(self) -> int:
+        return self.config.get('bulk_shards', os.cpu_count() or 1)
+
+    @property
+    def bulk_workers(self) -> Optional[int]:
+        return self.config.get('bulk_workers')
+
+    @property
+    def bulk_shards_dir(self) -> str:
+        return self.config.get('bulk_shards_dir', os.path.join(self.results_dir, 'shards'))
+
+    @property
+    def service_host(self) -> str:
+        return self.config.get('service_host', '127.0.0.1')
+
+    @property
+    def service_port(self) -> int:
+        return self.config.get('service_port', 8765)
+
+    @property
+    def service_socket(self) -> Optional[str]:
+        return self.config.get('service_socket')
+
+    @property
+    def service_tracking_workers(self) -> int:
+        return self.config.get('service_tracking_workers', 1)
+
+    @property
+    def service_poll_interval(self) -> float:
+        return self.config.get('service_poll_interval', 30)
+
+    @property
+    def service_auto_compare(self) -> bool:
+        return self.config.get('service_auto_compare', True)
+
+    @property
+    def model_backend(self) -> str:
+        return self.config.get('model_backend', 'pytorch')
+
+    @property
+    def model_int8(self) -> bool:
+        return self.config.get('model_int8', False)
+
+    @property
+    def model_export_imgsz(self) -> int:
+        return self.config.get('model_export_imgsz', 640)
+
+    @property
+    def model_exports_dir(self) -> str:
+        return self.config.get('model_exports_dir', os.path.join(self.models_dir, 'exports'))
+
+    @property
+    def calibration_images(self) -> int:
+        return self.config.get('calibration_images', 300)
+
+    @property
+    def tiled_inference(self) -> bool:
+        return self.config.get('tiled_inference', False)
+
+    @property
+    def tile_size(self) -> int:
+        return self.config.get('tile_size', 640)
+
+    @property
+    def tile_overlap(self) -> float:
+        return self.config.get('tile_overlap', 0.2)
+
+    @property
+    def tile_nms_iou(self) -> float:
+        return self.config.get('tile_nms_iou', 0.5)
+
+    @property
+    def tile_merge_ios(self) -> float:
+        return self.config.get('tile_merge_ios', 0.8)
+
+    @property
+    def reid_enabled(self) -> bool:
+        return self.config.get('reid_enabled', False)
+
+    @property
+    def reid_max_age(self) -> float:
+        return self.config.get('reid_max_age', 5.0)
+
+    @property
+    def reid_similarity(self) -> float:
+        return self.config.get('reid_similarity', 0.85)
+
+    @property
+    def reid_max_distance(self) -> Optional[float]:
+        return self.config.get('reid_max_distance', 200.0)
+
+    @property
+    def reid_lost_after(self) -> Optional[int]:
+        return self.config.get('reid_lost_after')
+
+    @property
+    def reid_min_hits(self) -> int:
+        return self.config.get('reid_min_hits', 3)
+
+    @property
+    def decode_process(self) -> bool:
+        return self.config.get('decode_process', False)
+
+    @property
+    def frame_ring_slots(self) -> int:
+        return self.config.get('frame_ring_slots', 8)
+
+    @property
+    def memory_profile_interval(self) -> int:
+        return self.config.get('memory_profile_interval', 0)
+
+    @property
+    def memory_budget_mb_per_hour(self) -> Optional[float]:
+        return self.config.get('memory_budget_mb_per_hour')
+
+    @property
+    def memory_profile_dir(self) -> str:
+        return self.config.get('memory_profile_dir', os.path.join(self.results_dir, 'memory_profiles'))
+
+    @property
+    def activity_scan(self) -> bool:
+        return self.config.get('activity_scan', False)
+
+    @property
+    def activity_scan_fps(self) -> float:
+        return self.config.get('activity_scan_fps', 2.0)
+
+    @property
+    def activity_scan_width(self) -> int:
+        return self.config.get('activity_scan_width', 160)
+
+    @property
+    def activity_scan_seek(self) -> bool:
+        return self.config.get('activity_scan_seek', False)
+
+    @property
+    def activity_pixel_delta(self) -> int:
+        return self.config.get('activity_pixel_delta', 25)
+
+    @property
+    def activity_threshold(self) -> float:
+        return self.config.get('activity_threshold', 0.01)
+
+    @property
+    def activity_padding(self) -> float:
+        return self.config.get('activity_padding', 5.0)
+
+    @property
+    def activity_merge_gap(self) -> float:
+        return self.config.get('activity_merge_gap', 10.0)
+
+    @property
+    def load_shedding(self) -> bool:
+        return self.config.get('load_shedding', False)
+
+    @property
+    def shedding_max_lag(self) -> float:
+        return self.config.get('shedding_max_lag', 5.0)
+
+    @property
+    def shedding_recover_lag(self) -> float:
+        return self.config.get('shedding_recover_lag', 1.0)
+
+    @property
+    def shedding_hold(self) -> float:
+        return self.config.get('shedding_hold', 10.0)
+
+    @property
+    def shedding_levels(self) -> Optional[List[dict]]:
+        return self.config.get('shedding_levels')
+
+    @property
+    def absolute_time(self) -> bool:
+        return self.config.get('absolute_time', False)
+
+    @property
+    def clip_time_sources(self) -> List[str]:
+        return self.config.get('clip_time_sources', list(CLIP_TIME_SOURCES))
+
+    @property
+    def clip_time_pattern(self) -> str:
+        return self.config.get('clip_time_pattern', DEFAULT_TIME_PATTERN)
+
+    @property
+    def clip_timezone(self) -> Optional[str]:
+        return self.config.get('clip_timezone')
+
+    @property
+    def work_queue_backend(self) -> str:
+        return self.config.get('work_queue_backend', 'sqlite')
+
+    @property
+    def work_queue_path(self) -> str:
+        return self.config.get('work_queue_path', os.path.join(os.path.dirname(self.database_path), 'work_queue.db'))
+
+    @property
+    def work_queue_max_attempts(self) -> int:
+        return self.config.get('work_queue_max_attempts', 3)
+
+    @property
+    def work_queue_lease_seconds(self) -> float:
+        return self.config.get('work_queue_lease_seconds', 300)
+
+    @property
+    def work_queue_heartbeat(self) -> float:
+        return self.config.get('work_queue_heartbeat', 60)
+
+    @property
+    def work_queue_poll_interval(self) -> float:
+        return self.config.get('work_queue_poll_interval', 30)
+
+    @property
+    def work_queue_shards(self) -> int:
+        return self.config.get('work_queue_shards', 8)
+
+    @property
+    def work_queue_shards_dir(self) -> str:
+        return self.config.get('work_queue_shards_dir', os.path.join(self.results_dir, 'queue_shards'))
+
+    @property
+    def cpu_budget(self):
+        return self.config.get('cpu_budget')
+
+    @property
+    def cpu_shares(self) -> Optional[dict]:
+        return self.config.get('cpu_shares')
+
+    @property
+    def cpu_affinity(self) -> bool:
+        return self.config.get('cpu_affinity', False)
+
+    @property
+    def ingest_stable_seconds(self) -> float:
+        return self.config.get('ingest_stable_seconds', 10)
 
     @property
     def orb_threshold(self) -> float:
-        return self.get('orb_threshold', 0.3)
+        return self.config.get('orb_threshold', 0.3)
 
     @property
     def ssim_threshold(self) -> float:
-        return self.get('ssim_threshold', 0.1)
+        return self.config.get('ssim_threshold', 0.1)
 
     @property
     def time_threshold(self) -> float:
-        return self.get('time_threshold', 1800)
+        return self.config.get('time_threshold', 1800)
+
+    @property
+    def match_window(self) -> Optional[float]:
+        return self.config.get('match_window', 86400)
+
+    @property
+    def cameras(self) -> dict:
+        return self.config.get('cameras', {}) or {}
+
+    @property
+    def comparison_cache_mb(self) -> int:
+        return self.config.get('comparison_cache_mb', 256)
+
+    @property
+    def comparison_decode_reduction(self) -> int:
+        return self.config.get('comparison_decode_reduction', 1)
+
+    @property
+    def comparison_use_manifest(self) -> bool:
+        return self.config.get('comparison_use_manifest', True)
+
+    @property
+    def defer_image_moves(self) -> bool:
+        return self.config.get('defer_image_moves', False)
+
+    @property
+    def retention_image_max_age_days(self) -> dict:
+        return self.config.get('retention_image_max_age_days', {}) or {}
+
+    @property
+    def retention_keep_per_track(self) -> Optional[int]:
+        return self.config.get('retention_keep_per_track')
+
+    @property
+    def retention_recompress_after_days(self) -> Optional[float]:
+        return self.config.get('retention_recompress_after_days')
+
+    @property
+    def retention_recompress_format(self) -> str:
+        return self.config.get('retention_recompress_format', 'webp')
+
+    @property
+    def retention_recompress_quality(self) -> int:
+        return self.config.get('retention_recompress_quality', 60)
+
+    @property
+    def retention_output_max_age_days(self) -> Optional[float]:
+        return self.config.get('retention_output_max_age_days')
+
+    @property
+    def retention_archive_after_days(self) -> Optional[float]:
+        return self.config.get('retention_archive_after_days')
+
+    @property
+    def retention_archive_statuses(self) -> List[str]:
+        return self.config.get('retention_archive_statuses', ['Match', 'Duplicate', 'Orphan'])
+
+    @property
+    def retention_archive_dir(self) -> str:
+        return self.config.get('retention_archive_dir', os.path.join(self.database_dir, 'archive'))
+
+    @property
+    def retention_maintenance_interval_days(self) -> Optional[float]:
+        return self.config.get('retention_maintenance_interval_days', 7)
+
+    @property
+    def report_batch_size(self) -> int:
+        return self.config.get('report_batch_size', 1000)
 
     @property
     def nc(self) -> int:
-        return self.get('nc', 0)
+        return self.config.get('nc', 0)
 
     @property
     def names(self) -> List[str]:
-        return self.get('names', [])
+        return self.config.get('names', [])
+
+
+_configs = {}
+
 
-# from boat_detection.config.config import Config
-# config = Config()
-# print(config.videos_dir)
+def get_config(config_path: str = 'config.yaml') -> Config:
+    # One parsed Config per file and process; later callers share it.
+    key = os.path.abspath(config_path)
+    if key not in _configs:
+        _configs[key] = Config(config_path)
+    return _configs[key]
@@ -1,30 +1,39 @@
 import os
+import json
 import sqlite3
 import logging
 # from contextlib import closing
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-from boat_detection.utils.helpers import setup_logging, load_environment, get_env_variable
 
-load_environment()
+# Merged shards get track IDs namespace * TRACK_ID_NAMESPACE + track_id, with a namespace not used
+# before in this database, keeping them clear of IDs written by the single-process pipeline.
+TRACK_ID_NAMESPACE = 1_000_000
 
-DATABASE_DIR = get_env_variable('DATABASE_DIR')
-DATABASE_PATH = get_env_variable('DATABASE_PATH')
-LOGS_DIR = get_env_variable('LOGS_DIR')
-LOG_FILE = os.path.join(LOGS_DIR, 'database_setup.log')
-setup_logging(LOG_FILE)
-os.makedirs(LOGS_DIR, exist_ok=True)
+# Boats count towards the day they launched; rows without a launch day fall back to their insert date.
+SUMMARY_DAY = "COALESCE({row}.launch_day, date({row}.created_at), date('now'))"
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    filemode='a',
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+
+def _summary_upsert(row: str, sign: int) -> str:
+    return f'''
+        INSERT INTO daily_boat_summary (day, model, launches, on_water_total, on_water_count, matches, duplicates,
+                                        orphans)
+        VALUES ({SUMMARY_DAY.format(row=row)}, COALESCE({row}.model, ''), {sign},
+                {sign} * COALESCE({row}.on_water_time, 0), {sign} * ({row}.on_water_time IS NOT NULL),
+                {sign} * ({row}.status = 'Match'), {sign} * ({row}.status = 'Duplicate'),
+                {sign} * ({row}.status = 'Orphan'))
+        ON CONFLICT (day, model) DO UPDATE SET
+            launches = launches + excluded.launches,
+            on_water_total = on_water_total + excluded.on_water_total,
+            on_water_count = on_water_count + excluded.on_water_count,
+            matches = matches + excluded.matches,
+            duplicates = duplicates + excluded.duplicates,
+            orphans = orphans + excluded.orphans;'''
 
 
 class DatabaseManager:
-    def __init__(self, db_path: str = DATABASE_PATH):
+    def __init__(self, db_path: str):
+        # db_path comes from Config.database_path; logging is set up by the calling script.
         self.db_path = db_path
         self.conn = None
         self.cursor = None
@@ -50,21 +59,236 @@ class DatabaseManager:
                     retrieve_time REAL,
                     on_water_time REAL,
                     matchID INTEGER,
-                    model TEXT
+                    model TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    launch_day TEXT
+                )
+            ''')
+            if self._ensure_column('boats', 'created_at', 'TEXT'):
+                # Existing rows start ageing from the migration, as their real insert time is unknown.
+                self.cursor.execute('UPDATE boats SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
+            self._ensure_column('boats', 'launch_day', 'TEXT')
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS detection_images (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    track_id INTEGER NOT NULL,
+                    frame_number INTEGER,
+                    path TEXT NOT NULL UNIQUE,
+                    quality REAL,
+                    category TEXT NOT NULL DEFAULT 'Track',
+                    pending_path TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    compressed INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            self._ensure_column('detection_images', 'compressed', 'INTEGER NOT NULL DEFAULT 0')
+            self.cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_detection_images_track ON detection_images (track_id, category)')
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS track_id_namespaces (
+                    track_id_offset INTEGER PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    reserved_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self._migrate_merged_shards()
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS merged_shards (
+                    shard_path TEXT NOT NULL,
+                    run_id TEXT NOT NULL DEFAULT '',
+                    shard_index INTEGER NOT NULL,
+                    track_id_offset INTEGER,
+                    record_count INTEGER,
+                    merged_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (shard_path, run_id)
                 )
             ''')
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS processed_videos (
+                    file_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    video_file TEXT,
+                    frame_count INTEGER,
+                    completed_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (file_hash, model)
+                )
+            ''')
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ingested_files (
+                    video_file TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    ingested_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_runs (
+                    task TEXT PRIMARY KEY,
+                    last_run REAL NOT NULL
+                )
+            ''')
+            self.cursor.execute('''
+                CREATE TABLE IF NOT EXISTS load_shedding_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    video_file TEXT NOT NULL,
+                    frame_number INTEGER NOT NULL,
+                    video_time REAL NOT NULL,
+                    lag REAL NOT NULL,
+                    from_level INTEGER NOT NULL,
+                    level INTEGER NOT NULL,
+                    settings TEXT NOT NULL,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_boats_created_at ON boats (created_at)')
+            # Day partitions: matching and reports select a range of days, then scan only those rows.
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_boats_launch_day ON boats (launch_day, launch_time)')
+            self._initialize_summaries()
             self.conn.commit()
             logging.info("Database initialized and 'boats' table created or already exists.")
         except sqlite3.Error as e:
             logging.error(f"Failed to initialize database: {e}")
             raise
 
-    def insert_boat_record(self, track_id: int, status: str, launch_time: float, model: str, match_id: int = None):
+    def _initialize_summaries(self):
+        # Per-day, per-model counters kept current by triggers on boats, so reports never
+        # aggregate the whole table. Deletes are not subtracted: archived rows stay counted.
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_boat_summary'")
+        exists = self.cursor.fetchone() is not None
+        self.cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'boats_summary_insert'")
+        trigger = self.cursor.fetchone()
+        rebuild = False
+        if exists and trigger is not None and 'launch_day' not in trigger[0]:
+            # Summaries written before boats had a launch day are rebuilt on the new day key, but only
+            # for days that still have rows: archived and partitioned days keep their counts.
+            self.cursor.execute('DROP TRIGGER boats_summary_insert')
+            self.cursor.execute('DROP TRIGGER IF EXISTS boats_summary_update')
+            self.cursor.execute(f'''
+                DELETE FROM daily_boat_summary
+                WHERE day IN (SELECT DISTINCT {SUMMARY_DAY.format(row='boats')} FROM boats)
+            ''')
+            rebuild = True
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_boat_summary (
+                day TEXT NOT NULL,
+                model TEXT NOT NULL,
+                launches INTEGER NOT NULL DEFAULT 0,
+                on_water_total REAL NOT NULL DEFAULT 0,
+                on_water_count INTEGER NOT NULL DEFAULT 0,
+                matches INTEGER NOT NULL DEFAULT 0,
+                duplicates INTEGER NOT NULL DEFAULT 0,
+                orphans INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, model)
+            )
+        ''')
+        self.cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS boats_summary_insert AFTER INSERT ON boats BEGIN
+                {_summary_upsert('NEW', 1)}
+            END
+        ''')
+        self.cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS boats_summary_update
+            AFTER UPDATE OF status, on_water_time, model, created_at, launch_day ON boats BEGIN
+                {_summary_upsert('OLD', -1)}
+                {_summary_upsert('NEW', 1)}
+                DELETE FROM daily_boat_summary
+                WHERE day = {SUMMARY_DAY.format(row='OLD')} AND model = COALESCE(OLD.model, '') AND launches = 0;
+            END
+        ''')
+        if not exists or rebuild:
+            self.cursor.execute(f'''
+                INSERT INTO daily_boat_summary
+                SELECT {SUMMARY_DAY.format(row='boats')}, COALESCE(model, ''), COUNT(*),
+                       COALESCE(SUM(on_water_time), 0), COUNT(on_water_time), SUM(status = 'Match'),
+                       SUM(status = 'Duplicate'), SUM(status = 'Orphan')
+                FROM boats GROUP BY 1, 2
+            ''')
+
+    def _migrate_merged_shards(self):
+        # merged_shards used to be keyed on the shard path alone, with the offset implied by the index.
+        self.cursor.execute('PRAGMA table_info(merged_shards)')
+        columns = {row[1] for row in self.cursor.fetchall()}
+        if not columns or 'run_id' in columns:
+            return
+        self.cursor.execute('ALTER TABLE merged_shards RENAME TO merged_shards_old')
+        self.cursor.execute('''
+            CREATE TABLE merged_shards (
+                shard_path TEXT NOT NULL,
+                run_id TEXT NOT NULL DEFAULT '',
+                shard_index INTEGER NOT NULL,
+                track_id_offset INTEGER,
+                record_count INTEGER,
+                merged_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (shard_path, run_id)
+            )
+        ''')
+        self.cursor.execute('''
+            INSERT INTO merged_shards (shard_path, run_id, shard_index, track_id_offset, record_count, merged_at)
+            SELECT shard_path, '', shard_index, (shard_index + 1) * ?, record_count, merged_at FROM merged_shards_old
+        ''', (TRACK_ID_NAMESPACE,))
+        self.cursor.execute('DROP TABLE merged_shards_old')
+        logging.info("Migrated table 'merged_shards': keyed on shard path and run ID.")
+
+    def _next_track_id_offset(self) -> int:
+        # The first namespace above every merged shard, reserved namespace and track ID already stored.
+        self.cursor.execute('''
+            SELECT MAX((SELECT COALESCE(MAX(track_id_offset), 0) FROM merged_shards),
+                       (SELECT COALESCE(MAX(track_id_offset), 0) FROM track_id_namespaces),
+                       (SELECT COALESCE(MAX(track_id), 0) FROM boats))
+        ''')
+        return (self.cursor.fetchone()[0] // TRACK_ID_NAMESPACE + 1) * TRACK_ID_NAMESPACE
+
+    def reserve_track_id_namespace(self, owner: str) -> int:
+        # A track ID offset for a tracker that writes into this database alongside others.
+        try:
+            self.conn.commit()
+            self.cursor.execute('BEGIN IMMEDIATE')
+            try:
+                offset = self._next_track_id_offset()
+                self.cursor.execute('INSERT INTO track_id_namespaces (track_id_offset, owner) VALUES (?, ?)',
+                                    (offset, owner))
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+        except sqlite3.Error as e:
+            logging.error(f"Failed to reserve a track ID namespace for {owner}: {e}")
+            raise
+        logging.info(f"Reserved track IDs from {offset} for {owner}.")
+        return offset
+
+    def get_merged_shard(self, shard_path: str, run_id: str = '') -> Optional[dict]:
         try:
             self.cursor.execute('''
-                INSERT INTO boats (track_id, status, launch_time, model, matchID)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (track_id, status, launch_time, model, match_id))
+                SELECT shard_index, track_id_offset, record_count, merged_at FROM merged_shards
+                WHERE shard_path = ? AND run_id = ?
+            ''', (os.path.abspath(shard_path), run_id))
+            row = self.cursor.fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to look up merged shard {shard_path}: {e}")
+            raise
+        if row is None:
+            return None
+        return dict(zip(('shard_index', 'track_id_offset', 'record_count', 'merged_at'), row))
+
+    def _ensure_column(self, table: str, column: str, declaration: str) -> bool:
+        # Adds a column that newer code expects to a table created by an older version.
+        self.cursor.execute(f'PRAGMA table_info({table})')
+        if column in {row[1] for row in self.cursor.fetchall()}:
+            return False
+        self.cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+        logging.info(f"Migrated table '{table}': added column '{column}'.")
+        return True
+
+    def insert_boat_record(self, track_id: int, status: str, launch_time: float, model: str, match_id: int = None,
+                           launch_day: Optional[str] = None):
+        try:
+            self.cursor.execute('''
+                INSERT INTO boats (track_id, status, launch_time, model, matchID, created_at, launch_day)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+            ''', (track_id, status, launch_time, model, match_id, launch_day))
             self.conn.commit()
             logging.info(
                 f"Inserted boat record: Track ID={track_id}, Status='{status}', Launch Time={launch_time}, Model='{model}', Match ID={match_id}.")
@@ -105,6 +329,32 @@ class DatabaseManager:
             logging.error(f"Failed to retrieve launch time for Track ID={track_id}: {e}")
             raise
 
+    def get_boat_states(self, track_ids: List[int]) -> dict:
+        # {track_id: (status, launch_time)}, queried in chunks to stay under SQLite's variable limit.
+        states = {}
+        try:
+            for start in range(0, len(track_ids), 500):
+                chunk = list(track_ids[start:start + 500])
+                placeholders = ', '.join('?' * len(chunk))
+                self.cursor.execute(
+                    f'SELECT track_id, status, launch_time FROM boats WHERE track_id IN ({placeholders})', chunk)
+                for track_id, status, launch_time in self.cursor.fetchall():
+                    states[track_id] = (status, launch_time)
+            return states
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch boat states for {len(track_ids)} Track IDs: {e}")
+            raise
+
+    def get_track_ids_by_day(self, first_day: str, last_day: str) -> List[int]:
+        # Track IDs launched on the 'YYYY-MM-DD' days first_day..last_day inclusive.
+        try:
+            self.cursor.execute('SELECT track_id FROM boats WHERE launch_day BETWEEN ? AND ? ORDER BY launch_time',
+                                (first_day, last_day))
+            return [row[0] for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch track IDs launched from {first_day} to {last_day}: {e}")
+            raise
+
     def delete_boat_record(self, track_id: int):
         try:
             self.cursor.execute('DELETE FROM boats WHERE track_id = ?', (track_id,))
@@ -127,6 +377,389 @@ class DatabaseManager:
             logging.error(f"Failed to fetch boat records: {e}")
             raise
 
+    def is_video_processed(self, file_hash: str, model: str) -> bool:
+        try:
+            self.cursor.execute('SELECT 1 FROM processed_videos WHERE file_hash = ? AND model = ?', (file_hash, model))
+            return self.cursor.fetchone() is not None
+        except sqlite3.Error as e:
+            logging.error(f"Failed to look up processed video {file_hash}: {e}")
+            raise
+
+    def mark_video_processed(self, file_hash: str, model: str, video_file: str, frame_count: int):
+        try:
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO processed_videos (file_hash, model, video_file, frame_count)
+                VALUES (?, ?, ?, ?)
+            ''', (file_hash, model, video_file, frame_count))
+            self.conn.commit()
+            logging.info(f"Recorded {video_file} ({file_hash}) as processed with model '{model}'.")
+        except sqlite3.Error as e:
+            logging.error(f"Failed to record processed video {video_file}: {e}")
+            raise
+
+    def get_processed_hashes(self, model: str) -> set:
+        try:
+            self.cursor.execute('SELECT file_hash FROM processed_videos WHERE model = ?', (model,))
+            return {row[0] for row in self.cursor.fetchall()}
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch processed videos for model '{model}': {e}")
+            raise
+
+    def get_ingested_files(self) -> dict:
+        # {video_file: (size, mtime, file_hash, status)}
+        try:
+            self.cursor.execute('SELECT video_file, size, mtime, file_hash, status FROM ingested_files')
+            return {row[0]: tuple(row[1:]) for row in self.cursor.fetchall()}
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch ingested files: {e}")
+            raise
+
+    def record_ingested_file(self, video_file: str, size: int, mtime: float, file_hash: str, status: str):
+        try:
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO ingested_files (video_file, size, mtime, file_hash, status)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (video_file, size, mtime, file_hash, status))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to record ingested file {video_file}: {e}")
+            raise
+
+    def add_detection_image(self, track_id: int, frame_number: int, path: str, quality: float = None,
+                            commit: bool = True):
+        try:
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO detection_images (track_id, frame_number, path, quality)
+                VALUES (?, ?, ?, ?)
+            ''', (track_id, frame_number, path, quality))
+            if commit:
+                self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to record detection image {path} for Track ID={track_id}: {e}")
+            raise
+
+    def get_detection_images(self, track_id: int, category: str = 'Track') -> List[tuple]:
+        # Best image first, so callers can take element 0 as the track's representative image.
+        try:
+            self.cursor.execute('''
+                SELECT id, path, frame_number, quality FROM detection_images
+                WHERE track_id = ? AND category = ?
+                ORDER BY quality IS NULL, quality DESC, frame_number
+            ''', (track_id, category))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch detection images for Track ID={track_id}: {e}")
+            raise
+
+    def get_manifest_track_ids(self, category: str = 'Track') -> List[int]:
+        try:
+            self.cursor.execute(
+                'SELECT DISTINCT track_id FROM detection_images WHERE category = ? ORDER BY track_id', (category,))
+            return [row[0] for row in self.cursor.fetchall()]
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch track IDs from the image manifest: {e}")
+            raise
+
+    def classify_detection_images(self, track_id: int, category: str, dest_dir: str) -> int:
+        # Only metadata changes here; the files follow when pending moves are applied.
+        try:
+            self.cursor.execute(
+                "SELECT id, path FROM detection_images WHERE track_id = ? AND category = 'Track'", (track_id,))
+            updates = [(category, os.path.join(dest_dir, f"track_id_{track_id}_{os.path.basename(path)}"), image_id)
+                       for image_id, path in self.cursor.fetchall()]
+            self.cursor.executemany(
+                'UPDATE detection_images SET category = ?, pending_path = ? WHERE id = ?', updates)
+            self.conn.commit()
+            logging.info(f"Classified {len(updates)} images of Track ID={track_id} as '{category}'.")
+            return len(updates)
+        except sqlite3.Error as e:
+            logging.error(f"Failed to classify detection images for Track ID={track_id}: {e}")
+            raise
+
+    def get_pending_image_moves(self, limit: Optional[int] = None) -> List[tuple]:
+        try:
+            query = 'SELECT id, path, pending_path FROM detection_images WHERE pending_path IS NOT NULL ORDER BY id'
+            if limit is not None:
+                query += f' LIMIT {int(limit)}'
+            self.cursor.execute(query)
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch pending image moves: {e}")
+            raise
+
+    def complete_image_moves(self, image_ids: List[int]):
+        try:
+            self.cursor.executemany(
+                'UPDATE detection_images SET path = pending_path, pending_path = NULL WHERE id = ?',
+                [(image_id,) for image_id in image_ids])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to record {len(image_ids)} completed image moves: {e}")
+            raise
+
+    def delete_detection_images(self, track_id: int) -> List[str]:
+        try:
+            self.cursor.execute('SELECT path FROM detection_images WHERE track_id = ?', (track_id,))
+            paths = [row[0] for row in self.cursor.fetchall()]
+            self.cursor.execute('DELETE FROM detection_images WHERE track_id = ?', (track_id,))
+            self.conn.commit()
+            return paths
+        except sqlite3.Error as e:
+            logging.error(f"Failed to delete detection images for Track ID={track_id}: {e}")
+            raise
+
+    def delete_detection_images_by_path(self, paths: List[str]):
+        try:
+            self.cursor.executemany('DELETE FROM detection_images WHERE path = ?', [(path,) for path in paths])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to delete {len(paths)} detection images from the manifest: {e}")
+            raise
+
+    def get_excess_detection_images(self, keep: int, exclude_category: str = 'Track') -> List[tuple]:
+        # (id, path) of every image beyond the best `keep` of its track and category.
+        try:
+            self.cursor.execute('''
+                SELECT id, path FROM (
+                    SELECT id, path, ROW_NUMBER() OVER (
+                        PARTITION BY track_id, category
+                        ORDER BY quality IS NULL, quality DESC, frame_number
+                    ) AS rank
+                    FROM detection_images
+                    WHERE category != ? AND pending_path IS NULL
+                )
+                WHERE rank > ?
+                ORDER BY id
+            ''', (exclude_category, keep))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch detection images beyond {keep} per track: {e}")
+            raise
+
+    def delete_detection_images_by_id(self, image_ids: List[int]):
+        try:
+            self.cursor.executemany('DELETE FROM detection_images WHERE id = ?', [(i,) for i in image_ids])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to delete {len(image_ids)} detection images from the manifest: {e}")
+            raise
+
+    def get_images_to_recompress(self, created_before: str, exclude_category: str = 'Track') -> List[tuple]:
+        try:
+            self.cursor.execute('''
+                SELECT id, path FROM detection_images
+                WHERE compressed = 0 AND pending_path IS NULL AND category != ? AND created_at < ?
+                ORDER BY id
+            ''', (exclude_category, created_before))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch detection images to recompress: {e}")
+            raise
+
+    def mark_images_recompressed(self, updates: List[tuple]):
+        # updates: (new path, id)
+        try:
+            self.cursor.executemany('UPDATE detection_images SET path = ?, compressed = 1 WHERE id = ?', updates)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to record {len(updates)} recompressed detection images: {e}")
+            raise
+
+    def archive_boat_records(self, archive_dir: str, created_before: str, statuses: List[str]) -> dict:
+        # Moves finished boat records into one SQLite file per month of creation
+        # (boats_YYYY_MM.db), each month in its own transaction. Returns {month: count}.
+        placeholders = ', '.join('?' * len(statuses))
+        condition = f'created_at < ? AND status IN ({placeholders})'
+        archived = {}
+        try:
+            self.conn.commit()
+            self.cursor.execute(
+                f"SELECT DISTINCT strftime('%Y_%m', created_at) FROM boats WHERE {condition}",
+                (created_before, *statuses))
+            months = [row[0] for row in self.cursor.fetchall()]
+            for month in months:
+                archive_path = os.path.abspath(os.path.join(archive_dir, f"boats_{month}.db"))
+                params = (created_before, *statuses, month)
+                self.cursor.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+                try:
+                    self.cursor.execute('CREATE TABLE IF NOT EXISTS archive.boats AS SELECT * FROM main.boats WHERE 0')
+                    columns = self._archive_columns()
+                    self.cursor.execute(f'''
+                        INSERT INTO archive.boats ({columns}) SELECT {columns} FROM main.boats
+                        WHERE {condition} AND strftime('%Y_%m', created_at) = ?
+                    ''', params)
+                    archived[month] = self.cursor.rowcount
+                    self.cursor.execute(
+                        f"DELETE FROM main.boats WHERE {condition} AND strftime('%Y_%m', created_at) = ?", params)
+                    self.conn.commit()
+                except sqlite3.Error:
+                    self.conn.rollback()
+                    raise
+                finally:
+                    self.cursor.execute('DETACH DATABASE archive')
+                logging.info(f"Archived {archived[month]} boat records to {archive_path}.")
+            return archived
+        except sqlite3.Error as e:
+            logging.error(f"Failed to archive boat records created before {created_before}: {e}")
+            raise
+
+    def _archive_columns(self) -> str:
+        # An archive file written before a migration gets the columns added since.
+        self.cursor.execute('PRAGMA main.table_info(boats)')
+        columns = [(row[1], row[2]) for row in self.cursor.fetchall()]
+        self.cursor.execute('PRAGMA archive.table_info(boats)')
+        archived = {row[1] for row in self.cursor.fetchall()}
+        for name, declared_type in columns:
+            if name not in archived:
+                self.cursor.execute(f'ALTER TABLE archive.boats ADD COLUMN {name} {declared_type}')
+        return ', '.join(name for name, _ in columns)
+
+    def get_last_maintenance(self, task: str) -> Optional[float]:
+        try:
+            self.cursor.execute('SELECT last_run FROM maintenance_runs WHERE task = ?', (task,))
+            row = self.cursor.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logging.error(f"Failed to look up the last '{task}' run: {e}")
+            raise
+
+    def record_maintenance(self, task: str, run_at: float):
+        try:
+            self.cursor.execute('INSERT OR REPLACE INTO maintenance_runs (task, last_run) VALUES (?, ?)',
+                                (task, run_at))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to record the '{task}' run: {e}")
+            raise
+
+    def record_load_shedding(self, video_file: str, event: dict):
+        try:
+            self.cursor.execute('''
+                INSERT INTO load_shedding_events (video_file, frame_number, video_time, lag, from_level, level,
+                                                  settings)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (video_file, event['frame_number'], event['video_time'], event['lag'], event['from_level'],
+                  event['level'], json.dumps(event['settings'], sort_keys=True)))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to record load shedding change for {video_file}: {e}")
+            raise
+
+    def get_load_shedding_events(self, video_file: Optional[str] = None) -> List[dict]:
+        try:
+            query = ('SELECT video_file, frame_number, video_time, lag, from_level, level, settings, created_at '
+                     'FROM load_shedding_events')
+            if video_file is None:
+                self.cursor.execute(query + ' ORDER BY id')
+            else:
+                self.cursor.execute(query + ' WHERE video_file = ? ORDER BY id', (video_file,))
+            columns = ('video_file', 'frame_number', 'video_time', 'lag', 'from_level', 'level', 'settings',
+                       'created_at')
+            events = [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+            for event in events:
+                event['settings'] = json.loads(event['settings'])
+            return events
+        except sqlite3.Error as e:
+            logging.error(f"Failed to fetch load shedding events: {e}")
+            raise
+
+    def vacuum(self):
+        try:
+            # VACUUM cannot run inside a transaction.
+            self.conn.commit()
+            self.cursor.execute('VACUUM')
+            logging.info(f"Vacuumed database {self.db_path}.")
+        except sqlite3.Error as e:
+            logging.error(f"Failed to vacuum database {self.db_path}: {e}")
+            raise
+
+    def analyze(self):
+        try:
+            self.cursor.execute('ANALYZE')
+            self.conn.commit()
+            logging.info(f"Analyzed database {self.db_path}.")
+        except sqlite3.Error as e:
+            logging.error(f"Failed to analyze database {self.db_path}: {e}")
+            raise
+
+    def merge_shard(self, shard_path: str, run_id: str = '', shard_index: int = 0,
+                    shard_images_dir: Optional[str] = None, images_dir: Optional[str] = None) -> Tuple[int, int]:
+        # Copies a shard database into this one, shifting track IDs (and the matchIDs that refer
+        # to them) into a namespace no earlier merge used. Returns (records merged, track ID
+        # offset). A shard path already merged under the same run ID is skipped, so re-running a
+        # merge is a no-op, unless the shard has changed since: that is a reused shard directory
+        # and raises rather than being dropped.
+        shard_path = os.path.abspath(shard_path)
+        try:
+            self.conn.commit()
+            self.cursor.execute('ATTACH DATABASE ? AS shard', (shard_path,))
+            try:
+                # IMMEDIATE: shards merged from several machines must not pick the same namespace.
+                self.cursor.execute('BEGIN IMMEDIATE')
+                self.cursor.execute('''
+                    SELECT track_id_offset, record_count, (SELECT COUNT(*) FROM shard.boats) FROM merged_shards
+                    WHERE shard_path = ? AND run_id = ?
+                ''', (shard_path, run_id))
+                merged = self.cursor.fetchone()
+                if merged is not None:
+                    self.conn.commit()
+                    if merged[1] != merged[2]:
+                        raise ValueError(f"Shard {shard_path} was merged for run '{run_id}' with {merged[1]} "
+                                         f"records but now has {merged[2]}; merge it under a new run ID.")
+                    logging.info(f"Shard {shard_path} (run {run_id}) was already merged. Skipping.")
+                    return 0, merged[0]
+                track_id_offset = self._next_track_id_offset()
+                self.cursor.execute('PRAGMA shard.table_info(boats)')
+                launch_day = 'launch_day' if 'launch_day' in {row[1] for row in self.cursor.fetchall()} else 'NULL'
+                self.cursor.execute(f'''
+                    INSERT INTO boats (track_id, status, launch_time, retrieve_time, on_water_time, matchID, model,
+                                                 created_at, launch_day)
+                    SELECT track_id + ?, status, launch_time, retrieve_time, on_water_time,
+                           CASE WHEN matchID IS NULL THEN NULL ELSE matchID + ? END, model,
+                           COALESCE(created_at, CURRENT_TIMESTAMP), {launch_day}
+                    FROM shard.boats
+                ''', (track_id_offset, track_id_offset))
+                inserted = self.cursor.rowcount
+                self.cursor.execute('''
+                    INSERT OR IGNORE INTO processed_videos (file_hash, model, video_file, frame_count, completed_at)
+                    SELECT file_hash, model, video_file, frame_count, completed_at FROM shard.processed_videos
+                ''')
+                if shard_images_dir is not None and images_dir is not None:
+                    self._merge_shard_manifest(shard_images_dir, images_dir, track_id_offset)
+                self.cursor.execute('''
+                    INSERT INTO merged_shards (shard_path, run_id, shard_index, track_id_offset, record_count)
+                    VALUES (?, ?, ?, ?, (SELECT COUNT(*) FROM shard.boats))
+                ''', (shard_path, run_id, shard_index, track_id_offset))
+                self.conn.commit()
+            except (sqlite3.Error, ValueError):
+                self.conn.rollback()
+                raise
+            finally:
+                self.cursor.execute('DETACH DATABASE shard')
+            logging.info(f"Merged {inserted} boat records from shard {shard_path} with track ID offset "
+                         f"{track_id_offset}.")
+            return inserted, track_id_offset
+        except (sqlite3.Error, ValueError) as e:
+            logging.error(f"Failed to merge shard database {shard_path}: {e}")
+            raise
+
+    def _merge_shard_manifest(self, shard_images_dir: str, images_dir: str, track_id_offset: int):
+        # Image paths are rewritten to where merge_shard_images puts each track folder.
+        self.cursor.execute("SELECT name FROM shard.sqlite_master WHERE type = 'table' AND name = 'detection_images'")
+        if self.cursor.fetchone() is None:
+            return
+        self.cursor.execute('SELECT track_id, frame_number, path, quality, created_at FROM shard.detection_images')
+        rows = []
+        for track_id, frame_number, path, quality, created_at in self.cursor.fetchall():
+            new_id = track_id + track_id_offset
+            relative = os.path.relpath(path, os.path.join(shard_images_dir, f"track_id_{track_id}"))
+            rows.append((new_id, frame_number, os.path.join(images_dir, f"track_id_{new_id}", relative),
+                         quality, created_at))
+        self.cursor.executemany('''
+            INSERT INTO detection_images (track_id, frame_number, path, quality, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+
     def close(self):
         try:
             if self.conn:
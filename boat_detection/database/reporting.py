@@ -0,0 +1,140 @@
+import csv
+import logging
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from boat_detection.database.db_manager import DatabaseManager
+
+BOAT_COLUMNS = ('id', 'track_id', 'status', 'launch_time', 'retrieve_time', 'on_water_time', 'matchID', 'model',
+                'created_at', 'launch_day')
+SUMMARY_COLUMNS = ('day', 'launches', 'matches', 'duplicates', 'orphans', 'mean_on_water_time', 'orphan_rate')
+# Arrow type names for Parquet export; anything not listed is written as a string.
+COLUMN_TYPES = {
+    'id': 'int64', 'track_id': 'int64', 'matchID': 'int64', 'launches': 'int64', 'matches': 'int64',
+    'duplicates': 'int64', 'orphans': 'int64', 'launch_time': 'float64', 'retrieve_time': 'float64',
+    'on_water_time': 'float64', 'mean_on_water_time': 'float64', 'orphan_rate': 'float64',
+}
+
+
+class BoatReporter:
+    # Read-only queries for dashboards and exports. Rows are paged by id (keyset
+    # pagination), so each page is an index range scan however deep the caller goes.
+    def __init__(self, db_manager: DatabaseManager, batch_size: int = 1000):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _filters(status: Union[str, Sequence[str], None] = None, model: Optional[str] = None,
+                 since: Optional[str] = None, until: Optional[str] = None, day_from: Optional[str] = None,
+                 day_to: Optional[str] = None) -> Tuple[List[str], list]:
+        # since/until bound created_at and use its 'YYYY-MM-DD HH:MM:SS' UTC format; a bare date works too.
+        # day_from/day_to select launch day partitions, both inclusive.
+        clauses, params = [], []
+        if status is not None:
+            statuses = [status] if isinstance(status, str) else list(status)
+            clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if model is not None:
+            clauses.append('model = ?')
+            params.append(model)
+        if since is not None:
+            clauses.append('created_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('created_at < ?')
+            params.append(until)
+        if day_from is not None:
+            clauses.append('launch_day >= ?')
+            params.append(day_from)
+        if day_to is not None:
+            clauses.append('launch_day <= ?')
+            params.append(day_to)
+        return clauses, params
+
+    def page(self, after_id: int = 0, limit: Optional[int] = None, **filters) -> Tuple[List[dict], Optional[int]]:
+        # Returns one page of boats and the after_id for the next page, or None after the last one.
+        limit = limit or self.batch_size
+        clauses, params = self._filters(**filters)
+        where = ' AND '.join(['id > ?'] + clauses)
+        try:
+            cursor = self.db_manager.conn.cursor()
+            cursor.execute(f"SELECT {', '.join(BOAT_COLUMNS)} FROM boats WHERE {where} ORDER BY id LIMIT ?",
+                           [after_id] + params + [limit])
+            rows = [dict(zip(BOAT_COLUMNS, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"Failed to fetch boats after id {after_id}: {e}")
+            raise
+        return rows, (rows[-1]['id'] if len(rows) == limit else None)
+
+    def iter_boats(self, **filters) -> Iterator[dict]:
+        after_id = 0
+        while after_id is not None:
+            rows, after_id = self.page(after_id, **filters)
+            yield from rows
+
+    def daily_summary(self, since: Optional[str] = None, until: Optional[str] = None,
+                      model: Optional[str] = None) -> List[dict]:
+        # Reads the trigger-maintained daily_boat_summary table; since/until are 'YYYY-MM-DD' days.
+        clauses, params = [], []
+        if since is not None:
+            clauses.append('day >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('day < ?')
+            params.append(until)
+        if model is not None:
+            clauses.append('model = ?')
+            params.append(model)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        try:
+            cursor = self.db_manager.conn.cursor()
+            cursor.execute(f'''
+                SELECT day, SUM(launches), SUM(matches), SUM(duplicates), SUM(orphans),
+                       SUM(on_water_total) / NULLIF(SUM(on_water_count), 0),
+                       CAST(SUM(orphans) AS REAL) / NULLIF(SUM(launches), 0)
+                FROM daily_boat_summary {where}
+                GROUP BY day ORDER BY day
+            ''', params)
+            return [dict(zip(SUMMARY_COLUMNS, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"Failed to read the daily boat summary: {e}")
+            raise
+
+
+def export_csv(rows: Iterable[dict], path: str, columns: Sequence[str] = BOAT_COLUMNS) -> int:
+    count = 0
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(columns), extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    logging.info(f"Exported {count} rows to {path}.")
+    return count
+
+
+def export_parquet(rows: Iterable[dict], path: str, columns: Sequence[str] = BOAT_COLUMNS,
+                   batch_size: int = 10000) -> int:
+    # Written one row group per batch, so memory stays bounded by batch_size.
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        logging.error("Parquet export needs pyarrow; install it or export to CSV instead.")
+        raise
+
+    schema = pa.schema([(column, getattr(pa, COLUMN_TYPES.get(column, 'string'))()) for column in columns])
+
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch or count == 0:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            count += len(batch)
+    logging.info(f"Exported {count} rows to {path}.")
+    return count
@@ -0,0 +1,201 @@
+import os
+import time
+import logging
+import cv2
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.utils.helpers import ensure_directory
+
+DAY = 86400
+# Manifest category -> folder under detection_images_dir; live tracks use their track_id_* folders.
+CATEGORY_DIRS = {'Track': None, 'Match': 'matches', 'Duplicate': 'duplicates', 'Orphan': 'orphans'}
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.m4v', '.avi')
+RECOMPRESS_FORMATS = {'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY), 'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY)}
+MAINTENANCE_TASKS = ('vacuum', 'analyze')
+
+
+def sqlite_timestamp(seconds: float) -> str:
+    # Same format and zone as SQLite's CURRENT_TIMESTAMP, so the two compare as strings.
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class RetentionEngine:
+    def __init__(self, config: dict, db_manager: DatabaseManager, clock=time.time):
+        self.db_manager = db_manager
+        self.detection_images_dir = config['detection_images_dir']
+        self.output_dir = config['output_dir']
+        self.image_max_age_days = config.get('retention_image_max_age_days') or {}
+        unknown = set(self.image_max_age_days) - set(CATEGORY_DIRS)
+        if unknown:
+            raise ValueError(f"Unknown image categories {sorted(unknown)} in retention_image_max_age_days. "
+                             f"Choose from {list(CATEGORY_DIRS)}.")
+        self.keep_per_track = config.get('retention_keep_per_track')
+        self.recompress_after_days = config.get('retention_recompress_after_days')
+        self.recompress_format = config.get('retention_recompress_format', 'webp')
+        if self.recompress_format not in RECOMPRESS_FORMATS:
+            raise ValueError(f"Unknown recompression format '{self.recompress_format}'. "
+                             f"Choose from {list(RECOMPRESS_FORMATS)}.")
+        self.recompress_quality = config.get('retention_recompress_quality', 60)
+        self.output_max_age_days = config.get('retention_output_max_age_days')
+        self.archive_after_days = config.get('retention_archive_after_days')
+        self.archive_statuses = config.get('retention_archive_statuses', ['Match', 'Duplicate', 'Orphan'])
+        self.archive_dir = config.get('retention_archive_dir',
+                                      os.path.join(os.path.dirname(config['database_path']), 'archive'))
+        self.maintenance_interval_days = config.get('retention_maintenance_interval_days', 7)
+        self.clock = clock
+
+    def run(self) -> dict:
+        now = self.clock()
+        summary = {'expired_images': self.expire_images(now), 'pruned_images': self.prune_tracks()}
+        summary['recompressed_images'], summary['bytes_saved'] = self.recompress_images(now)
+        summary['expired_outputs'] = self.expire_outputs(now)
+        summary['archived_records'] = self.archive_records(now)
+        summary['maintenance'] = self.run_maintenance(now)
+        logging.info(f"Retention run finished: {summary}.")
+        return summary
+
+    def _category_dirs(self, category: str) -> List[str]:
+        if CATEGORY_DIRS[category] is not None:
+            directory = os.path.join(self.detection_images_dir, CATEGORY_DIRS[category])
+            return [directory] if os.path.isdir(directory) else []
+        if not os.path.isdir(self.detection_images_dir):
+            return []
+        return [entry.path for entry in os.scandir(self.detection_images_dir)
+                if entry.is_dir() and entry.name.startswith('track_id_')]
+
+    @staticmethod
+    def _remove_old_files(directory: str, cutoff: float, extensions: Tuple[str, ...]) -> List[str]:
+        removed = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.lower().endswith(extensions) and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed.append(entry.path)
+        return removed
+
+    def expire_images(self, now: float) -> int:
+        # Ages come from file mtimes, so folders from before the manifest are covered too;
+        # matching manifest rows are dropped afterwards.
+        removed = []
+        for category, max_age_days in self.image_max_age_days.items():
+            if max_age_days is None:
+                continue
+            for directory in self._category_dirs(category):
+                removed.extend(self._remove_old_files(directory, now - max_age_days * DAY, IMAGE_EXTENSIONS))
+                if CATEGORY_DIRS[category] is None and not os.listdir(directory):
+                    os.rmdir(directory)
+        if removed:
+            self.db_manager.delete_detection_images_by_path(removed)
+            logging.info(f"Removed {len(removed)} expired detection images.")
+        return len(removed)
+
+    def prune_tracks(self) -> int:
+        # Keeps the best-quality images of each classified track. Live tracks are left
+        # alone because the tracker is still adding to them.
+        if self.keep_per_track is None:
+            return 0
+        excess = self.db_manager.get_excess_detection_images(self.keep_per_track)
+        for _, path in excess:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.db_manager.delete_detection_images_by_id([image_id for image_id, _ in excess])
+        if excess:
+            logging.info(f"Pruned {len(excess)} detection images beyond {self.keep_per_track} per track.")
+        return len(excess)
+
+    def _recompress(self, path: str) -> Tuple[str, int]:
+        # Returns the path the image now lives at and the bytes saved. The original is kept
+        # whenever re-encoding would not make it smaller.
+        extension, quality_flag = RECOMPRESS_FORMATS[self.recompress_format]
+        image = cv2.imread(path)
+        if image is None:
+            logging.warning(f"Could not read {path} for recompression. Skipping.")
+            return path, 0
+        ok, data = cv2.imencode(extension, image, [quality_flag, int(self.recompress_quality)])
+        stat = os.stat(path)
+        original_size = stat.st_size
+        new_path = os.path.splitext(path)[0] + extension
+        if not ok or len(data) >= original_size or (new_path != path and os.path.exists(new_path)):
+            return path, 0
+        tmp_path = new_path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(data.tobytes())
+        os.replace(tmp_path, new_path)
+        # Expiry goes by mtime, so the recompressed file keeps the original's age.
+        os.utime(new_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        if new_path != path:
+            os.remove(path)
+        return new_path, original_size - len(data)
+
+    def recompress_images(self, now: float) -> Tuple[int, int]:
+        if self.recompress_after_days is None:
+            return 0, 0
+        rows = self.db_manager.get_images_to_recompress(sqlite_timestamp(now - self.recompress_after_days * DAY))
+        updates = []
+        recompressed = saved = 0
+        for image_id, path in rows:
+            if not os.path.exists(path):
+                continue
+            try:
+                new_path, image_saved = self._recompress(path)
+            except Exception as e:
+                logging.error(f"Failed to recompress {path}: {e}")
+                continue
+            updates.append((new_path, image_id))
+            if image_saved:
+                recompressed += 1
+                saved += image_saved
+        self.db_manager.mark_images_recompressed(updates)
+        if recompressed:
+            logging.info(f"Recompressed {recompressed} detection images to {self.recompress_format}, "
+                         f"saving {saved / 1024 / 1024:.1f} MB.")
+        return recompressed, saved
+
+    def expire_outputs(self, now: float) -> int:
+        if self.output_max_age_days is None or not os.path.isdir(self.output_dir):
+            return 0
+        removed = []
+        for root, _, _ in os.walk(self.output_dir):
+            removed.extend(self._remove_old_files(root, now - self.output_max_age_days * DAY, VIDEO_EXTENSIONS))
+        if removed:
+            logging.info(f"Removed {len(removed)} expired output videos from {self.output_dir}.")
+        return len(removed)
+
+    def archive_records(self, now: float) -> int:
+        if self.archive_after_days is None or not self.archive_statuses:
+            return 0
+        ensure_directory(self.archive_dir)
+        archived = self.db_manager.archive_boat_records(
+            self.archive_dir, sqlite_timestamp(now - self.archive_after_days * DAY), list(self.archive_statuses))
+        return sum(archived.values())
+
+    def run_maintenance(self, now: float) -> List[str]:
+        # VACUUM first so ANALYZE sees the compacted tables.
+        if self.maintenance_interval_days is None:
+            return []
+        done = []
+        for task in MAINTENANCE_TASKS:
+            last_run = self.db_manager.get_last_maintenance(task)
+            if last_run is not None and now - last_run < self.maintenance_interval_days * DAY:
+                continue
+            getattr(self.db_manager, task)()
+            self.db_manager.record_maintenance(task, now)
+            done.append(task)
+        return done
+
+
+def run_retention(config: dict) -> Dict[str, object]:
+    db_manager = DatabaseManager(db_path=config['database_path'])
+    try:
+        db_manager.initialize_database()
+        return RetentionEngine(config, db_manager).run()
+    except Exception as e:
+        logging.error(f"Retention run failed: {e}")
+        raise
+    finally:
+        db_manager.close()
@@ -0,0 +1,16 @@
+import cv2
+import numpy as np
+
+
+def draw_track(frame: np.ndarray, box, track_id: int, positions: np.ndarray) -> None:
+    x_center, y_center, w, h = box
+    x1 = int(x_center - w / 2)
+    y1 = int(y_center - h / 2)
+    x2 = int(x_center + w / 2)
+    y2 = int(y_center + h / 2)
+    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    cv2.putText(frame, f'ID: {track_id}', (x1, y1 - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+    if len(positions) >= 2:
+        cv2.polylines(frame, [np.asarray(positions).astype(np.int32)], False, (255, 0, 0), 2)
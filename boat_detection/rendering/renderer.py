@@ -0,0 +1,226 @@
+import os
+import shutil
+import logging
+import subprocess
+import cv2
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from boat_detection.rendering.annotate import draw_track
+from boat_detection.tracking.detection_log import DetectionLogReader
+from boat_detection.tracking.roi import RegionOfInterest, get_camera_config
+from boat_detection.tracking.track_store import TrackHistoryStore
+from boat_detection.utils.helpers import ensure_directory
+from boat_detection.utils.resources import ThreadBudget, limit_threads
+
+
+class OpenCVEncoder:
+    extension = '.mp4'
+    # OpenCV has no container-level concat, so a range is always rendered as one serial chunk.
+    can_stitch = False
+
+    def __init__(self, path: str, fps: float, frame_size: Tuple[int, int], codec: str = 'mp4v'):
+        self.path = path
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, frame_size)
+        if not self.writer.isOpened():
+            raise RuntimeError(f"OpenCV could not open a '{codec}' writer for {path}.")
+
+    def write(self, frame: np.ndarray) -> None:
+        self.writer.write(frame)
+
+    def close(self) -> None:
+        self.writer.release()
+
+
+class FFmpegEncoder:
+    extension = '.mp4'
+    can_stitch = True
+
+    def __init__(self, path: str, fps: float, frame_size: Tuple[int, int], codec: str = 'libx264'):
+        self.path = path
+        width, height = frame_size
+        command = [
+            FFmpegEncoder.executable(), '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f"{width}x{height}", '-r', str(fps), '-i', '-',
+            '-c:v', codec, '-pix_fmt', 'yuv420p', path,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    @staticmethod
+    def executable() -> str:
+        path = shutil.which('ffmpeg')
+        if path is None:
+            raise RuntimeError("The ffmpeg render backend needs an ffmpeg executable on PATH.")
+        return path
+
+    def write(self, frame: np.ndarray) -> None:
+        self.process.stdin.write(np.ascontiguousarray(frame).tobytes())
+
+    def close(self) -> None:
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with status {self.process.returncode} writing {self.path}.")
+
+    @staticmethod
+    def stitch(chunk_paths: List[str], output_path: str, fps: float, frame_size: Tuple[int, int],
+               codec: str = 'libx264') -> None:
+        # Chunks share one encoder configuration, so the concat demuxer can join them without re-encoding.
+        list_path = f"{output_path}.chunks.txt"
+        with open(list_path, 'w') as file:
+            for chunk_path in chunk_paths:
+                file.write(f"file '{os.path.abspath(chunk_path)}'\n")
+        try:
+            subprocess.run([FFmpegEncoder.executable(), '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                            '-i', list_path, '-c', 'copy', output_path], check=True)
+        finally:
+            os.remove(list_path)
+
+
+ENCODER_BACKENDS = {
+    'opencv': OpenCVEncoder,
+    'ffmpeg': FFmpegEncoder,
+}
+
+DEFAULT_CODECS = {
+    'opencv': 'mp4v',
+    'ffmpeg': 'libx264',
+}
+
+
+def chunk_ranges(start_frame: int, end_frame: int, chunk_frames: int) -> List[Tuple[int, int]]:
+    if chunk_frames < 1:
+        raise ValueError(f"Chunk length must be at least 1 frame, got {chunk_frames}.")
+    return [(start, min(start + chunk_frames, end_frame)) for start in range(start_frame, end_frame, chunk_frames)]
+
+
+def render_chunk(video_path: str, log_dir: str, chunk_path: str, start_frame: int, end_frame: int,
+                 backend: str, codec: str, history_window: int, roi_polygon=None) -> str:
+    # Frame numbers follow the tracker: 1-based, so frame N is decoded after seeking to N - 1.
+    log = DetectionLogReader(log_dir)
+    fps = log.metadata['fps']
+    frame_size = tuple(log.metadata['frame_size'])
+    roi = RegionOfInterest(roi_polygon, frame_size) if roi_polygon else None
+
+    # Replay a short pre-roll from the log so trails are already drawn on the chunk's first frame.
+    history = TrackHistoryStore(history_window)
+    preroll_start = max(1, start_frame - int(2 * fps))
+    for frame_number in range(preroll_start, start_frame):
+        boxes, track_ids, _ = log.frame(frame_number)
+        history.update(track_ids, boxes[:, :2], frame_number)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video file: {video_path}")
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame - 1)
+
+    encoder = ENCODER_BACKENDS[backend](chunk_path, fps, frame_size, codec)
+    try:
+        for frame_number in range(start_frame, end_frame):
+            ret, frame = cap.read()
+            if not ret:
+                logging.warning(f"Video {video_path} ended at frame {frame_number - 1} while rendering.")
+                break
+            frame = cv2.resize(frame, frame_size)
+            boxes, track_ids, _ = log.frame(frame_number)
+            history.update(track_ids, boxes[:, :2], frame_number)
+            for box, track_id in zip(boxes, track_ids):
+                draw_track(frame, box, int(track_id), history.history(int(track_id)))
+            if roi is not None:
+                roi.draw(frame)
+            encoder.write(frame)
+    finally:
+        encoder.close()
+        cap.release()
+    return chunk_path
+
+
+class VideoRenderer:
+    def __init__(self, config: dict):
+        self.config = config
+        self.videos_dir = config['videos_dir']
+        self.detection_logs_dir = config.get('detection_logs_dir',
+                                             os.path.join(config['results_dir'], 'detection_logs'))
+        self.render_dir = config.get('render_dir', os.path.join(config['output_dir'], 'renders'))
+        self.backend = config.get('render_backend', 'opencv')
+        if self.backend not in ENCODER_BACKENDS:
+            raise ValueError(f"Unknown render backend '{self.backend}'. Choose from {sorted(ENCODER_BACKENDS)}.")
+        self.codec = config.get('render_codec') or DEFAULT_CODECS[self.backend]
+        self.thread_budget = ThreadBudget.from_config(config)
+        self.workers = config.get('render_workers',
+                                  self.thread_budget.split['encode'] if self.thread_budget else os.cpu_count() or 1)
+        self.chunk_seconds = config.get('render_chunk_seconds', 60)
+        self.history_window = config.get('valid_detection_count', 5)
+        self.cameras = config.get('cameras') or {}
+        ensure_directory(self.render_dir)
+
+    def render(self, video_file: str, start_sec: float = 0.0, end_sec: Optional[float] = None,
+               output_path: Optional[str] = None) -> str:
+        video_path = os.path.join(self.videos_dir, video_file)
+        log_dir = os.path.join(self.detection_logs_dir, os.path.splitext(video_file)[0])
+        log = DetectionLogReader(log_dir)
+        fps = log.metadata['fps']
+        frame_size = tuple(log.metadata['frame_size'])
+
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total_frames <= 0 and len(log) > 0:
+            total_frames = int(log.frames[-1])
+
+        start_frame = max(1, int(start_sec * fps) + 1)
+        end_frame = total_frames + 1 if end_sec is None else min(total_frames + 1, int(end_sec * fps) + 1)
+        if end_frame <= start_frame:
+            raise ValueError(f"Empty render range {start_sec}-{end_sec}s for {video_file}.")
+
+        if output_path is None:
+            name = f"render_{os.path.splitext(video_file)[0]}_{start_frame:06d}_{end_frame - 1:06d}"
+            output_path = os.path.join(self.render_dir, name + ENCODER_BACKENDS[self.backend].extension)
+
+        roi_polygon = get_camera_config(self.cameras, video_file).get('roi')
+        encoder = ENCODER_BACKENDS[self.backend]
+        if encoder.can_stitch:
+            chunks = chunk_ranges(start_frame, end_frame, max(1, int(self.chunk_seconds * fps)))
+        else:
+            # Stitching would decode and re-encode every chunk serially, costing a second lossy
+            # encode and most of the parallel speed-up.
+            chunks = [(start_frame, end_frame)]
+            if self.workers > 1:
+                logging.info(f"The {self.backend} backend cannot join chunks without re-encoding; rendering "
+                             f"{video_file} serially. Use the ffmpeg backend for parallel rendering.")
+        chunk_paths = [f"{output_path}.part{index:04d}{ENCODER_BACKENDS[self.backend].extension}"
+                       for index in range(len(chunks))]
+        logging.info(f"Rendering {video_file} frames {start_frame}-{end_frame - 1} in {len(chunks)} chunks "
+                     f"with the {self.backend} backend ({self.codec}).")
+
+        try:
+            if len(chunks) == 1 or self.workers <= 1:
+                for (start, end), chunk_path in zip(chunks, chunk_paths):
+                    render_chunk(video_path, log_dir, chunk_path, start, end, self.backend, self.codec,
+                                 self.history_window, roi_polygon)
+            else:
+                workers = min(self.workers, len(chunks))
+                pool_options = {}
+                if self.thread_budget is not None:
+                    # Each render process decodes and encodes with its part of the encode share.
+                    pool_options = {'initializer': limit_threads,
+                                    'initargs': (None, self.thread_budget.per_worker('encode', workers),
+                                                 self.thread_budget.cores_for('encode'))}
+                with ProcessPoolExecutor(max_workers=workers, **pool_options) as executor:
+                    futures = [executor.submit(render_chunk, video_path, log_dir, chunk_path, start, end,
+                                               self.backend, self.codec, self.history_window, roi_polygon)
+                               for (start, end), chunk_path in zip(chunks, chunk_paths)]
+                    for future in futures:
+                        future.result()
+
+            if len(chunk_paths) == 1:
+                os.replace(chunk_paths[0], output_path)
+            else:
+                encoder.stitch(chunk_paths, output_path, fps, frame_size, self.codec)
+        finally:
+            for chunk_path in chunk_paths:
+                if os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+
+        logging.info(f"Rendered annotated clip to {output_path}.")
+        return output_path
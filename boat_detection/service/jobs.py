@@ -0,0 +1,109 @@
+import os
+import time
+import socket
+import logging
+from typing import Optional
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+TRACKING = 'tracking'
+COMPARISON = 'comparison'
+JOB_KINDS = (TRACKING, COMPARISON)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, job_id: str, kind: str, video_file: Optional[str] = None, file_hash: Optional[str] = None):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job type '{kind}'. Choose from {list(JOB_KINDS)}.")
+        if kind == TRACKING and not video_file:
+            raise ValueError("Tracking jobs need a video_file.")
+        self.job_id = job_id
+        self.kind = kind
+        self.video_file = video_file
+        self.file_hash = file_hash
+        self.state = QUEUED
+        self.progress = 0.0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.job_id,
+            'type': self.kind,
+            'video_file': self.video_file,
+            'state': self.state,
+            'progress': round(self.progress, 4),
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+# Worker-side entry points. Each tracking worker process keeps one VideoTracker,
+# so the model is loaded once per process rather than once per video. With several
+# tracking workers each process reserves its own track ID namespace, as bulk shards do.
+_tracker = None
+
+
+def run_tracking_job(config: dict, job_id: str, video_file: str, progress_queue, cancelled,
+                     file_hash: Optional[str] = None) -> str:
+    from boat_detection.tracking.video_tracker import VideoTracker
+
+    global _tracker
+    if _tracker is None:
+        _tracker = VideoTracker(config)
+        if config.get('service_tracking_workers', 1) > 1:
+            _tracker.track_id_offset = _tracker.db_manager.reserve_track_id_namespace(
+                f"service:{socket.gethostname()}:{os.getpid()}")
+
+    def report(_video_file, frame_number, total_frames):
+        if job_id in cancelled:
+            raise JobCancelled(f"Job {job_id} was cancelled at frame {frame_number}.")
+        progress_queue.put((job_id, frame_number, total_frames))
+
+    if job_id in cancelled:
+        raise JobCancelled(f"Job {job_id} was cancelled before it started.")
+    _tracker.progress_callback = report
+    try:
+        _tracker.process_video(video_file, file_hash)
+    finally:
+        _tracker.progress_callback = None
+    return video_file
+
+
+def run_comparison_job(config: dict) -> None:
+    from boat_detection.comparison.comparator import Comparator
+    from boat_detection.database.db_manager import DatabaseManager
+
+    db_manager = DatabaseManager(db_path=config['database_path'])
+    try:
+        db_manager.initialize_database()
+        comparator = Comparator(db_manager=db_manager, results_dir=config['detection_images_dir'],
+                                image_cache_bytes=config.get('comparison_cache_mb', 256) * 1024 * 1024,
+                                decode_reduction=config.get('comparison_decode_reduction', 1),
+                                use_manifest=config.get('comparison_use_manifest', True),
+                                defer_moves=config.get('defer_image_moves', False),
+                                match_window=config.get('match_window', 86400))
+        comparator.perform_comparisons()
+    except Exception as e:
+        logging.error(f"Comparison job failed: {e}")
+        raise
+    finally:
+        db_manager.close()
@@ -0,0 +1,307 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import logging
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.service.jobs import (Job, JobCancelled, run_tracking_job, run_comparison_job, QUEUED, RUNNING,
+                                         COMPLETED, FAILED, CANCELLED, TRACKING, COMPARISON)
+from boat_detection.tracking.ingest import IngestionWatcher
+from boat_detection.utils.resources import ThreadBudget, init_tracking_worker, limit_threads
+
+HTTP_REASONS = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    500: 'Internal Server Error',
+}
+
+
+class JobService:
+    def __init__(self, config: dict, tracking_executor=None, comparison_executor=None,
+                 tracking_fn=run_tracking_job, comparison_fn=run_comparison_job):
+        self.config = config
+        self.videos_dir = config['videos_dir']
+        self.host = config.get('service_host', '127.0.0.1')
+        self.port = config.get('service_port', 8765)
+        self.socket_path = config.get('service_socket')
+        self.thread_budget = ThreadBudget.from_config(config)
+        self.tracking_workers = config.get('service_tracking_workers', 1)
+        self.comparison_workers = config.get('service_comparison_workers',
+                                             self.thread_budget.split['comparison'] if self.thread_budget else 1)
+        self.poll_interval = config.get('service_poll_interval', 30)
+        self.auto_compare = config.get('service_auto_compare', True)
+        self.stable_seconds = config.get('ingest_stable_seconds', 10)
+
+        self.tracking_executor = tracking_executor
+        self.comparison_executor = comparison_executor
+        self.tracking_fn = tracking_fn
+        self.comparison_fn = comparison_fn
+
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self.watcher = None
+        # Hashing and the ingestion ledger stay on one thread, off the event loop.
+        self._ingest_executor = ThreadPoolExecutor(max_workers=1)
+        self._owned_executors = []
+        self._background = []
+        self._manager = None
+        self.progress_queue = None
+        self.cancelled = None
+        self.server = None
+
+    @property
+    def address(self):
+        if self.server is None:
+            return None
+        return self.server.sockets[0].getsockname()
+
+    async def start(self):
+        if self.thread_budget is not None:
+            # Comparisons run on threads in this process; tracking workers set their own limits.
+            logging.info(f"CPU thread budget: {self.thread_budget.describe()}, {self.tracking_workers} tracking "
+                         f"and {self.comparison_workers} comparison workers.")
+            limit_threads(opencv_threads=self.thread_budget.split['comparison'],
+                          cores=self.thread_budget.cores_for('comparison'))
+        if self.tracking_executor is None:
+            # Worker processes report progress and poll for cancellation through a manager.
+            self.tracking_executor = ProcessPoolExecutor(
+                max_workers=self.tracking_workers,
+                initializer=init_tracking_worker if self.thread_budget is not None else None,
+                initargs=(self.config, self.tracking_workers) if self.thread_budget is not None else ())
+            self._owned_executors.append(self.tracking_executor)
+            self._manager = multiprocessing.Manager()
+            self.progress_queue = self._manager.Queue()
+            self.cancelled = self._manager.dict()
+        else:
+            self.progress_queue = queue.Queue()
+            self.cancelled = {}
+        if self.comparison_executor is None:
+            self.comparison_executor = ThreadPoolExecutor(max_workers=self.comparison_workers)
+            self._owned_executors.append(self.comparison_executor)
+
+        self._tracking_slots = asyncio.Semaphore(self.tracking_workers)
+        self._comparison_slots = asyncio.Semaphore(self.comparison_workers)
+
+        loop = asyncio.get_event_loop()
+        self.watcher = await loop.run_in_executor(self._ingest_executor, self._open_watcher)
+        await self.scan_videos()
+
+        self._background = [asyncio.ensure_future(self._watch_videos()),
+                            asyncio.ensure_future(self._drain_progress())]
+
+        if self.socket_path:
+            self.server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        else:
+            self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logging.info(f"Job service listening on {self.address}, watching {self.videos_dir}.")
+
+    def _open_watcher(self) -> IngestionWatcher:
+        db_manager = DatabaseManager(db_path=self.config['database_path'])
+        db_manager.initialize_database()
+        return IngestionWatcher(self.videos_dir, db_manager, os.path.basename(self.config['model_path']),
+                                stable_seconds=self.stable_seconds)
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+        for job in self.jobs.values():
+            if not job.finished:
+                self.cancel(job.job_id, force=True)
+        await asyncio.gather(*[job.task for job in self.jobs.values() if job.task is not None],
+                             return_exceptions=True)
+
+        for executor in self._owned_executors:
+            executor.shutdown(wait=True)
+        if self.watcher is not None:
+            await asyncio.get_event_loop().run_in_executor(self._ingest_executor, self.watcher.db_manager.close)
+        self._ingest_executor.shutdown(wait=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        logging.info("Job service stopped.")
+
+    def submit(self, kind: str, video_file: Optional[str] = None, file_hash: Optional[str] = None) -> Job:
+        job = Job(str(next(self._ids)), kind, video_file, file_hash)
+        self.jobs[job.job_id] = job
+        job.task = asyncio.ensure_future(self._run_job(job))
+        logging.info(f"Queued {kind} job {job.job_id}" + (f" for {video_file}." if video_file else "."))
+        return job
+
+    def cancel(self, job_id: str, force: bool = False) -> Job:
+        job = self.jobs[job_id]
+        if job.finished:
+            return job
+        if job.state == QUEUED:
+            job.task.cancel()
+        elif job.kind == TRACKING:
+            # The worker notices at its next progress report and aborts the video.
+            self.cancelled[job_id] = True
+        elif force:
+            job.task.cancel()
+        else:
+            raise RuntimeError(f"Comparison job {job_id} is already running and cannot be cancelled.")
+        logging.info(f"Cancellation requested for job {job_id}.")
+        return job
+
+    async def _run_job(self, job: Job):
+        slots = self._tracking_slots if job.kind == TRACKING else self._comparison_slots
+        loop = asyncio.get_event_loop()
+        try:
+            async with slots:
+                job.state = RUNNING
+                job.started_at = time.time()
+                if job.kind == TRACKING:
+                    await loop.run_in_executor(self.tracking_executor, self.tracking_fn, self.config, job.job_id,
+                                               job.video_file, self.progress_queue, self.cancelled,
+                                               job.file_hash)
+                else:
+                    await loop.run_in_executor(self.comparison_executor, self.comparison_fn, self.config)
+            job.state = COMPLETED
+            job.progress = 1.0
+        except (asyncio.CancelledError, JobCancelled):
+            job.state = CANCELLED
+        except Exception as e:
+            job.state = FAILED
+            job.error = str(e)
+            logging.error(f"{job.kind.capitalize()} job {job.job_id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            self.cancelled.pop(job.job_id, None)
+        logging.info(f"{job.kind.capitalize()} job {job.job_id} {job.state}.")
+
+        if job.kind == TRACKING:
+            if job.state == COMPLETED:
+                self._schedule_comparison()
+            elif self.watcher is not None:
+                self.watcher.release(job.video_file)
+
+    def _schedule_comparison(self):
+        # One comparison pass after each burst of tracking, never two queued at once.
+        if not self.auto_compare:
+            return
+        pending = [job for job in self.jobs.values() if not job.finished]
+        if any(job.kind == TRACKING for job in pending):
+            return
+        if any(job.kind == COMPARISON and job.state == QUEUED for job in pending):
+            return
+        self.submit(COMPARISON)
+
+    async def scan_videos(self):
+        ready = await asyncio.get_event_loop().run_in_executor(self._ingest_executor, self.watcher.poll)
+        return [self.submit(TRACKING, video_file, self.watcher.hash_for(video_file)) for video_file in ready]
+
+    async def _watch_videos(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.scan_videos()
+            except Exception as e:
+                logging.error(f"Failed to scan {self.videos_dir} for new videos: {e}")
+
+    async def _drain_progress(self):
+        while True:
+            try:
+                while True:
+                    job_id, frame_number, total_frames = self.progress_queue.get_nowait()
+                    job = self.jobs.get(job_id)
+                    if job is not None and job.state == RUNNING and total_frames > 0:
+                        job.progress = min(frame_number / total_frames, 1.0)
+            except queue.Empty:
+                pass
+            await asyncio.sleep(0.5)
+
+    async def handle_request(self, method: str, path: str, body: dict) -> Tuple[int, dict]:
+        parts = [part for part in path.split('?', 1)[0].split('/') if part]
+
+        if parts == ['health']:
+            if method != 'GET':
+                return 405, {'error': f"{method} not allowed on /health."}
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.state] = counts.get(job.state, 0) + 1
+            return 200, {'status': 'ok', 'jobs': counts}
+
+        if parts == ['scan']:
+            if method != 'POST':
+                return 405, {'error': f"{method} not allowed on /scan."}
+            return 200, {'jobs': [job.to_dict() for job in await self.scan_videos()]}
+
+        if parts == ['jobs']:
+            if method == 'GET':
+                return 200, {'jobs': [job.to_dict() for job in self.jobs.values()]}
+            if method == 'POST':
+                video_file = body.get('video_file')
+                if video_file and not os.path.isfile(os.path.join(self.videos_dir, video_file)):
+                    return 400, {'error': f"Video file {video_file} not found in {self.videos_dir}."}
+                try:
+                    job = self.submit(body.get('type', TRACKING if video_file else COMPARISON), video_file)
+                except ValueError as e:
+                    return 400, {'error': str(e)}
+                return 201, job.to_dict()
+            return 405, {'error': f"{method} not allowed on /jobs."}
+
+        if len(parts) == 2 and parts[0] == 'jobs':
+            if parts[1] not in self.jobs:
+                return 404, {'error': f"No job with id {parts[1]}."}
+            if method == 'GET':
+                return 200, self.jobs[parts[1]].to_dict()
+            if method == 'DELETE':
+                try:
+                    return 200, self.cancel(parts[1]).to_dict()
+                except RuntimeError as e:
+                    return 409, {'error': str(e)}
+            return 405, {'error': f"{method} not allowed on /jobs/{parts[1]}."}
+
+        return 404, {'error': f"No route for {path}."}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').strip()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length') or 0)
+            raw_body = await reader.readexactly(length) if length else b''
+
+            try:
+                method, path, _ = request_line.split(' ', 2)
+                body = json.loads(raw_body) if raw_body else {}
+                if not isinstance(body, dict):
+                    raise ValueError("Request body must be a JSON object.")
+                status, payload = await self.handle_request(method.upper(), path, body)
+            except ValueError as e:
+                status, payload = 400, {'error': f"Malformed request: {e}"}
+            except Exception as e:
+                logging.error(f"Job service failed to handle '{request_line}': {e}")
+                status, payload = 500, {'error': str(e)}
+
+            data = json.dumps(payload).encode('utf-8')
+            writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                         f"Content-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\n"
+                         f"Connection: close\r\n\r\n".encode('latin-1') + data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logging.warning(f"Job service connection dropped: {e}")
+        finally:
+            writer.close()
@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+from typing import Dict, List, Optional, Sequence
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+WORK_STATES = (PENDING, LEASED, DONE, FAILED)
+
+SHARD = 'shard'
+COMPARISON_BATCH = 'comparison'
+
+
+class LeaseLost(Exception):
+    pass
+
+
+class WorkItem:
+    # A claimed job. (job_id, worker, attempt) is the lease: once the lease expires and another
+    # worker claims the job, the attempt moves on and the old holder's updates are refused.
+    def __init__(self, job_id: int, key: str, batch: str, kind: str, payload: dict, worker: str, attempt: int):
+        self.job_id = job_id
+        self.key = key
+        self.batch = batch
+        self.kind = kind
+        self.payload = payload
+        self.worker = worker
+        self.attempt = attempt
+
+
+class SQLiteWorkQueue:
+    # Job table in a SQLite file every node can open. A job is claimable once every job of a lower
+    # stage in its batch has finished, so a batch's comparison waits for its shards.
+    def __init__(self, path: str, max_attempts: int = 3, clock=time.time, busy_timeout: float = 30):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.busy_timeout = busy_timeout
+        with closing(self._connect()) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS work_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_key TEXT NOT NULL UNIQUE,
+                    batch TEXT NOT NULL,
+                    stage INTEGER NOT NULL DEFAULT 0,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    worker TEXT,
+                    lease_until REAL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_work_jobs_state ON work_jobs (state, stage, id)')
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call, so heartbeat threads and worker processes never share one.
+        return sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+
+    def enqueue(self, kind: str, payload: dict, key: str, batch: str, stage: int = 0) -> int:
+        # Idempotent on key: enqueueing the same job again returns the existing one.
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute('''
+                    INSERT OR IGNORE INTO work_jobs (job_key, batch, stage, kind, payload, max_attempts, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (key, batch, stage, kind, json.dumps(payload, sort_keys=True), self.max_attempts,
+                      self.clock()))
+                return conn.execute('SELECT id FROM work_jobs WHERE job_key = ?', (key,)).fetchone()[0]
+        except sqlite3.Error as e:
+            logging.error(f"Failed to enqueue {kind} job {key}: {e}")
+            raise
+
+    def claim(self, worker: str, lease_seconds: float, kinds: Optional[Sequence[str]] = None) -> Optional[WorkItem]:
+        now = self.clock()
+        kind_filter, params = '', []
+        if kinds:
+            kind_filter = f" AND j.kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        try:
+            with closing(self._connect()) as conn:
+                # IMMEDIATE takes the write lock up front, so two nodes cannot claim the same row.
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    self._expire(conn, now)
+                    row = conn.execute(f'''
+                        SELECT j.id, j.job_key, j.batch, j.kind, j.payload, j.attempts FROM work_jobs j
+                        WHERE j.state = 'pending'{kind_filter}
+                          AND NOT EXISTS (SELECT 1 FROM work_jobs d WHERE d.batch = j.batch AND d.stage < j.stage
+                                          AND d.state IN ('pending', 'leased'))
+                        ORDER BY j.stage, j.id LIMIT 1
+                    ''', params).fetchone()
+                    if row is None:
+                        conn.execute('COMMIT')
+                        return None
+                    job_id, key, batch, kind, payload, attempts = row
+                    conn.execute('''
+                        UPDATE work_jobs SET state = 'leased', worker = ?, attempts = ?, lease_until = ?
+                        WHERE id = ?
+                    ''', (worker, attempts + 1, now + lease_seconds, job_id))
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+        except sqlite3.Error as e:
+            logging.error(f"Failed to claim a job for {worker}: {e}")
+            raise
+        return WorkItem(job_id, key, batch, kind, json.loads(payload), worker, attempts + 1)
+
+    @staticmethod
+    def _expire(conn: sqlite3.Connection, now: float):
+        # Leases that ran out: retry the job, or give up once it has used all its attempts.
+        conn.execute('''
+            UPDATE work_jobs SET state = 'failed', error = 'lease expired', finished_at = ?, lease_until = NULL
+            WHERE state = 'leased' AND lease_until < ? AND attempts >= max_attempts
+        ''', (now, now))
+        conn.execute('''
+            UPDATE work_jobs SET state = 'pending', lease_until = NULL
+            WHERE state = 'leased' AND lease_until < ?
+        ''', (now,))
+
+    def _update_lease(self, item: WorkItem, assignments: str, values: tuple) -> bool:
+        try:
+            with closing(self._connect()) as conn:
+                cursor = conn.execute(f'''
+                    UPDATE work_jobs SET {assignments}
+                    WHERE id = ? AND state = 'leased' AND worker = ? AND attempts = ?
+                ''', values + (item.job_id, item.worker, item.attempt))
+                return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            logging.error(f"Failed to update the lease on job {item.key}: {e}")
+            raise
+
+    def heartbeat(self, item: WorkItem, lease_seconds: float) -> bool:
+        # False once the lease has been lost; the holder must then stop without writing results.
+        now = self.clock()
+        return self._update_lease(item, 'lease_until = ?', (now + lease_seconds,))
+
+    def complete(self, item: WorkItem, result=None) -> bool:
+        return self._update_lease(item, "state = 'done', result = ?, finished_at = ?, lease_until = NULL",
+                                  (json.dumps(result), self.clock()))
+
+    def fail(self, item: WorkItem, error: str) -> bool:
+        # Back to pending for another attempt, or failed for good after max_attempts.
+        return self._update_lease(item, '''
+            state = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+            finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END,
+            error = ?, lease_until = NULL
+        ''', (self.clock(), error))
+
+    def jobs(self, batch: Optional[str] = None, kind: Optional[str] = None) -> List[dict]:
+        query = ('SELECT id, job_key, batch, stage, kind, payload, state, attempts, worker, lease_until, result, '
+                 'error FROM work_jobs WHERE (? IS NULL OR batch = ?) AND (? IS NULL OR kind = ?) ORDER BY id')
+        columns = ('id', 'key', 'batch', 'stage', 'kind', 'payload', 'state', 'attempts', 'worker', 'lease_until',
+                   'result', 'error')
+        try:
+            with closing(self._connect()) as conn:
+                rows = conn.execute(query, (batch, batch, kind, kind)).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to list work queue jobs: {e}")
+            raise
+        jobs = [dict(zip(columns, row)) for row in rows]
+        for job in jobs:
+            job['payload'] = json.loads(job['payload'])
+            job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return jobs
+
+    def counts(self, batch: Optional[str] = None) -> Dict[str, int]:
+        counts = {state: 0 for state in WORK_STATES}
+        for job in self.jobs(batch):
+            counts[job['state']] += 1
+        return counts
+
+
+class MemoryWorkQueue:
+    # In-process stand-in with the same semantics, for tests and single-machine runs.
+    def __init__(self, max_attempts: int = 3, clock=time.time):
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._jobs: List[dict] = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, kind: str, payload: dict, key: str, batch: str, stage: int = 0) -> int:
+        with self._lock:
+            for job in self._jobs:
+                if job['key'] == key:
+                    return job['id']
+            job_id = len(self._jobs) + 1
+            self._jobs.append({'id': job_id, 'key': key, 'batch': batch, 'stage': stage, 'kind': kind,
+                               'payload': json.loads(json.dumps(payload)), 'state': PENDING, 'attempts': 0,
+                               'max_attempts': self.max_attempts, 'worker': None, 'lease_until': None,
+                               'result': None, 'error': None})
+            return job_id
+
+    def claim(self, worker: str, lease_seconds: float, kinds: Optional[Sequence[str]] = None) -> Optional[WorkItem]:
+        with self._lock:
+            now = self.clock()
+            for job in self._jobs:
+                if job['state'] == LEASED and job['lease_until'] < now:
+                    job['state'] = FAILED if job['attempts'] >= job['max_attempts'] else PENDING
+                    job['lease_until'] = None
+                    if job['state'] == FAILED:
+                        job['error'] = 'lease expired'
+            for job in sorted(self._jobs, key=lambda j: (j['stage'], j['id'])):
+                if job['state'] != PENDING or (kinds and job['kind'] not in kinds):
+                    continue
+                if any(other['batch'] == job['batch'] and other['stage'] < job['stage']
+                       and other['state'] in (PENDING, LEASED) for other in self._jobs):
+                    continue
+                job.update(state=LEASED, worker=worker, attempts=job['attempts'] + 1, lease_until=now + lease_seconds)
+                payload = json.loads(json.dumps(job['payload']))
+                return WorkItem(job['id'], job['key'], job['batch'], job['kind'], payload, worker, job['attempts'])
+            return None
+
+    def _held(self, item: WorkItem) -> Optional[dict]:
+        job = self._jobs[item.job_id - 1]
+        if job['state'] == LEASED and job['worker'] == item.worker and job['attempts'] == item.attempt:
+            return job
+        return None
+
+    def heartbeat(self, item: WorkItem, lease_seconds: float) -> bool:
+        with self._lock:
+            job = self._held(item)
+            if job is not None:
+                job['lease_until'] = self.clock() + lease_seconds
+            return job is not None
+
+    def complete(self, item: WorkItem, result=None) -> bool:
+        with self._lock:
+            job = self._held(item)
+            if job is not None:
+                job.update(state=DONE, result=result, lease_until=None)
+            return job is not None
+
+    def fail(self, item: WorkItem, error: str) -> bool:
+        with self._lock:
+            job = self._held(item)
+            if job is not None:
+                job.update(state=FAILED if job['attempts'] >= job['max_attempts'] else PENDING, error=error,
+                           lease_until=None)
+            return job is not None
+
+    def jobs(self, batch: Optional[str] = None, kind: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            return [dict(job, payload=dict(job['payload'])) for job in self._jobs
+                    if (batch is None or job['batch'] == batch) and (kind is None or job['kind'] == kind)]
+
+    def counts(self, batch: Optional[str] = None) -> Dict[str, int]:
+        counts = {state: 0 for state in WORK_STATES}
+        for job in self.jobs(batch):
+            counts[job['state']] += 1
+        return counts
+
+
+WORK_QUEUE_BACKENDS = {
+    'sqlite': lambda config: SQLiteWorkQueue(
+        config.get('work_queue_path', os.path.join(os.path.dirname(config['database_path']), 'work_queue.db')),
+        config.get('work_queue_max_attempts', 3)),
+    'memory': lambda config: MemoryWorkQueue(config.get('work_queue_max_attempts', 3)),
+}
+
+
+def open_work_queue(config: dict):
+    backend = config.get('work_queue_backend', 'sqlite')
+    if backend not in WORK_QUEUE_BACKENDS:
+        raise ValueError(f"Unknown work queue backend '{backend}'. Choose from {sorted(WORK_QUEUE_BACKENDS)}.")
+    return WORK_QUEUE_BACKENDS[backend](config)
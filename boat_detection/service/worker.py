@@ -0,0 +1,163 @@
+import os
+import time
+import socket
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from boat_detection.service.work_queue import WorkItem, LeaseLost, SHARD, COMPARISON_BATCH
+from boat_detection.tracking.bulk import shard_videos, track_shard, merge_shards
+from boat_detection.utils.helpers import get_all_video_files
+
+
+class Lease:
+    # Keeps a claimed job's lease alive from a background thread while the job runs.
+    def __init__(self, queue, item: WorkItem, lease_seconds: float, heartbeat_interval: float):
+        self.queue = queue
+        self.item = item
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self._stop = threading.Event()
+        self._lost = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    @property
+    def lost(self) -> bool:
+        return self._lost.is_set()
+
+    def check(self):
+        if self.lost:
+            raise LeaseLost(f"Lease on job {self.item.key} (attempt {self.item.attempt}) was lost.")
+
+    def _beat(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                renewed = self.queue.heartbeat(self.item, self.lease_seconds)
+            except Exception as e:
+                logging.warning(f"Heartbeat for job {self.item.key} failed: {e}")
+                continue
+            if not renewed:
+                logging.warning(f"Lost the lease on job {self.item.key}; another worker may have taken it over.")
+                self._lost.set()
+                return
+
+    def __enter__(self) -> 'Lease':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_shard_job(config: dict, item: WorkItem, lease: Lease) -> dict:
+    # Each shard attempt tracks into its own directory, so a worker that lost its lease cannot
+    # write into the files of the attempt that replaced it, and merging one shard never picks
+    # up another that is still being tracked. The merge gives the shard a fresh track ID
+    # namespace in the database and skips a shard directory it has already merged.
+    payload = item.payload
+    attempt_dir = os.path.join(payload['shards_dir'], item.batch, f"shard_{payload['shard_index']:03d}",
+                               f"attempt_{item.attempt:02d}")
+    track_shard(config, payload['shard_index'], payload['videos'], attempt_dir)
+    lease.check()
+    merged = merge_shards(config, attempt_dir)
+    return {'merged': merged, 'shard_dir': attempt_dir}
+
+
+def run_comparison_batch(config: dict, item: WorkItem, lease: Lease) -> dict:
+    from boat_detection.service.jobs import run_comparison_job
+
+    lease.check()
+    run_comparison_job(config)
+    return {}
+
+
+JOB_HANDLERS = {
+    SHARD: run_shard_job,
+    COMPARISON_BATCH: run_comparison_batch,
+}
+
+
+def enqueue_backlog(config: dict, queue, batch: str, num_shards: int, video_files: Optional[List[str]] = None,
+                    compare: bool = True, requeue: bool = False) -> List[int]:
+    # One shard job per group of videos, plus a comparison that becomes claimable once every
+    # shard of the batch has finished. Videos another batch queued for the same model are left
+    # out unless requeue is set, and enqueueing the same batch twice adds nothing.
+    shards_dir = config.get('work_queue_shards_dir', os.path.join(config['results_dir'], 'queue_shards'))
+    shard_jobs = queue.jobs(kind=SHARD)
+    existing = [job for job in shard_jobs if job['batch'] == batch]
+    if existing:
+        logging.info(f"Batch {batch} is already queued with {len(existing)} shards.")
+        return [job['id'] for job in queue.jobs(batch=batch)]
+
+    model = os.path.basename(config['model_path']) if config.get('model_path') else None
+    queued = set()
+    if not requeue:
+        queued = {video for job in shard_jobs if job['payload'].get('model') == model
+                  for video in job['payload']['videos']}
+    if video_files is None:
+        video_files = get_all_video_files(config['videos_dir'])
+    video_files = [video for video in video_files if video not in queued]
+    if not video_files:
+        logging.info("No videos left to queue.")
+        return []
+
+    job_ids = []
+    for index, videos in enumerate(shard_videos(video_files, num_shards, config['videos_dir'])):
+        payload = {'shard_index': index, 'videos': videos, 'shards_dir': shards_dir, 'model': model}
+        job_ids.append(queue.enqueue(SHARD, payload, f"{batch}:shard:{index}", batch))
+    if compare:
+        job_ids.append(queue.enqueue(COMPARISON_BATCH, {}, f"{batch}:comparison", batch, stage=1))
+    logging.info(f"Queued batch {batch}: {len(video_files)} videos in {len(job_ids) - compare} shards"
+                 f"{' and a comparison' if compare else ''}.")
+    return job_ids
+
+
+class QueueWorker:
+    def __init__(self, config: dict, queue, worker_id: Optional[str] = None,
+                 kinds: Optional[Sequence[str]] = None, handlers: Optional[Dict] = None):
+        self.config = config
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.kinds = kinds
+        self.handlers = handlers or JOB_HANDLERS
+        self.lease_seconds = config.get('work_queue_lease_seconds', 300)
+        self.heartbeat_interval = config.get('work_queue_heartbeat', 60)
+        self.poll_interval = config.get('work_queue_poll_interval', 30)
+
+    def run_one(self) -> Optional[bool]:
+        # None when nothing was claimable, otherwise whether the job succeeded.
+        item = self.queue.claim(self.worker_id, self.lease_seconds, self.kinds)
+        if item is None:
+            return None
+        logging.info(f"Worker {self.worker_id} claimed job {item.key} (attempt {item.attempt}).")
+        try:
+            with Lease(self.queue, item, self.lease_seconds, self.heartbeat_interval) as lease:
+                result = self.handlers[item.kind](self.config, item, lease)
+                lease.check()
+        except LeaseLost as e:
+            logging.warning(f"Abandoning job {item.key}: {e}")
+            return False
+        except Exception as e:
+            logging.error(f"Job {item.key} failed on {self.worker_id}: {e}")
+            self.queue.fail(item, str(e))
+            return False
+        if not self.queue.complete(item, result):
+            logging.warning(f"Job {item.key} finished after its lease was lost; result discarded.")
+            return False
+        logging.info(f"Worker {self.worker_id} completed job {item.key}.")
+        return True
+
+    def run(self, max_jobs: Optional[int] = None, exit_when_idle: bool = False) -> int:
+        completed = 0
+        handled = 0
+        while max_jobs is None or handled < max_jobs:
+            outcome = self.run_one()
+            if outcome is None:
+                if exit_when_idle:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            handled += 1
+            completed += outcome
+        return completed
@@ -0,0 +1,101 @@
+import cv2
+import logging
+import numpy as np
+from typing import List, Optional, Tuple
+
+Segment = Tuple[int, int]
+
+
+def motion_energy(previous: np.ndarray, current: np.ndarray, pixel_delta: int = 25) -> float:
+    # Fraction of pixels whose grey level changed by more than pixel_delta between two samples.
+    if previous is None or previous.shape != current.shape or current.size == 0:
+        return 0.0
+    return float(np.count_nonzero(cv2.absdiff(previous, current) > pixel_delta)) / current.size
+
+
+def _scan_frame(frame: np.ndarray, scan_width: int, region) -> np.ndarray:
+    height, width = frame.shape[:2]
+    if region is not None:
+        x1, y1, x2, y2 = region
+        frame = frame[int(y1 * height):max(int(y2 * height), int(y1 * height) + 1),
+                      int(x1 * width):max(int(x2 * width), int(x1 * width) + 1)]
+        height, width = frame.shape[:2]
+    scale = min(1.0, scan_width / max(width, 1))
+    small = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                       interpolation=cv2.INTER_AREA)
+    # Blurred so sensor noise and ripples on the water do not count as motion.
+    return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+
+def scan_activity(video_path: str, sample_fps: float = 2.0, scan_width: int = 160, pixel_delta: int = 25,
+                  region: Optional[Tuple[float, float, float, float]] = None,
+                  seek: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    # Coarse first pass: samples the video at sample_fps and returns the sampled frame indices
+    # with the motion energy since the previous sample. region is an (x1, y1, x2, y2) box in
+    # fractions of the frame. With seek, each sample is a seek instead of grabbing the frames
+    # in between, which is faster when samples are further apart than the keyframes.
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video file for activity scan: {video_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        step = max(1, int(round(fps / sample_fps)))
+
+        indices, energies = [], []
+        previous = None
+        index = 0
+        while total_frames <= 0 or index < total_frames:
+            if seek:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                ret, frame = cap.read()
+            else:
+                ret, frame = cap.retrieve() if cap.grab() else (False, None)
+            if not ret:
+                break
+            current = _scan_frame(frame, scan_width, region)
+            indices.append(index)
+            energies.append(motion_energy(previous, current, pixel_delta))
+            previous = current
+
+            index += step
+            if not seek:
+                # grab() skips the colour conversion retrieve() would do on the frames in between.
+                for _ in range(step - 1):
+                    if not cap.grab():
+                        break
+        return np.asarray(indices, dtype=np.int64), np.asarray(energies, dtype=np.float64)
+    finally:
+        cap.release()
+
+
+def active_segments(indices: np.ndarray, energies: np.ndarray, threshold: float, padding_frames: int,
+                    merge_gap_frames: int, total_frames: int) -> List[Segment]:
+    # Half-open [start, end) frame ranges around the sampled intervals whose motion energy
+    # reached threshold, padded on both sides and merged when closer than merge_gap_frames.
+    if total_frames <= 0 and len(indices):
+        total_frames = int(indices[-1]) + 1
+    segments = []
+    for position in np.flatnonzero(np.asarray(energies) >= threshold):
+        # The energy of a sample describes the interval since the previous one.
+        start = int(indices[position - 1]) if position > 0 else int(indices[position])
+        end = int(indices[position]) + 1
+        start, end = max(0, start - padding_frames), min(total_frames, end + padding_frames)
+        if segments and start - segments[-1][1] <= merge_gap_frames:
+            segments[-1] = (segments[-1][0], max(segments[-1][1], end))
+        else:
+            segments.append((start, end))
+    return segments
+
+
+def find_active_segments(video_path: str, fps: float, total_frames: int, sample_fps: float = 2.0,
+                         scan_width: int = 160, pixel_delta: int = 25, threshold: float = 0.01,
+                         padding: float = 5.0, merge_gap: float = 10.0, region=None,
+                         seek: bool = False) -> List[Segment]:
+    indices, energies = scan_activity(video_path, sample_fps, scan_width, pixel_delta, region, seek)
+    segments = active_segments(indices, energies, threshold, int(round(padding * fps)),
+                               int(round(merge_gap * fps)), total_frames)
+    active = sum(end - start for start, end in segments)
+    logging.info(f"Activity scan of {video_path}: {len(segments)} active segments covering {active} of "
+                 f"{total_frames} frames.")
+    return segments
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import shutil
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from boat_detection.utils.helpers import ensure_directory
+
+MODEL_BACKENDS = ('pytorch', 'onnx', 'openvino')
+CALIBRATION_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def exported_model_path(exports_dir: str, weights_path: str, backend: str, int8: bool = False) -> str:
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}'. Choose from {list(MODEL_BACKENDS)}.")
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    precision = 'int8' if int8 else 'fp32'
+    if backend == 'onnx':
+        return os.path.join(exports_dir, f"{stem}_{precision}.onnx")
+    # OpenVINO models are directories; ultralytics recognises them by the '_openvino_model' suffix.
+    return os.path.join(exports_dir, f"{stem}_{precision}_openvino_model")
+
+
+def build_calibration_set(detection_images_dir: str, calibration_dir: str, names: Sequence[str],
+                          max_images: int = 300) -> str:
+    # Evenly spaced over the sorted image list, so the same tree always gives the same set.
+    paths = []
+    for root, _, files in os.walk(detection_images_dir):
+        paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(CALIBRATION_EXTENSIONS))
+    paths.sort()
+    if not paths:
+        raise RuntimeError(f"No detection images found in {detection_images_dir} for INT8 calibration.")
+    if len(paths) > max_images:
+        paths = [paths[int(i)] for i in np.linspace(0, len(paths) - 1, max_images)]
+
+    images_dir = os.path.join(calibration_dir, 'images')
+    if os.path.isdir(images_dir):
+        shutil.rmtree(images_dir)
+    ensure_directory(images_dir)
+    for index, path in enumerate(paths):
+        shutil.copyfile(path, os.path.join(images_dir, f"calib_{index:05d}{os.path.splitext(path)[1].lower()}"))
+
+    data_path = os.path.join(calibration_dir, 'calibration.yaml')
+    with open(data_path, 'w') as file:
+        # JSON is valid YAML and keeps the class names quoted.
+        json.dump({
+            'path': os.path.abspath(calibration_dir),
+            'train': 'images',
+            'val': 'images',
+            'names': {index: name for index, name in enumerate(names)},
+        }, file, indent=2)
+    logging.info(f"Built INT8 calibration set of {len(paths)} images in {calibration_dir}.")
+    return data_path
+
+
+def export_model(weights_path: str, backend: str, target_path: str, imgsz: int = 640, int8: bool = False,
+                 calibration_data: Optional[str] = None) -> str:
+    from ultralytics import YOLO
+
+    if backend == 'pytorch':
+        return weights_path
+    if int8 and calibration_data is None:
+        raise ValueError("INT8 export needs a calibration dataset.")
+    try:
+        # Dynamic shapes so the tracker can keep passing per-video and per-ROI imgsz values.
+        exported = YOLO(weights_path).export(format=backend, imgsz=imgsz, dynamic=True, int8=int8,
+                                             data=calibration_data)
+        exported = str(exported).rstrip(os.sep)
+        ensure_directory(os.path.dirname(target_path))
+        if os.path.isdir(target_path):
+            shutil.rmtree(target_path)
+        shutil.move(exported, target_path)
+        logging.info(f"Exported {weights_path} to {backend}{' INT8' if int8 else ''} at {target_path}.")
+        return target_path
+    except Exception as e:
+        logging.error(f"Failed to export {weights_path} to {backend}: {e}")
+        raise
+
+
+def prepare_model(config: dict, weights_path: str, backend: Optional[str] = None,
+                  int8: Optional[bool] = None) -> str:
+    # Returns a path YOLO() can load for the configured backend, exporting on first use.
+    backend = backend or config.get('model_backend', 'pytorch')
+    int8 = config.get('model_int8', False) if int8 is None else int8
+    if backend == 'pytorch':
+        return weights_path
+
+    exports_dir = config.get('model_exports_dir', os.path.join(config['models_dir'], 'exports'))
+    target_path = exported_model_path(exports_dir, weights_path, backend, int8)
+    if os.path.exists(target_path) and os.path.getmtime(target_path) >= os.path.getmtime(weights_path):
+        return target_path
+
+    calibration_data = None
+    if int8:
+        calibration_data = build_calibration_set(
+            config['detection_images_dir'], os.path.join(exports_dir, 'calibration'),
+            config.get('names') or ['boat'], config.get('calibration_images', 300))
+    return export_model(weights_path, backend, target_path, config.get('model_export_imgsz', 640), int8,
+                        calibration_data)
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    # Pairwise IoU of xyxy boxes.
+    boxes_a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-12), 0.0)
+
+
+def compare_outputs(reference: List[Tuple[np.ndarray, np.ndarray]], candidate: List[Tuple[np.ndarray, np.ndarray]],
+                    iou_threshold: float = 0.5) -> Dict[str, float]:
+    # Each element is (xyxy boxes, track ids) for one frame. Candidate boxes are matched
+    # to reference boxes greedily by IoU; matched pairs also vote on track-ID agreement.
+    matched = total_reference = total_candidate = same_id = identical_frames = 0
+    ious = []
+    for (ref_boxes, ref_ids), (cand_boxes, cand_ids) in zip(reference, candidate):
+        total_reference += len(ref_boxes)
+        total_candidate += len(cand_boxes)
+        frame_matches = 0
+        if len(ref_boxes) and len(cand_boxes):
+            iou = box_iou(ref_boxes, cand_boxes)
+            while True:
+                row, col = np.unravel_index(np.argmax(iou), iou.shape)
+                if iou[row, col] < iou_threshold:
+                    break
+                ious.append(iou[row, col])
+                frame_matches += 1
+                if ref_ids is not None and cand_ids is not None and ref_ids[row] == cand_ids[col]:
+                    same_id += 1
+                iou[row, :] = -1
+                iou[:, col] = -1
+        matched += frame_matches
+        if frame_matches == len(ref_boxes) == len(cand_boxes):
+            identical_frames += 1
+    return {
+        'precision': matched / total_candidate if total_candidate else 1.0,
+        'recall': matched / total_reference if total_reference else 1.0,
+        'mean_iou': float(np.mean(ious)) if ious else 1.0,
+        'id_agreement': same_id / matched if matched else 1.0,
+        'frame_agreement': identical_frames / len(reference) if reference else 1.0,
+    }
+
+
+def run_backend(model, frames: List[np.ndarray], imgsz, conf: float) -> Tuple[List[Tuple[np.ndarray, np.ndarray]], float]:
+    # Tracks the frames in order and returns per-frame outputs and mean seconds per frame.
+    outputs = []
+    model.track(frames[0], persist=True, imgsz=imgsz, conf=conf, verbose=False)  # warm-up
+    if getattr(model, 'predictor', None) is not None and getattr(model.predictor, 'trackers', None):
+        for tracker in model.predictor.trackers:
+            tracker.reset()
+    start = time.perf_counter()
+    for frame in frames:
+        results = model.track(frame, persist=True, imgsz=imgsz, conf=conf, verbose=False)
+        boxes = results[0].boxes
+        xyxy = boxes.xyxy.cpu().numpy() if len(boxes) else np.zeros((0, 4), dtype=np.float32)
+        ids = boxes.id.int().cpu().numpy() if boxes.id is not None else np.full(len(xyxy), -1)
+        outputs.append((xyxy, ids))
+    elapsed = time.perf_counter() - start
+    return outputs, elapsed / max(len(frames), 1)
+
+
+def format_report(rows: List[dict]) -> str:
+    columns = ['backend', 'ms_per_frame', 'speedup', 'precision', 'recall', 'mean_iou', 'id_agreement',
+               'frame_agreement']
+    lines = ['| ' + ' | '.join(columns) + ' |', '|' + '---|' * len(columns)]
+    for row in rows:
+        cells = [f"{row[c]:.3f}" if isinstance(row[c], float) else str(row[c]) for c in columns]
+        lines.append('| ' + ' | '.join(cells) + ' |')
+    return '\n'.join(lines)
@@ -0,0 +1,141 @@
+import os
+import copy
+import time
+import shutil
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.utils.helpers import ensure_directory, get_all_video_files
+from boat_detection.utils.resources import ThreadBudget, init_tracking_worker
+
+
+def new_run_id() -> str:
+    return f"run_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+
+
+def shard_videos(video_files: List[str], num_shards: int, videos_dir: Optional[str] = None) -> List[List[str]]:
+    # Largest files first into the currently lightest shard, so shards finish at similar times.
+    if num_shards < 1:
+        raise ValueError(f"Number of shards must be at least 1, got {num_shards}.")
+    if videos_dir is not None:
+        sizes = {f: os.path.getsize(os.path.join(videos_dir, f)) for f in video_files}
+    else:
+        sizes = {f: 1 for f in video_files}
+
+    shards = [[] for _ in range(min(num_shards, len(video_files)) or 1)]
+    loads = [0] * len(shards)
+    for video_file in sorted(video_files, key=lambda f: (-sizes[f], f)):
+        index = loads.index(min(loads))
+        shards[index].append(video_file)
+        loads[index] += sizes[video_file]
+    return [sorted(shard) for shard in shards if shard]
+
+
+def shard_config(config: dict, shard_index: int, shards_dir: str) -> dict:
+    shard_dir = os.path.join(shards_dir, f"shard_{shard_index:03d}")
+    config = copy.deepcopy(dict(config))
+    config['database_path'] = os.path.join(shard_dir, 'boats.db')
+    config['detection_images_dir'] = os.path.join(shard_dir, 'detection_images')
+    config['logs_dir'] = os.path.join(shard_dir, 'logs')
+    return config
+
+
+def track_shard(config: dict, shard_index: int, video_files: List[str], shards_dir: str) -> str:
+    # Runs in a worker process; imported here so the parent never loads the model.
+    from boat_detection.tracking.video_tracker import VideoTracker
+
+    config = shard_config(config, shard_index, shards_dir)
+    ensure_directory(os.path.dirname(config['database_path']))
+    tracker = VideoTracker(config)
+    try:
+        logging.info(f"Shard {shard_index}: tracking {len(video_files)} videos into {config['database_path']}.")
+        tracker.track_videos(video_files)
+    finally:
+        tracker.close()
+    return config['database_path']
+
+
+def merge_shard_images(shard_images_dir: str, detection_images_dir: str, track_id_offset: int) -> int:
+    if not os.path.isdir(shard_images_dir):
+        return 0
+    moved = 0
+    for folder in os.listdir(shard_images_dir):
+        parts = folder.split('_')
+        if not folder.startswith('track_id_') or len(parts) != 3 or not parts[2].isdigit():
+            continue
+        dest = os.path.join(detection_images_dir, f"track_id_{int(parts[2]) + track_id_offset}")
+        if os.path.exists(dest):
+            logging.warning(f"{dest} already exists; leaving {folder} in {shard_images_dir}.")
+            continue
+        shutil.move(os.path.join(shard_images_dir, folder), dest)
+        moved += 1
+    logging.info(f"Moved {moved} track folders from {shard_images_dir} into {detection_images_dir}.")
+    return moved
+
+
+def merge_shards(config: dict, shards_dir: str, db_manager: Optional[DatabaseManager] = None,
+                 run_id: Optional[str] = None) -> int:
+    # Each shard is merged once per (shard path, run ID); the run ID defaults to the name of
+    # shards_dir, which run_bulk_reprocess makes unique per run.
+    run_id = run_id or os.path.basename(os.path.normpath(shards_dir))
+    owns_db = db_manager is None
+    if owns_db:
+        db_manager = DatabaseManager(db_path=config['database_path'])
+        db_manager.initialize_database()
+    ensure_directory(config['detection_images_dir'])
+
+    total = 0
+    try:
+        for name in sorted(os.listdir(shards_dir)):
+            if not name.startswith('shard_') or not name[len('shard_'):].isdigit():
+                continue
+            shard_index = int(name[len('shard_'):])
+            shard = shard_config(config, shard_index, shards_dir)
+            if not os.path.exists(shard['database_path']):
+                logging.warning(f"Shard {shard_index} has no database at {shard['database_path']}. Skipping.")
+                continue
+            merged, offset = db_manager.merge_shard(shard['database_path'], run_id, shard_index,
+                                                    shard['detection_images_dir'], config['detection_images_dir'])
+            total += merged
+            merge_shard_images(shard['detection_images_dir'], config['detection_images_dir'], offset)
+    finally:
+        if owns_db:
+            db_manager.close()
+    logging.info(f"Merged {total} boat records from shards in {shards_dir}.")
+    return total
+
+
+def run_bulk_reprocess(config: dict, num_shards: int, max_workers: Optional[int] = None,
+                       shards_dir: Optional[str] = None) -> int:
+    # Every run tracks into a directory of its own, so reusing bulk_shards_dir never mixes runs.
+    shards_dir = shards_dir or config.get('bulk_shards_dir', os.path.join(config['results_dir'], 'shards'))
+    shards_dir = os.path.join(shards_dir, new_run_id())
+    ensure_directory(shards_dir)
+
+    video_files = get_all_video_files(config['videos_dir'])
+    if not video_files:
+        logging.error("No video files found for bulk reprocessing.")
+        return 0
+    shards = shard_videos(video_files, num_shards, config['videos_dir'])
+    logging.info(f"Bulk reprocessing {len(video_files)} videos in {len(shards)} shards.")
+
+    workers = max_workers or len(shards)
+    pool_options = {}
+    budget = ThreadBudget.from_config(config)
+    if budget is not None:
+        logging.info(f"CPU thread budget: {budget.describe()}, shared by {workers} shard workers.")
+        pool_options = {'initializer': init_tracking_worker, 'initargs': (config, workers)}
+
+    with ProcessPoolExecutor(max_workers=workers, **pool_options) as executor:
+        futures = {executor.submit(track_shard, config, index, files, shards_dir): index
+                   for index, files in enumerate(shards)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                logging.info(f"Shard {index} finished: {future.result()}.")
+            except Exception as e:
+                logging.error(f"Shard {index} failed: {e}")
+
+    return merge_shards(config, shards_dir)
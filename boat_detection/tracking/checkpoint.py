@@ -0,0 +1,96 @@
+import os
+import pickle
+import logging
+from typing import Optional
+
+from boat_detection.utils.helpers import ensure_directory
+
+
+def capture_tracker_state(model) -> Optional[bytes]:
+    # The ultralytics trackers live on the predictor once model.track() has run.
+    trackers = getattr(getattr(model, 'predictor', None), 'trackers', None)
+    if not isinstance(trackers, list):
+        return None
+    try:
+        from ultralytics.trackers.basetrack import BaseTrack
+        return pickle.dumps({'trackers': trackers, 'next_id': BaseTrack._count})
+    except Exception as e:
+        logging.warning(f"Could not capture tracker state for checkpoint: {e}")
+        return None
+
+
+def restore_tracker_state(model, tracker_state: Optional[bytes]) -> bool:
+    if not tracker_state:
+        return False
+    try:
+        from ultralytics.trackers.basetrack import BaseTrack
+        state = pickle.loads(tracker_state)
+    except Exception as e:
+        logging.warning(f"Could not restore tracker state from checkpoint: {e}")
+        return False
+
+    BaseTrack._count = max(BaseTrack._count, state['next_id'])
+    pending = {'trackers': state['trackers']}
+
+    def apply_trackers(predictor):
+        # Runs when the predictor is (re)started, before the first tracked frame.
+        if pending.get('trackers') is not None:
+            predictor.trackers = pending.pop('trackers')
+
+    predictor = getattr(model, 'predictor', None)
+    if predictor is not None:
+        apply_trackers(predictor)
+    else:
+        model.add_callback('on_predict_start', apply_trackers)
+    logging.info("Restored tracker state from checkpoint.")
+    return True
+
+
+class CheckpointManager:
+    def __init__(self, checkpoints_dir: str, interval: int = 0):
+        self.checkpoints_dir = checkpoints_dir
+        self.interval = interval
+        ensure_directory(self.checkpoints_dir)
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def path_for(self, file_hash: str) -> str:
+        return os.path.join(self.checkpoints_dir, f"{file_hash}.ckpt")
+
+    def is_due(self, frame_number: int) -> bool:
+        return self.enabled and frame_number % self.interval == 0
+
+    def save(self, file_hash: str, state: dict) -> None:
+        path = self.path_for(file_hash)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as file:
+                pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+            logging.info(f"Saved checkpoint at frame {state.get('frame_number')} to {path}.")
+        except Exception as e:
+            logging.error(f"Failed to save checkpoint {path}: {e}")
+            raise
+
+    def load(self, file_hash: str) -> Optional[dict]:
+        path = self.path_for(file_hash)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as file:
+                state = pickle.load(file)
+            logging.info(f"Loaded checkpoint at frame {state.get('frame_number')} from {path}.")
+            return state
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+
+    def clear(self, file_hash: str) -> None:
+        path = self.path_for(file_hash)
+        if os.path.exists(path):
+            os.remove(path)
+            logging.info(f"Removed checkpoint {path}.")
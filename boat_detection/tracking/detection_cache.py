@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+from typing import List, Optional, Tuple
+
+from boat_detection.utils.helpers import ensure_directory
+
+DETECTION_DTYPE = np.dtype([
+    ('frame', '<i4'),
+    ('track_id', '<i4'),
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('w', '<f4'),
+    ('h', '<f4'),
+    ('conf', '<f4'),
+])
+
+
+def detection_cache_key(video_hash: str, model_hash: str, params: dict) -> str:
+    # Only inputs that change what the model outputs belong in the key;
+    # downstream thresholds are applied to the replayed detections.
+    payload = json.dumps({'video': video_hash, 'model': model_hash, 'params': params}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def pack_detections(frame_number: int, boxes: np.ndarray, track_ids: np.ndarray,
+                    confidences: np.ndarray) -> np.ndarray:
+    records = np.empty(len(track_ids), dtype=DETECTION_DTYPE)
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)[:len(track_ids)]
+    records['frame'] = frame_number
+    records['track_id'] = track_ids
+    records['x'], records['y'], records['w'], records['h'] = boxes.T
+    records['conf'] = confidences
+    return records
+
+
+class CachedDetections:
+    def __init__(self, records: np.ndarray, metadata: dict):
+        self.records = records
+        self.metadata = metadata
+        self._frames = records['frame']
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def frame(self, frame_number: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        start, end = np.searchsorted(self._frames, [frame_number, frame_number + 1])
+        rows = self.records[start:end]
+        boxes = np.stack([rows['x'], rows['y'], rows['w'], rows['h']], axis=1)
+        return boxes, rows['track_id'], rows['conf']
+
+
+class DetectionRecorder:
+    def __init__(self, cache: 'DetectionCache', key: str, metadata: dict):
+        self.cache = cache
+        self.key = key
+        self.metadata = metadata
+        self.chunks: List[np.ndarray] = []
+
+    def add(self, frame_number: int, boxes: np.ndarray, track_ids: np.ndarray, confidences: np.ndarray) -> None:
+        if len(track_ids) > 0:
+            self.chunks.append(pack_detections(frame_number, boxes, track_ids, confidences))
+
+    def finalize(self, frame_count: int) -> None:
+        records = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=DETECTION_DTYPE)
+        self.cache.save(self.key, records, dict(self.metadata, frame_count=frame_count))
+
+
+class DetectionCache:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        ensure_directory(self.cache_dir)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, key: str) -> Optional[CachedDetections]:
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                records = data['detections']
+                metadata = json.loads(str(data['metadata']))
+            logging.info(f"Loaded {len(records)} cached detections from {path}.")
+            return CachedDetections(records, metadata)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable detection cache {path}: {e}")
+            return None
+
+    def recorder(self, key: str, metadata: dict) -> DetectionRecorder:
+        return DetectionRecorder(self, key, metadata)
+
+    def save(self, key: str, records: np.ndarray, metadata: dict) -> None:
+        path = self.path_for(key)
+        tmp_path = f"{path}.tmp.npz"
+        try:
+            np.savez_compressed(tmp_path, detections=records, metadata=np.array(json.dumps(metadata)))
+            os.replace(tmp_path, path)
+            logging.info(f"Cached {len(records)} detections to {path}.")
+        except Exception as e:
+            logging.error(f"Failed to write detection cache {path}: {e}")
+            raise
@@ -0,0 +1,146 @@
+import os
+import json
+import logging
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from boat_detection.utils.helpers import ensure_directory
+
+# One raw little-endian file per column; row i of every column is one detection.
+COLUMNS = {
+    'frame': (np.dtype('<i4'), ()),
+    'track_id': (np.dtype('<i4'), ()),
+    'box': (np.dtype('<f4'), (4,)),
+    'conf': (np.dtype('<f4'), ()),
+}
+METADATA_FILE = 'metadata.json'
+
+
+def column_path(log_dir: str, name: str) -> str:
+    return os.path.join(log_dir, f"{name}.bin")
+
+
+def _row_size(name: str) -> int:
+    dtype, shape = COLUMNS[name]
+    return dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+
+
+def _committed_rows(log_dir: str) -> int:
+    # A crash can leave columns of different lengths; only whole rows present in every column count.
+    rows = []
+    for name in COLUMNS:
+        path = column_path(log_dir, name)
+        rows.append(os.path.getsize(path) // _row_size(name) if os.path.exists(path) else 0)
+    return min(rows)
+
+
+class DetectionLogWriter:
+    def __init__(self, log_dir: str, metadata: dict, resume_from_frame: Optional[int] = None):
+        self.log_dir = log_dir
+        self.rows = 0
+        ensure_directory(self.log_dir)
+
+        if resume_from_frame is not None and os.path.exists(column_path(log_dir, 'frame')):
+            self.rows = self._truncate_after(resume_from_frame)
+            mode = 'r+b'
+        else:
+            mode = 'wb'
+
+        self.files = {}
+        for name in COLUMNS:
+            path = column_path(log_dir, name)
+            if mode == 'r+b' and not os.path.exists(path):
+                open(path, 'wb').close()
+            file = open(path, mode)
+            file.seek(self.rows * _row_size(name))
+            file.truncate()
+            self.files[name] = file
+
+        with open(os.path.join(log_dir, METADATA_FILE), 'w') as file:
+            json.dump(metadata, file, indent=2)
+        logging.info(f"Opened detection log {log_dir} at row {self.rows}.")
+
+    def _truncate_after(self, frame_number: int) -> int:
+        rows = _committed_rows(self.log_dir)
+        if rows == 0:
+            return 0
+        frames = np.memmap(column_path(self.log_dir, 'frame'), dtype=COLUMNS['frame'][0], mode='r', shape=(rows,))
+        keep = int(np.searchsorted(frames, frame_number, side='right'))
+        del frames
+        logging.info(f"Resuming detection log {self.log_dir} after frame {frame_number}: keeping {keep}/{rows} rows.")
+        return keep
+
+    def append(self, frame_number: int, boxes: np.ndarray, track_ids: np.ndarray, confidences: np.ndarray) -> None:
+        count = len(track_ids)
+        if count == 0:
+            return
+        confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        if len(confidences) != count:
+            confidences = np.full(count, np.nan, dtype=np.float32)
+        columns = {
+            'frame': np.full(count, frame_number, dtype=COLUMNS['frame'][0]),
+            'track_id': np.asarray(track_ids, dtype=COLUMNS['track_id'][0]),
+            'box': np.asarray(boxes, dtype=COLUMNS['box'][0]).reshape(-1, 4)[:count],
+            'conf': confidences.astype(COLUMNS['conf'][0], copy=False),
+        }
+        for name, values in columns.items():
+            self.files[name].write(np.ascontiguousarray(values).tobytes())
+        self.rows += count
+
+    def flush(self) -> None:
+        for file in self.files.values():
+            file.flush()
+
+    def close(self) -> None:
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+        logging.info(f"Closed detection log {self.log_dir} with {self.rows} detections.")
+
+
+class DetectionLogReader:
+    def __init__(self, log_dir: str):
+        self.log_dir = log_dir
+        with open(os.path.join(log_dir, METADATA_FILE), 'r') as file:
+            self.metadata = json.load(file)
+
+        self.rows = _committed_rows(log_dir)
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, (dtype, shape) in COLUMNS.items():
+            if self.rows == 0:
+                self.columns[name] = np.zeros((0,) + shape, dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(column_path(log_dir, name), dtype=dtype, mode='r',
+                                               shape=(self.rows,) + shape)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def frames(self) -> np.ndarray:
+        return self.columns['frame']
+
+    @property
+    def track_ids(self) -> np.ndarray:
+        return self.columns['track_id']
+
+    @property
+    def boxes(self) -> np.ndarray:
+        return self.columns['box']
+
+    @property
+    def confidences(self) -> np.ndarray:
+        return self.columns['conf']
+
+    def row_range(self, start_frame: int, end_frame: int) -> Tuple[int, int]:
+        # Rows for frames in [start_frame, end_frame); frames are written in ascending order.
+        start, end = np.searchsorted(self.frames, [start_frame, end_frame])
+        return int(start), int(end)
+
+    def frame(self, frame_number: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        start, end = self.row_range(frame_number, frame_number + 1)
+        return self.boxes[start:end], self.track_ids[start:end], self.confidences[start:end]
+
+    def track(self, track_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        mask = self.track_ids == track_id
+        return self.frames[mask], self.boxes[mask]
@@ -0,0 +1,168 @@
+import time
+import logging
+import multiprocessing
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Iterator, Optional, Tuple
+
+from boat_detection.utils.resources import limit_threads
+
+FREE = 0
+READY = 1
+
+# Control words ahead of the slot headers: end sequence (-1 while open) and error flag.
+END, ERROR = 0, 1
+CONTROL_WORDS = 2
+
+
+class FrameRing:
+    # Fixed-size frame slots in one shared-memory block. Sequence s always lives in slot
+    # s % slots: the producer that owns s waits for that slot to be FREE, fills it in place and
+    # marks it READY; the consumer reads it zero-copy and hands it back with release(s).
+    # Several producers may share a ring as long as their sequences are disjoint.
+    def __init__(self, slots: int, frame_shape: Tuple[int, int, int], name: Optional[str] = None,
+                 poll_interval: float = 0.0005):
+        if slots < 2:
+            raise ValueError(f"A frame ring needs at least 2 slots, got {slots}.")
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        self.poll_interval = poll_interval
+        self.frame_bytes = int(np.prod(self.frame_shape))
+        header_bytes = (CONTROL_WORDS + 2 * slots) * 8
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * self.frame_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.control = np.ndarray((CONTROL_WORDS,), dtype=np.int64, buffer=self.shm.buf)
+        # Per slot: [state, sequence]
+        self.headers = np.ndarray((slots, 2), dtype=np.int64, buffer=self.shm.buf, offset=CONTROL_WORDS * 8)
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8, buffer=self.shm.buf,
+                                 offset=header_bytes)
+        if self._owner:
+            self.control[:] = (-1, 0)
+            self.headers[:] = (FREE, -1)
+
+    @property
+    def spec(self) -> Tuple[int, Tuple[int, int, int], str]:
+        # Everything another process needs to attach: FrameRing(*spec[:2], name=spec[2]).
+        return self.slots, self.frame_shape, self.shm.name
+
+    def _wait(self, condition, timeout: Optional[float], what: str):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not condition():
+            if self.control[ERROR]:
+                raise RuntimeError(f"Frame ring producer failed while waiting for {what}.")
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {what}.")
+            time.sleep(self.poll_interval)
+
+    def write_slot(self, sequence: int, timeout: Optional[float] = None) -> np.ndarray:
+        slot = sequence % self.slots
+        self._wait(lambda: self.headers[slot, 0] == FREE, timeout, f"slot {slot} to write frame {sequence}")
+        return self.frames[slot]
+
+    def publish(self, sequence: int):
+        slot = sequence % self.slots
+        self.headers[slot, 1] = sequence
+        self.headers[slot, 0] = READY
+
+    def finish(self, end_sequence: int):
+        # No sequence at or after end_sequence will be published.
+        self.control[END] = end_sequence
+
+    def fail(self):
+        self.control[ERROR] = 1
+
+    def read(self, sequence: int, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        # The frame for sequence, or None once the producer has finished before it.
+        slot = sequence % self.slots
+
+        def available():
+            if self.headers[slot, 0] == READY and self.headers[slot, 1] == sequence:
+                return True
+            return 0 <= self.control[END] <= sequence
+
+        self._wait(available, timeout, f"frame {sequence}")
+        if self.headers[slot, 0] == READY and self.headers[slot, 1] == sequence:
+            return self.frames[slot]
+        return None
+
+    def release(self, sequence: int):
+        slot = sequence % self.slots
+        if self.headers[slot, 1] == sequence:
+            self.headers[slot, 0] = FREE
+
+    def close(self):
+        # Views into the buffer must go before the mapping can be closed.
+        self.control = self.headers = self.frames = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def decode_into_ring(video_path: str, ring_spec, frame_size: Tuple[int, int], start_frame: int = 0,
+                     first_sequence: int = 0, timeout: Optional[float] = None, opencv_threads: Optional[int] = None,
+                     cores=None):
+    # Decoder process body: frame start_frame + i is published as first_sequence + i,
+    # resized straight into its slot.
+    if opencv_threads is not None or cores:
+        limit_threads(opencv_threads=opencv_threads, cores=cores)
+    slots, frame_shape, name = ring_spec
+    ring = FrameRing(slots, frame_shape, name=name)
+    sequence = first_sequence
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"Cannot open video file: {video_path}")
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            slot = ring.write_slot(sequence, timeout)
+            cv2.resize(frame, frame_size, dst=slot)
+            ring.publish(sequence)
+            sequence += 1
+        ring.finish(sequence)
+    except Exception as e:
+        logging.error(f"Decoding {video_path} into the frame ring failed at sequence {sequence}: {e}")
+        ring.fail()
+        raise
+    finally:
+        cap.release()
+        ring.close()
+
+
+def ring_frames(video_path: str, frame_size: Tuple[int, int], start_frame: int = 0, slots: int = 8,
+                timeout: Optional[float] = 60, opencv_threads: Optional[int] = None,
+                cores=None) -> Iterator[np.ndarray]:
+    # Decodes in a separate process and yields resized frames from shared memory. Each frame
+    # stays valid (and may be drawn on) until the next one is requested.
+    width, height = frame_size
+    ring = FrameRing(slots, (height, width, 3))
+    context = multiprocessing.get_context('spawn')
+    decoder = context.Process(target=decode_into_ring, args=(video_path, ring.spec, frame_size, start_frame),
+                              kwargs={'opencv_threads': opencv_threads, 'cores': cores}, daemon=True)
+    decoder.start()
+    sequence = 0
+    try:
+        while True:
+            try:
+                frame = ring.read(sequence, timeout)
+            except TimeoutError:
+                if not decoder.is_alive():
+                    raise RuntimeError(f"Decoder process for {video_path} exited with code {decoder.exitcode}.")
+                raise
+            if frame is None:
+                break
+            yield frame
+            ring.release(sequence)
+            sequence += 1
+    finally:
+        if decoder.is_alive():
+            decoder.terminate()
+        decoder.join()
+        ring.close()
@@ -0,0 +1,112 @@
+import os
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.utils.helpers import compute_file_hash
+
+QUEUED = 'queued'
+DUPLICATE = 'duplicate'
+
+
+class IngestionWatcher:
+    def __init__(self, videos_dir: str, db_manager: DatabaseManager, model: str, stable_seconds: float = 10,
+                 extensions: Tuple[str, ...] = ('.m4v', '.mp4'), clock=time.time):
+        self.videos_dir = videos_dir
+        self.db_manager = db_manager
+        self.model = model
+        self.stable_seconds = stable_seconds
+        self.extensions = extensions
+        self.clock = clock
+
+        self._dir_mtime = None
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        # name -> (size, mtime, time first seen at that size and mtime), for files not yet stable.
+        self._pending: Dict[str, Tuple[int, float, float]] = {}
+        self._known = db_manager.get_ingested_files()
+        self._handed_out = set()
+
+    def hash_for(self, video_file: str) -> Optional[str]:
+        known = self._known.get(video_file)
+        return known[2] if known else None
+
+    def _scan(self) -> Dict[str, Tuple[int, float]]:
+        entries = {}
+        with os.scandir(self.videos_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.lower().endswith(self.extensions):
+                    stat = entry.stat()
+                    entries[entry.name] = (stat.st_size, stat.st_mtime)
+        return entries
+
+    def _refresh(self):
+        # The directory mtime only changes when files are added, removed or renamed, so an
+        # unchanged directory needs no listing; only files still being written are re-stat'ed.
+        dir_mtime = os.stat(self.videos_dir).st_mtime_ns
+        if dir_mtime != self._dir_mtime:
+            self._dir_mtime = dir_mtime
+            self._entries = self._scan()
+            return
+        for name in list(self._pending):
+            try:
+                stat = os.stat(os.path.join(self.videos_dir, name))
+                self._entries[name] = (stat.st_size, stat.st_mtime)
+            except FileNotFoundError:
+                self._entries.pop(name, None)
+                self._pending.pop(name, None)
+
+    def _is_stable(self, name: str, size: int, mtime: float, now: float) -> bool:
+        if size == 0:
+            return False
+        previous = self._pending.get(name)
+        if previous is None or previous[:2] != (size, mtime):
+            self._pending[name] = (size, mtime, now)
+            since = now
+        else:
+            since = previous[2]
+        if now - since >= self.stable_seconds or now - mtime >= self.stable_seconds:
+            self._pending.pop(name, None)
+            return True
+        return False
+
+    def poll(self) -> List[str]:
+        self._refresh()
+        now = self.clock()
+        processed = self.db_manager.get_processed_hashes(self.model)
+        claimed = {self._known[name][2] for name in self._handed_out if name in self._known}
+
+        ready = []
+        for name, (size, mtime) in sorted(self._entries.items()):
+            if name in self._handed_out:
+                continue
+            known = self._known.get(name)
+            if known is not None and known[:2] == (size, mtime):
+                # Already hashed; hand it out again only if its work never completed.
+                if known[3] == QUEUED and known[2] not in processed and known[2] not in claimed:
+                    ready.append(name)
+                    claimed.add(known[2])
+                continue
+
+            if not self._is_stable(name, size, mtime, now):
+                continue
+
+            file_hash = compute_file_hash(os.path.join(self.videos_dir, name))
+            if file_hash in processed or file_hash in claimed:
+                status = DUPLICATE
+                logging.info(f"Skipping {name}: identical content was already processed or queued.")
+            else:
+                status = QUEUED
+                ready.append(name)
+                claimed.add(file_hash)
+            self._known[name] = (size, mtime, file_hash, status)
+            self.db_manager.record_ingested_file(name, size, mtime, file_hash, status)
+
+        self._handed_out.update(ready)
+        if ready:
+            logging.info(f"Ingested {len(ready)} new videos from {self.videos_dir}.")
+        return ready
+
+    def release(self, video_file: str) -> None:
+        # Lets a file whose processing failed be handed out again by the next poll.
+        self._handed_out.discard(video_file)
@@ -0,0 +1,87 @@
+import time
+import logging
+from typing import Dict, List, Optional, Sequence
+
+# Quality steps from full (level 0) to the cheapest setting. 'stride' multiplies frame_stride,
+# 'imgsz_scale' shrinks the inference size, and 'annotate' / 'save_images' turn off the
+# annotated video and the detection images.
+SHED_LEVELS = (
+    {},
+    {'stride': 2},
+    {'stride': 2, 'imgsz_scale': 0.75},
+    {'stride': 3, 'imgsz_scale': 0.5},
+    {'stride': 3, 'imgsz_scale': 0.5, 'annotate': False, 'save_images': False},
+)
+LEVEL_DEFAULTS = {'stride': 1, 'imgsz_scale': 1.0, 'annotate': True, 'save_images': True}
+
+
+def scale_imgsz(imgsz, scale: float):
+    # Scaled inference size, kept a multiple of 32 as YOLO expects.
+    if scale == 1.0:
+        return imgsz
+    if isinstance(imgsz, (list, tuple)):
+        return tuple(max(32, int(round(size * scale / 32)) * 32) for size in imgsz)
+    return max(32, int(round(imgsz * scale / 32)) * 32)
+
+
+class LoadShedder:
+    # Feedback controller on processing lag: how far the wall clock has run ahead of the video
+    # clock since start(). Above max_lag, while the lag is not already shrinking, it steps one
+    # level down; below recover_lag it steps one level back up. Either way it then holds for
+    # hold seconds so the new level can take effect before it is judged.
+    def __init__(self, max_lag: float = 5.0, recover_lag: float = 1.0, hold: float = 10.0,
+                 levels: Optional[Sequence[Dict]] = None, clock=time.monotonic):
+        if recover_lag >= max_lag:
+            raise ValueError(f"recover_lag ({recover_lag}) must be below max_lag ({max_lag}).")
+        self.max_lag = max_lag
+        self.recover_lag = recover_lag
+        self.hold = hold
+        self.levels = [dict(LEVEL_DEFAULTS, **level) for level in (levels or SHED_LEVELS)]
+        self.clock = clock
+        self.level = 0
+        self.events: List[dict] = []
+        self.level_seconds = [0.0] * len(self.levels)
+        self._started = None
+
+    @property
+    def settings(self) -> dict:
+        return self.levels[self.level]
+
+    def start(self, video_time: float = 0.0):
+        self._started = self.clock()
+        self._start_video_time = video_time
+        self._changed_at = self._level_since = self._started
+        self._lag_at_change = 0.0
+
+    def lag(self, video_time: float) -> float:
+        return (self.clock() - self._started) - (video_time - self._start_video_time)
+
+    def update(self, frame_number: int, video_time: float) -> Optional[dict]:
+        # Returns the event when the level changed, None otherwise.
+        now = self.clock()
+        lag = self.lag(video_time)
+        if now - self._changed_at < self.hold:
+            return None
+        if lag > self.max_lag and lag >= self._lag_at_change and self.level < len(self.levels) - 1:
+            level = self.level + 1
+        elif lag < self.recover_lag and self.level > 0:
+            level = self.level - 1
+        else:
+            return None
+
+        self.level_seconds[self.level] += now - self._level_since
+        event = {'frame_number': frame_number, 'video_time': video_time, 'lag': lag, 'from_level': self.level,
+                 'level': level, 'settings': self.levels[level]}
+        self.level = level
+        self._changed_at = self._level_since = now
+        self._lag_at_change = lag
+        self.events.append(event)
+        logging.info(f"Load shedding {'down' if level > event['from_level'] else 'up'} to level {level} at frame "
+                     f"{frame_number} with {lag:.1f}s lag: {self.levels[level]}.")
+        return event
+
+    def report(self) -> dict:
+        seconds = list(self.level_seconds)
+        if self._started is not None:
+            seconds[self.level] += self.clock() - self._level_since
+        return {'level': self.level, 'changes': len(self.events), 'level_seconds': seconds}
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import logging
+import tracemalloc
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+# Allocation sites (path fragments) grouped into tracker subsystems; the first match wins.
+SUBSYSTEMS = (
+    ('history', ('tracking/track_store.py',)),
+    ('reid', ('tracking/reid.py',)),
+    ('detection_cache', ('tracking/detection_cache.py', 'tracking/detection_log.py')),
+    ('queues', ('multiprocessing/', 'queue.py', 'tracking/frame_ring.py')),
+    ('tracker', ('tracking/video_tracker.py', 'tracking/tiling.py', 'ultralytics/trackers/')),
+    ('model', ('ultralytics/', 'torch/', 'onnxruntime/', 'openvino/')),
+    ('database', ('sqlite3/', 'database/db_manager.py')),
+)
+MB = 1024 * 1024
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    pass
+
+
+def rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, but the best portable fallback.
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def subsystem_for(filename: str) -> str:
+    filename = filename.replace(os.sep, '/')
+    for name, fragments in SUBSYSTEMS:
+        if any(fragment in filename for fragment in fragments):
+            return name
+    return 'other'
+
+
+class MemoryProfiler:
+    # Samples RSS and tracemalloc every interval_frames frames and attributes traced memory to
+    # subsystems by allocation site. Growth rates are per hour of processed video, so they
+    # do not depend on how fast the machine is.
+    def __init__(self, interval_frames: int = 1000, budget_mb_per_hour: Optional[float] = None,
+                 trace_frames: int = 1, top_n: int = 10):
+        self.interval_frames = interval_frames
+        self.budget_mb_per_hour = budget_mb_per_hour
+        self.trace_frames = trace_frames
+        self.top_n = top_n
+        self.samples: List[dict] = []
+        self._first_snapshot = None
+        self._last_snapshot = None
+        self._started_tracing = False
+        self._start_time = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._started_tracing = True
+        self._start_time = time.perf_counter()
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def is_due(self, frame_number: int) -> bool:
+        return self.interval_frames > 0 and frame_number % self.interval_frames == 0
+
+    def sample(self, frame_number: int, video_seconds: float,
+               probes: Optional[Dict[str, Callable[[], float]]] = None, video: Optional[str] = None) -> dict:
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ])
+        by_subsystem = {}
+        for stat in snapshot.statistics('filename'):
+            name = subsystem_for(stat.traceback[0].filename)
+            by_subsystem[name] = by_subsystem.get(name, 0) + stat.size
+
+        values = {}
+        for name, probe in (probes or {}).items():
+            try:
+                values[name] = probe()
+            except Exception as e:
+                logging.warning(f"Memory probe '{name}' failed: {e}")
+
+        record = {
+            'video': video,
+            'frame': frame_number,
+            'video_seconds': video_seconds,
+            'wall_seconds': time.perf_counter() - self._start_time,
+            'rss_mb': rss_bytes() / MB,
+            'traced_mb': sum(by_subsystem.values()) / MB,
+            'subsystems_mb': {name: size / MB for name, size in sorted(by_subsystem.items())},
+            'probes': values,
+        }
+        self.samples.append(record)
+        if self._first_snapshot is None:
+            self._first_snapshot = snapshot
+        self._last_snapshot = snapshot
+        logging.info(f"Memory at frame {frame_number}: RSS {record['rss_mb']:.1f} MB, "
+                     f"traced {record['traced_mb']:.1f} MB.")
+        return record
+
+    @staticmethod
+    def _slope_per_hour(seconds: List[float], values: List[float]) -> float:
+        # Least-squares slope, so one noisy sample does not decide the verdict.
+        if len(seconds) < 2 or max(seconds) == min(seconds):
+            return 0.0
+        return float(np.polyfit(np.asarray(seconds) / 3600.0, np.asarray(values), 1)[0])
+
+    def report(self) -> dict:
+        # The first sample is the baseline: model and buffers are warm by then.
+        seconds = [s['video_seconds'] for s in self.samples]
+        names = sorted({name for s in self.samples for name in s['subsystems_mb']})
+        probe_names = sorted({name for s in self.samples for name in s['probes']})
+        report = {
+            'samples': self.samples,
+            'rss_growth_mb_per_hour': self._slope_per_hour(seconds, [s['rss_mb'] for s in self.samples]),
+            'traced_growth_mb_per_hour': self._slope_per_hour(seconds, [s['traced_mb'] for s in self.samples]),
+            'subsystem_growth_mb_per_hour': {
+                name: self._slope_per_hour(seconds, [s['subsystems_mb'].get(name, 0.0) for s in self.samples])
+                for name in names},
+            'probe_growth_per_hour': {
+                name: self._slope_per_hour([s['video_seconds'] for s in self.samples if name in s['probes']],
+                                           [s['probes'][name] for s in self.samples if name in s['probes']])
+                for name in probe_names},
+            'top_growth': [],
+            'budget_mb_per_hour': self.budget_mb_per_hour,
+        }
+        if self._first_snapshot is not None and self._last_snapshot is not self._first_snapshot:
+            for stat in self._last_snapshot.compare_to(self._first_snapshot, 'lineno')[:self.top_n]:
+                frame = stat.traceback[0]
+                report['top_growth'].append({'site': f"{frame.filename}:{frame.lineno}",
+                                             'subsystem': subsystem_for(frame.filename),
+                                             'size_diff_mb': stat.size_diff / MB, 'count_diff': stat.count_diff})
+        report['within_budget'] = (self.budget_mb_per_hour is None
+                                   or report['rss_growth_mb_per_hour'] <= self.budget_mb_per_hour)
+        return report
+
+    def write_report(self, path: str) -> dict:
+        report = self.report()
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
+        logging.info(f"Memory report written to {path}: RSS growth {report['rss_growth_mb_per_hour']:.1f} MB/h "
+                     f"of video.")
+        return report
+
+    def check_budget(self, report: Optional[dict] = None):
+        report = report or self.report()
+        if not report['within_budget']:
+            logging.error(f"RSS grew {report['rss_growth_mb_per_hour']:.1f} MB per video hour, over the budget of "
+                          f"{self.budget_mb_per_hour} MB.")
+            raise MemoryBudgetExceeded(f"RSS grew {report['rss_growth_mb_per_hour']:.1f} MB per video hour, "
+                                       f"over the budget of {self.budget_mb_per_hour} MB.")
@@ -0,0 +1,147 @@
+import logging
+import cv2
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+HIST_BINS = (8, 8, 4)
+# Confirmed tracks refresh their embedding every this many sightings instead of every frame.
+UPDATE_EVERY = 5
+# Pixels in the resized frame a boat may move while lost and still be re-identified.
+DEFAULT_MAX_DISTANCE = 200.0
+
+
+def appearance_embedding(frame: np.ndarray, box: Sequence[float],
+                         bins: Sequence[int] = HIST_BINS) -> Optional[np.ndarray]:
+    # L2-normalised HSV colour histogram of an xywh box, concatenated for the top and bottom
+    # halves so hull and superstructure colours are kept apart. None for empty crops.
+    x, y, w, h = box
+    height, width = frame.shape[:2]
+    x1, y1 = max(0, int(x - w / 2)), max(0, int(y - h / 2))
+    x2, y2 = min(width, int(x + w / 2)), min(height, int(y + h / 2))
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        return None
+    hsv = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2HSV)
+    middle = hsv.shape[0] // 2
+    parts = []
+    for half in (hsv[:middle], hsv[middle:]):
+        hist = cv2.calcHist([half], [0, 1, 2], None, list(bins), [0, 180, 0, 256, 0, 256])
+        parts.append(hist.ravel())
+    embedding = np.concatenate(parts).astype(np.float32)
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm > 0 else None
+
+
+class GalleryEntry:
+    __slots__ = ('embedding', 'hits', 'last_seen', 'position')
+
+    def __init__(self, embedding: Optional[np.ndarray], frame_number: int, position: np.ndarray):
+        self.embedding = embedding
+        self.hits = 1
+        self.last_seen = frame_number
+        self.position = position
+
+
+class ReIdGallery:
+    # Re-links tracker IDs that appear after a track was lost to the lost track's ID when
+    # their appearance matches, so a briefly hidden boat keeps one ID. Only confirmed tracks
+    # (min_hits sightings) unseen for more than lost_after_frames and at most max_age_frames are
+    # candidates; lost_after_frames should cover the tracker's own track_buffer, as until then
+    # the tracker may still bring the original ID back.
+    def __init__(self, max_age_frames: int, similarity_threshold: float = 0.85,
+                 max_distance: Optional[float] = DEFAULT_MAX_DISTANCE, min_hits: int = 3, momentum: float = 0.9,
+                 lost_after_frames: int = 0):
+        self.max_age_frames = max_age_frames
+        self.lost_after_frames = lost_after_frames
+        self.similarity_threshold = similarity_threshold
+        self.max_distance = max_distance
+        self.min_hits = min_hits
+        self.momentum = momentum
+        self.entries: Dict[int, GalleryEntry] = {}
+        self.aliases: Dict[int, int] = {}
+        self.relinked = 0
+
+    def _update(self, entry: GalleryEntry, frame: np.ndarray, box: np.ndarray, frame_number: int):
+        entry.hits += 1
+        entry.last_seen = frame_number
+        entry.position = box[:2].copy()
+        if entry.hits <= self.min_hits or entry.hits % UPDATE_EVERY == 0:
+            embedding = appearance_embedding(frame, box)
+            if embedding is not None and entry.embedding is None:
+                entry.embedding = embedding
+            elif embedding is not None:
+                blended = self.momentum * entry.embedding + (1 - self.momentum) * embedding
+                entry.embedding = blended / max(np.linalg.norm(blended), 1e-12)
+
+    def _lost_candidates(self, frame_number: int, seen: set) -> Dict[int, GalleryEntry]:
+        return {track_id: entry for track_id, entry in self.entries.items()
+                if track_id not in seen and entry.hits >= self.min_hits and entry.embedding is not None
+                and self.lost_after_frames < frame_number - entry.last_seen <= self.max_age_frames}
+
+    def resolve(self, track_ids: np.ndarray, boxes: np.ndarray, frame: np.ndarray, frame_number: int) -> np.ndarray:
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        resolved = np.asarray(track_ids).copy()
+        # The tracker brought back an ID that a newer ID had taken over, so the newer ID is a
+        # different boat after all and stops borrowing it; otherwise both boxes would share one ID.
+        raw_ids = {int(t) for t in track_ids}
+        revived = [raw_id for raw_id, target in self.aliases.items() if target in raw_ids]
+        for raw_id in revived:
+            logging.info(f"Track {self.aliases[raw_id]} reappeared at frame {frame_number}; "
+                         f"track {raw_id} keeps its own ID.")
+            del self.aliases[raw_id]
+        new = []
+        for index, raw_id in enumerate(int(t) for t in track_ids):
+            track_id = self.aliases.get(raw_id, raw_id)
+            if track_id in self.entries:
+                resolved[index] = track_id
+                self._update(self.entries[track_id], frame, boxes[index], frame_number)
+            else:
+                new.append(index)
+
+        if new:
+            seen = {int(t) for t in resolved}
+            lost = self._lost_candidates(frame_number, seen)
+            proposals = []
+            for index in new:
+                embedding = appearance_embedding(frame, boxes[index])
+                raw_id = int(track_ids[index])
+                self.entries[raw_id] = GalleryEntry(embedding, frame_number, boxes[index, :2].copy())
+                if embedding is None:
+                    continue
+                for lost_id, entry in lost.items():
+                    distance = np.linalg.norm(entry.position - boxes[index, :2])
+                    if self.max_distance is not None and distance > self.max_distance:
+                        continue
+                    similarity = float(np.dot(entry.embedding, embedding))
+                    if similarity >= self.similarity_threshold:
+                        proposals.append((similarity, index, lost_id))
+
+            # Best matches first; each lost track and each new ID is linked at most once.
+            linked_new, linked_lost = set(), set()
+            for similarity, index, lost_id in sorted(proposals, key=lambda p: -p[0]):
+                if index in linked_new or lost_id in linked_lost:
+                    continue
+                linked_new.add(index)
+                linked_lost.add(lost_id)
+                raw_id = int(track_ids[index])
+                entry = self.entries.pop(raw_id)
+                self.aliases[raw_id] = lost_id
+                lost_entry = self.entries[lost_id]
+                lost_entry.last_seen = frame_number
+                lost_entry.position = entry.position
+                lost_entry.hits += 1
+                resolved[index] = lost_id
+                self.relinked += 1
+                logging.info(f"Re-identified track {raw_id} as lost track {lost_id} at frame {frame_number} "
+                             f"(similarity {similarity:.3f}).")
+
+        self.evict(frame_number)
+        return resolved
+
+    def evict(self, frame_number: int):
+        stale = [track_id for track_id, entry in self.entries.items()
+                 if frame_number - entry.last_seen > self.max_age_frames]
+        for track_id in stale:
+            del self.entries[track_id]
+        if stale:
+            stale = set(stale)
+            self.aliases = {raw_id: track_id for raw_id, track_id in self.aliases.items() if track_id not in stale}
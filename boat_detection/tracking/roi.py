@@ -0,0 +1,81 @@
+import math
+import logging
+import cv2
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+
+def get_camera_config(cameras: Optional[dict], video_file: str) -> dict:
+    # Cameras are keyed by a name that appears in the video filename,
+    # e.g. "Exmouth Marina" matches "06-02-2022 10 C Exmouth Marina.m4v".
+    if not cameras:
+        return {}
+    for camera_name, camera_config in cameras.items():
+        if camera_name.lower() in video_file.lower():
+            logging.info(f"Using camera configuration '{camera_name}' for {video_file}.")
+            return camera_config or {}
+    return {}
+
+
+class RegionOfInterest:
+    def __init__(self, polygon: Sequence[Sequence[float]], frame_size: Tuple[int, int], imgsz: Optional[int] = None):
+        frame_width, frame_height = frame_size
+        self.polygon = np.asarray(polygon, dtype=np.int32).reshape(-1, 2)
+        if len(self.polygon) < 3:
+            raise ValueError(f"ROI polygon needs at least 3 points, got {len(self.polygon)}.")
+
+        x, y, w, h = cv2.boundingRect(self.polygon)
+        self.x1 = max(0, x)
+        self.y1 = max(0, y)
+        self.x2 = min(frame_width, x + w)
+        self.y2 = min(frame_height, y + h)
+        if self.x2 <= self.x1 or self.y2 <= self.y1:
+            raise ValueError(f"ROI polygon {self.polygon.tolist()} lies outside the {frame_width}x{frame_height} frame.")
+
+        self.mask = np.zeros((self.y2 - self.y1, self.x2 - self.x1), dtype=np.uint8)
+        cv2.fillPoly(self.mask, [self.polygon - (self.x1, self.y1)], 255)
+
+        if imgsz:
+            self.imgsz = imgsz
+        else:
+            self.imgsz = (math.ceil((self.x2 - self.x1) / 32) * 32, math.ceil((self.y2 - self.y1) / 32) * 32)
+
+    @classmethod
+    def from_camera_config(cls, camera_config: dict, frame_size: Tuple[int, int]) -> Optional['RegionOfInterest']:
+        polygon = camera_config.get('roi')
+        if not polygon:
+            return None
+        return cls(polygon, frame_size, camera_config.get('imgsz'))
+
+    @property
+    def rect(self) -> Tuple[int, int, int, int]:
+        return self.x1, self.y1, self.x2, self.y2
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        return np.ascontiguousarray(frame[self.y1:self.y2, self.x1:self.x2])
+
+    def to_frame_coords(self, boxes: np.ndarray) -> np.ndarray:
+        # Boxes are xywh in crop coordinates; only the centre needs shifting.
+        boxes = np.array(boxes, dtype=np.float32, copy=True).reshape(-1, 4)
+        boxes[:, 0] += self.x1
+        boxes[:, 1] += self.y1
+        return boxes
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        px = np.floor(points[:, 0]).astype(np.int64) - self.x1
+        py = np.floor(points[:, 1]).astype(np.int64) - self.y1
+        inside = (px >= 0) & (py >= 0) & (px < self.mask.shape[1]) & (py < self.mask.shape[0])
+        result = np.zeros(len(points), dtype=bool)
+        result[inside] = self.mask[py[inside], px[inside]] > 0
+        return result
+
+    def intersects(self, rect: Tuple[int, int, int, int]) -> bool:
+        x1, y1 = max(rect[0], self.x1), max(rect[1], self.y1)
+        x2, y2 = min(rect[2], self.x2), min(rect[3], self.y2)
+        if x2 <= x1 or y2 <= y1:
+            return False
+        return bool(self.mask[y1 - self.y1:y2 - self.y1, x1 - self.x1:x2 - self.x1].any())
+
+    def draw(self, frame: np.ndarray, color: Tuple[int, int, int] = (0, 255, 255)) -> None:
+        cv2.polylines(frame, [self.polygon], isClosed=True, color=color, thickness=2)
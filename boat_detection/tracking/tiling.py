@@ -0,0 +1,178 @@
+import pickle
+import logging
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+from boat_detection.tracking.load_shedding import scale_imgsz
+
+Tile = Tuple[int, int, int, int]
+
+
+def _starts(length: int, tile: int, stride: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile + 1, stride))
+    if starts[-1] != length - tile:
+        starts.append(length - tile)
+    return starts
+
+
+def tile_grid(frame_size: Tuple[int, int], tile_size: int, overlap: float = 0.2) -> List[Tile]:
+    # Overlapping xyxy tiles covering the frame; the last row and column are pushed
+    # back to the frame edge instead of running off it.
+    if not 0 <= overlap < 1:
+        raise ValueError(f"Tile overlap must be in [0, 1), got {overlap}.")
+    frame_width, frame_height = frame_size
+    stride = max(1, int(round(tile_size * (1 - overlap))))
+    tiles = []
+    for y in _starts(frame_height, tile_size, stride):
+        for x in _starts(frame_width, tile_size, stride):
+            tiles.append((x, y, min(x + tile_size, frame_width), min(y + tile_size, frame_height)))
+    return tiles
+
+
+def tiles_from_config(tile_config, frame_size: Tuple[int, int], tile_size: int, overlap: float) -> List[Tile]:
+    # A camera's 'tiles' entry is either explicit [x1, y1, x2, y2] rects or {'size': ..., 'overlap': ...}.
+    if isinstance(tile_config, (list, tuple)):
+        frame_width, frame_height = frame_size
+        tiles = []
+        for rect in tile_config:
+            x1, y1, x2, y2 = (int(v) for v in rect)
+            x1, y1, x2, y2 = max(0, x1), max(0, y1), min(frame_width, x2), min(frame_height, y2)
+            if x2 > x1 and y2 > y1:
+                tiles.append((x1, y1, x2, y2))
+        return tiles
+    tile_config = tile_config or {}
+    return tile_grid(frame_size, tile_config.get('size', tile_size), tile_config.get('overlap', overlap))
+
+
+def merge_tile_detections(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray,
+                          iou_threshold: float = 0.5, ios_threshold: float = 0.8) -> np.ndarray:
+    # Class-aware greedy NMS over xyxy boxes from all tiles. Besides IoU, a box is also
+    # suppressed when most of it lies inside a stronger box (intersection over the smaller
+    # area), which removes the clipped halves of boats cut by a tile edge.
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    areas = np.prod(np.clip(boxes[:, 2:] - boxes[:, :2], 0, None), axis=1)
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    keep = []
+    for index in order:
+        if suppressed[index]:
+            continue
+        keep.append(index)
+        top_left = np.maximum(boxes[index, :2], boxes[:, :2])
+        bottom_right = np.minimum(boxes[index, 2:], boxes[:, 2:])
+        intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=1)
+        union = areas[index] + areas - intersection
+        iou = np.where(union > 0, intersection / np.maximum(union, 1e-12), 0.0)
+        smaller = np.minimum(areas[index], areas)
+        ios = np.where(smaller > 0, intersection / np.maximum(smaller, 1e-12), 0.0)
+        suppressed |= (classes == classes[index]) & ((iou > iou_threshold) | (ios > ios_threshold))
+    return np.array(keep, dtype=np.int64)
+
+
+class TileDetections:
+    # The minimal results interface BYTETracker.update() reads: conf, cls, xywh and boolean indexing.
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.float32).reshape(-1)
+        self.xywh = np.concatenate([(self.xyxy[:, :2] + self.xyxy[:, 2:]) / 2,
+                                    self.xyxy[:, 2:] - self.xyxy[:, :2]], axis=1)
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+    def __getitem__(self, index) -> 'TileDetections':
+        return TileDetections(self.xyxy[index], self.conf[index], self.cls[index])
+
+
+def tracker_buffer(tracker_config: str = 'bytetrack.yaml', default: int = 30) -> int:
+    # Updates a lost track is kept for before the tracker gives its ID up for good.
+    try:
+        from ultralytics.utils import YAML
+        from ultralytics.utils.checks import check_yaml
+
+        return int(YAML.load(check_yaml(tracker_config)).get('track_buffer', default))
+    except Exception as e:
+        logging.warning(f"Could not read track_buffer from {tracker_config}, assuming {default}: {e}")
+        return default
+
+
+def create_tracker(tracker_config: str = 'bytetrack.yaml'):
+    from ultralytics.trackers.byte_tracker import BYTETracker
+    from ultralytics.utils import IterableSimpleNamespace, YAML
+    from ultralytics.utils.checks import check_yaml
+
+    return BYTETracker(IterableSimpleNamespace(**YAML.load(check_yaml(tracker_config))))
+
+
+class TiledDetector:
+    def __init__(self, model, tiles: Sequence[Tile], tile_size: int, conf: float, tracker,
+                 iou_threshold: float = 0.5, ios_threshold: float = 0.8):
+        if not tiles:
+            raise ValueError("Tiled inference needs at least one tile.")
+        self.model = model
+        self.tiles = list(tiles)
+        self.tile_size = tile_size
+        self.conf = conf
+        self.tracker = tracker
+        self.iou_threshold = iou_threshold
+        self.ios_threshold = ios_threshold
+
+    @classmethod
+    def for_frame(cls, model, frame_size: Tuple[int, int], tracker, roi=None, tile_config=None,
+                  tile_size: int = 640, overlap: float = 0.2, conf: float = 0.5, iou_threshold: float = 0.5,
+                  ios_threshold: float = 0.8) -> 'TiledDetector':
+        tiles = tiles_from_config(tile_config, frame_size, tile_size, overlap)
+        if roi is not None:
+            kept = [tile for tile in tiles if roi.intersects(tile)]
+            logging.info(f"Skipping {len(tiles) - len(kept)} of {len(tiles)} tiles outside the ROI.")
+            tiles = kept
+        return cls(model, tiles, tile_size, conf, tracker, iou_threshold, ios_threshold)
+
+    def predict(self, frame: np.ndarray, imgsz_scale: float = 1.0) -> TileDetections:
+        # Load shedding scales the inference size of every tile; the tile grid itself stays put.
+        crops = [np.ascontiguousarray(frame[y1:y2, x1:x2]) for x1, y1, x2, y2 in self.tiles]
+        results = self.model.predict(crops, imgsz=scale_imgsz(self.tile_size, imgsz_scale), conf=self.conf,
+                                     verbose=False)
+
+        boxes, scores, classes = [], [], []
+        for (x1, y1, _, _), result in zip(self.tiles, results):
+            if result.boxes is None or len(result.boxes) == 0:
+                continue
+            boxes.append(result.boxes.xyxy.cpu().numpy() + np.array([x1, y1, x1, y1], dtype=np.float32))
+            scores.append(result.boxes.conf.cpu().numpy())
+            classes.append(result.boxes.cls.cpu().numpy())
+        if not boxes:
+            return TileDetections(np.zeros((0, 4)), np.zeros(0), np.zeros(0))
+
+        boxes, scores, classes = np.concatenate(boxes), np.concatenate(scores), np.concatenate(classes)
+        keep = merge_tile_detections(boxes, scores, classes, self.iou_threshold, self.ios_threshold)
+        return TileDetections(boxes[keep], scores[keep], classes[keep])
+
+    def detect(self, frame: np.ndarray, imgsz_scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        tracked = self.tracker.update(self.predict(frame, imgsz_scale), frame)
+        if len(tracked) == 0:
+            return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        xyxy = tracked[:, :4].astype(np.float32)
+        boxes = np.concatenate([(xyxy[:, :2] + xyxy[:, 2:]) / 2, xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+        return boxes, tracked[:, 4].astype(np.int32), tracked[:, 5].astype(np.float32)
+
+
+def capture_tiled_tracker_state(tracker) -> Optional[bytes]:
+    try:
+        return pickle.dumps(tracker)
+    except Exception as e:
+        logging.warning(f"Could not capture tiled tracker state for checkpoint: {e}")
+        return None
+
+
+def restore_tiled_tracker_state(tracker_state: Optional[bytes]):
+    if not tracker_state:
+        return None
+    try:
+        return pickle.loads(tracker_state)
+    except Exception as e:
+        logging.warning(f"Could not restore tiled tracker state from checkpoint: {e}")
+        return None
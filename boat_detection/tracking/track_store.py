@@ -0,0 +1,121 @@
+import logging
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+
+class TrackState:
+    __slots__ = ('track_id', 'slot', 'detections', 'head', 'last_seen')
+
+    def __init__(self, track_id: int, slot: int, last_seen: int):
+        self.track_id = track_id
+        self.slot = slot
+        self.detections = 0
+        self.head = 0
+        self.last_seen = last_seen
+
+
+class TrackHistoryStore:
+    def __init__(self, window: int, capacity: int = 64, timeout_frames: Optional[int] = None):
+        if window < 1:
+            raise ValueError(f"Track history window must be at least 1, got {window}.")
+        self.window = window
+        self.timeout_frames = timeout_frames
+        self.tracks: Dict[int, TrackState] = {}
+        self.positions = np.zeros((capacity, window, 2), dtype=np.float32)
+        self._free_slots = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def __contains__(self, track_id: int) -> bool:
+        return track_id in self.tracks
+
+    def get(self, track_id: int) -> Optional[TrackState]:
+        return self.tracks.get(track_id)
+
+    def _grow(self):
+        capacity = len(self.positions)
+        self.positions = np.concatenate([self.positions, np.zeros_like(self.positions)])
+        self._free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+        logging.debug(f"Grew track history store from {capacity} to {2 * capacity} slots.")
+
+    def _state_for(self, track_id: int, frame_number: int) -> TrackState:
+        state = self.tracks.get(track_id)
+        if state is None:
+            if not self._free_slots:
+                self._grow()
+            state = TrackState(track_id, self._free_slots.pop(), frame_number)
+            self.tracks[track_id] = state
+        return state
+
+    def update(self, track_ids: Iterable[int], centres: np.ndarray, frame_number: int) -> List[TrackState]:
+        states = [self._state_for(int(track_id), frame_number) for track_id in track_ids]
+        if not states:
+            return states
+
+        slots = np.fromiter((s.slot for s in states), dtype=np.intp, count=len(states))
+        heads = np.fromiter((s.head for s in states), dtype=np.intp, count=len(states))
+        self.positions[slots, heads] = np.asarray(centres, dtype=np.float32).reshape(-1, 2)
+
+        for state in states:
+            state.detections += 1
+            state.head = (state.head + 1) % self.window
+            state.last_seen = frame_number
+        return states
+
+    def movements(self, states: List[TrackState]) -> np.ndarray:
+        # Distance between the oldest and newest position held for each track.
+        if not states:
+            return np.zeros(0, dtype=np.float32)
+        slots = np.fromiter((s.slot for s in states), dtype=np.intp, count=len(states))
+        heads = np.fromiter((s.head for s in states), dtype=np.intp, count=len(states))
+        lengths = np.fromiter((min(s.detections, self.window) for s in states), dtype=np.intp, count=len(states))
+        newest = self.positions[slots, (heads - 1) % self.window]
+        oldest = self.positions[slots, (heads - lengths) % self.window]
+        return np.linalg.norm(newest - oldest, axis=1)
+
+    def history(self, track_id: int) -> np.ndarray:
+        state = self.tracks.get(track_id)
+        if state is None:
+            return np.zeros((0, 2), dtype=np.float32)
+        length = min(state.detections, self.window)
+        order = (state.head - length + np.arange(length)) % self.window
+        return self.positions[state.slot, order]
+
+    def resize(self, window: int) -> None:
+        # Keeps each track's newest positions that fit the new window. Growing the window caps the
+        # detection count at the positions actually held, so a track only passes a count gate again
+        # once movement can be measured over the full new window.
+        if window < 1:
+            raise ValueError(f"Track history window must be at least 1, got {window}.")
+        if window == self.window:
+            return
+        positions = np.zeros((len(self.positions), window, 2), dtype=np.float32)
+        for state in self.tracks.values():
+            kept = self.history(state.track_id)[-window:]
+            positions[state.slot, :len(kept)] = kept
+            state.head = len(kept) % window
+            state.detections = min(state.detections, self.window)
+        logging.debug(f"Resized track history window from {self.window} to {window}.")
+        self.positions = positions
+        self.window = window
+
+    def evict_stale(self, frame_number: int) -> List[int]:
+        if self.timeout_frames is None:
+            return []
+        cutoff = frame_number - self.timeout_frames
+        stale = [track_id for track_id, state in self.tracks.items() if state.last_seen < cutoff]
+        for track_id in stale:
+            self.remove(track_id)
+        if stale:
+            logging.debug(f"Evicted {len(stale)} stale tracks at frame {frame_number}: {stale}.")
+        return stale
+
+    def remove(self, track_id: int) -> None:
+        state = self.tracks.pop(track_id, None)
+        if state is not None:
+            self._free_slots.append(state.slot)
+
+    def clear(self) -> None:
+        for track_id in list(self.tracks):
+            self.remove(track_id)
@@ -3,21 +3,40 @@ import cv2
 # import sqlite3
 import numpy as np
 from ultralytics import YOLO
-from collections import defaultdict
 import logging
 import time
 import shutil
 import math
+import itertools
 
-from boat_detection.utils.helpers import setup_logging, ensure_directory, get_env_variable, load_environment
+from boat_detection.utils.helpers import setup_logging, ensure_directory, compute_file_hash, image_quality
 from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.rendering.annotate import draw_track
+from boat_detection.tracking.roi import RegionOfInterest, get_camera_config
+from boat_detection.tracking.track_store import TrackHistoryStore
+from boat_detection.tracking.detection_cache import DetectionCache, detection_cache_key
+from boat_detection.tracking.detection_log import DetectionLogWriter
+from boat_detection.tracking.ingest import IngestionWatcher
+from boat_detection.tracking.backends import prepare_model
+from boat_detection.tracking.tiling import (TiledDetector, create_tracker, capture_tiled_tracker_state,
+                                            restore_tiled_tracker_state, tracker_buffer)
+from boat_detection.tracking.reid import ReIdGallery, DEFAULT_MAX_DISTANCE
+from boat_detection.tracking.frame_ring import ring_frames
+from boat_detection.tracking.memory_profile import MemoryProfiler, MB
+from boat_detection.tracking.activity import find_active_segments
+from boat_detection.tracking.load_shedding import LoadShedder, LEVEL_DEFAULTS, scale_imgsz
+from boat_detection.utils.clip_time import clip_start_time, local_day, CLIP_TIME_SOURCES, DEFAULT_TIME_PATTERN
+from boat_detection.utils.resources import ThreadBudget, limit_threads, threads_limited, worker_share
+from boat_detection.tracking.checkpoint import CheckpointManager, capture_tracker_state, restore_tracker_state
 # from boat_detection.comparison.comparator import Comparator
 
+# Runtime keys whose change invalidates the ROI, the tiles or the detection cache.
+DETECTION_KEYS = {'cameras', 'detection_confidence', 'frame_stride'}
+
 
 class VideoTracker:
     def __init__(self, config: dict):
         self.config = config
-        load_environment()
 
         self.videos_dir = config['videos_dir']
         self.output_dir = config['output_dir']
@@ -27,8 +46,54 @@ class VideoTracker:
         self.models_dir = config['models_dir']
         self.model_path = config['model_path']
 
-        self.movement_threshold = config.get('movement_threshold', 100)
-        self.valid_detection_count = config.get('valid_detection_count', 5)
+        self.apply_runtime_config()
+        self.write_annotated_video = config.get('write_annotated_video', True)
+        self.ingest_stable_seconds = config.get('ingest_stable_seconds', 10)
+        self.model_backend = config.get('model_backend', 'pytorch')
+        self.model_int8 = config.get('model_int8', False)
+        self.tiled_inference = config.get('tiled_inference', False)
+        self.tile_size = config.get('tile_size', 640)
+        self.tile_overlap = config.get('tile_overlap', 0.2)
+        self.tile_nms_iou = config.get('tile_nms_iou', 0.5)
+        self.tile_merge_ios = config.get('tile_merge_ios', 0.8)
+        # Shared across videos, like the tracker model.track(persist=True) keeps on the predictor.
+        self.tile_tracker = None
+        self.reid_enabled = config.get('reid_enabled', False)
+        self.reid_max_age = config.get('reid_max_age', 5.0)
+        self.reid_similarity = config.get('reid_similarity', 0.85)
+        self.reid_max_distance = config.get('reid_max_distance', DEFAULT_MAX_DISTANCE)
+        # Unset, a track counts as lost once the tracker itself has dropped it.
+        reid_lost_after = config.get('reid_lost_after')
+        self.reid_lost_after = tracker_buffer() if reid_lost_after is None else reid_lost_after
+        self.reid_min_hits = config.get('reid_min_hits', 3)
+        self.decode_process = config.get('decode_process', False)
+        self.frame_ring_slots = config.get('frame_ring_slots', 8)
+        self.memory_profile_interval = config.get('memory_profile_interval', 0)
+        self.memory_budget_mb_per_hour = config.get('memory_budget_mb_per_hour')
+        self.memory_profile_dir = config.get('memory_profile_dir', os.path.join(self.results_dir, 'memory_profiles'))
+        self.last_memory_report = None
+        self.memory_profiler = None
+        self.profiled_video_seconds = 0.0
+        self.activity_scan = config.get('activity_scan', False)
+        self.activity_scan_fps = config.get('activity_scan_fps', 2.0)
+        self.activity_scan_width = config.get('activity_scan_width', 160)
+        self.activity_scan_seek = config.get('activity_scan_seek', False)
+        self.activity_pixel_delta = config.get('activity_pixel_delta', 25)
+        self.activity_threshold = config.get('activity_threshold', 0.01)
+        self.activity_padding = config.get('activity_padding', 5.0)
+        self.activity_merge_gap = config.get('activity_merge_gap', 10.0)
+        self.load_shedding = config.get('load_shedding', False)
+        self.shedding_max_lag = config.get('shedding_max_lag', 5.0)
+        self.shedding_recover_lag = config.get('shedding_recover_lag', 1.0)
+        self.shedding_hold = config.get('shedding_hold', 10.0)
+        self.shedding_levels = config.get('shedding_levels')
+        # Set by the load-shedding controller while a video is processed.
+        self.imgsz_scale = 1.0
+        self.last_shedding_report = None
+        self.absolute_time = config.get('absolute_time', False)
+        self.clip_time_sources = config.get('clip_time_sources', list(CLIP_TIME_SOURCES))
+        self.clip_time_pattern = config.get('clip_time_pattern', DEFAULT_TIME_PATTERN)
+        self.clip_timezone = config.get('clip_timezone')
 
         log_file = os.path.join(self.logs_dir, 'processing.log')
         setup_logging(log_file)
@@ -41,20 +106,160 @@ class VideoTracker:
         self.db_manager = DatabaseManager(db_path=config['database_path'])
         self.db_manager.initialize_database()
 
+        self.checkpoints = CheckpointManager(
+            config.get('checkpoints_dir', os.path.join(self.results_dir, 'checkpoints')),
+            config.get('checkpoint_interval', 0))
+
+        self.detection_cache = None
+        if config.get('detection_cache', False):
+            self.detection_cache = DetectionCache(
+                config.get('detection_cache_dir', os.path.join(self.results_dir, 'detection_cache')))
+        self._model_hash = None
+
+        self.detection_logs_dir = None
+        if config.get('detection_log', False):
+            self.detection_logs_dir = config.get('detection_logs_dir', os.path.join(self.results_dir, 'detection_logs'))
+
+        # Called as progress_callback(video_file, frame_number, total_frames) every 100 frames;
+        # raising from it aborts the current video.
+        self.progress_callback = None
+        # Added to every tracker ID, so several trackers writing to one database never share IDs.
+        self.track_id_offset = 0
+
+        self.thread_budget = ThreadBudget.from_config(config)
+        if self.thread_budget is not None and not threads_limited():
+            logging.info(f"CPU thread budget: {self.thread_budget.describe()}.")
+            limit_threads(*self.thread_budget.tracker_limits(not self.decode_process))
+
         self.model = self.load_model()
 
+    def apply_runtime_config(self):
+        # Settings that can change between frames without reloading the model.
+        self.movement_threshold = self.config.get('movement_threshold', 100)
+        self.valid_detection_count = self.config.get('valid_detection_count', 5)
+        self.track_timeout = self.config.get('track_timeout', 30)
+        self.cameras = self.config.get('cameras') or {}
+        self.detection_confidence = self.config.get('detection_confidence', 0.5)
+        self.frame_stride = self.config.get('frame_stride', 1)
+
+    def refresh_config(self) -> set:
+        # Only a reloadable Config ever changes; a plain dict config stays as it was.
+        reload_if_changed = getattr(self.config, 'reload_if_changed', None)
+        if reload_if_changed is None:
+            return set()
+        changed = reload_if_changed()
+        if changed:
+            self.apply_runtime_config()
+        return changed
+
     def load_model(self):
         model_full_path = os.path.join(self.models_dir, self.model_path)
         try:
-            model = YOLO(model_full_path)
-            logging.info(f"YOLO model loaded from {model_full_path}.")
+            if self.model_backend == 'pytorch':
+                model = YOLO(model_full_path)
+            else:
+                model_full_path = prepare_model(self.config, model_full_path, self.model_backend, self.model_int8)
+                model = YOLO(model_full_path, task='detect')
+            logging.info(f"YOLO model loaded from {model_full_path} ({self.model_backend} backend).")
             return model
         except Exception as e:
             logging.error(f"Failed to load YOLO model: {e}")
             raise
 
+    def get_model_hash(self):
+        if self._model_hash is None:
+            try:
+                self._model_hash = compute_file_hash(os.path.join(self.models_dir, self.model_path))
+            except OSError:
+                logging.warning(f"Cannot hash model weights {self.model_path}; detection cache disabled.")
+                self._model_hash = ''
+        return self._model_hash or None
+
+    def open_detection_cache(self, file_hash, roi, frame_width: int, frame_height: int, resuming: bool,
+                             tiler=None, segments=None):
+        if self.detection_cache is None or file_hash is None:
+            return None, None
+        model_hash = self.get_model_hash()
+        if model_hash is None:
+            return None, None
+
+        params = {
+            'backend': [self.model_backend, self.model_int8],
+            'conf': self.detection_confidence,
+            'frame_size': [frame_width, frame_height],
+            'roi': [list(roi.rect), roi.imgsz] if roi is not None else None,
+            'tiles': [[list(tile) for tile in tiler.tiles], tiler.tile_size] if tiler is not None else None,
+        }
+        if self.frame_stride != 1:
+            params['stride'] = self.frame_stride
+        if segments is not None:
+            params['segments'] = [list(segment) for segment in segments]
+        key = detection_cache_key(file_hash, model_hash, params)
+        cached = self.detection_cache.load(key)
+        if cached is not None:
+            return cached, None
+        if resuming:
+            # A partial pass cannot produce a complete cache entry.
+            return None, None
+        return None, self.detection_cache.recorder(key, params)
+
+    def open_detection_log(self, video_file: str, file_hash, fps: float, frame_size, source_size,
+                           resume_from_frame=None):
+        if self.detection_logs_dir is None:
+            return None
+        log_dir = os.path.join(self.detection_logs_dir, os.path.splitext(video_file)[0])
+        metadata = {
+            'video_file': video_file,
+            'file_hash': file_hash,
+            'model': os.path.basename(self.model_path),
+            'fps': float(fps),
+            'frame_size': [int(v) for v in frame_size],
+            'source_size': [int(v) for v in source_size],
+        }
+        return DetectionLogWriter(log_dir, metadata, resume_from_frame=resume_from_frame)
+
+    def detect(self, frame_resized, roi, frame_width: int, frame_height: int, tiler=None):
+        if tiler is not None:
+            boxes, track_ids, confidences = tiler.detect(frame_resized, self.imgsz_scale)
+            if roi is not None and len(track_ids) > 0:
+                inside = roi.contains(boxes[:, :2])
+                boxes, track_ids, confidences = boxes[inside], track_ids[inside], confidences[inside]
+            return boxes, track_ids, confidences
+
+        if roi is not None:
+            inference_frame = roi.crop(frame_resized)
+            inference_size = roi.imgsz
+        else:
+            inference_frame = frame_resized
+            inference_size = (frame_width, frame_height)
+        inference_size = scale_imgsz(inference_size, self.imgsz_scale)
+
+        results = self.model.track(inference_frame, persist=True, imgsz=inference_size,
+                                   conf=self.detection_confidence)
+
+        empty = np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        if not results or len(results) == 0:
+            return empty
+        result = results[0]
+        if result.boxes.id is None:
+            return empty
+
+        boxes = result.boxes.xywh.cpu().numpy()
+        track_ids = result.boxes.id.int().cpu().numpy()
+        confidences = result.boxes.conf.cpu().numpy() if result.boxes.conf is not None else np.ones(len(track_ids))
+
+        if roi is not None and len(track_ids) > 0:
+            boxes = roi.to_frame_coords(boxes)
+            inside = roi.contains(boxes[:, :2])
+            boxes = boxes[inside]
+            track_ids = np.asarray(track_ids)[inside]
+            confidences = np.asarray(confidences)[inside]
+
+        return boxes, track_ids, confidences
+
     def save_boat_to_db(self, track_id: int, status: str, timestamp: float, model_name: str, match_id: int = None):
-        self.db_manager.insert_boat_record(track_id, status, timestamp, model_name, match_id)
+        launch_day = local_day(timestamp, self.clip_timezone) if self.absolute_time else None
+        self.db_manager.insert_boat_record(track_id, status, timestamp, model_name, match_id, launch_day)
 
     def update_boat_in_db(self, track_id: int, status: str, timestamp: float, match_id: int = None):
         self.db_manager.update_boat_record(track_id, status, timestamp,
@@ -69,6 +274,7 @@ class VideoTracker:
             return 0.0
 
     def remove_detection_images(self, track_id: int):
+        self.db_manager.delete_detection_images(track_id)
         track_folder = os.path.join(self.detection_images_dir, f"track_id_{track_id}")
         if os.path.exists(track_folder):
             try:
@@ -79,22 +285,160 @@ class VideoTracker:
         else:
             logging.warning(f"No detection images found for track ID {track_id} to remove.")
 
-    def track_videos(self):
-        video_files = [f for f in os.listdir(self.videos_dir) if f.endswith(('.m4v', '.mp4'))]
+    def get_roi(self, video_file: str, frame_width: int, frame_height: int):
+        camera_config = get_camera_config(self.cameras, video_file)
+        roi = RegionOfInterest.from_camera_config(camera_config, (frame_width, frame_height))
+        if roi is not None:
+            logging.info(f"Restricting inference for {video_file} to ROI {roi.rect} at imgsz {roi.imgsz}.")
+        return roi
+
+    def get_tiled_detector(self, video_file: str, frame_width: int, frame_height: int, roi):
+        tile_config = get_camera_config(self.cameras, video_file).get('tiles')
+        if tile_config is False or (tile_config is None and not self.tiled_inference):
+            return None
+        if self.tile_tracker is None:
+            self.tile_tracker = create_tracker()
+        tiler = TiledDetector.for_frame(self.model, (frame_width, frame_height), self.tile_tracker, roi, tile_config,
+                                        self.tile_size, self.tile_overlap, self.detection_confidence,
+                                        self.tile_nms_iou, self.tile_merge_ios)
+        logging.info(f"Tiled inference for {video_file}: {len(tiler.tiles)} tiles at imgsz {self.tile_size}.")
+        return tiler
+
+    def create_reid(self, fps: float):
+        if not self.reid_enabled:
+            return None
+        # The tracker counts its buffer in updates, which come every frame_stride frames.
+        lost_after = self.reid_lost_after * self.frame_stride
+        max_age = max(1, int(self.reid_max_age * fps))
+        if max_age <= lost_after:
+            logging.warning(f"reid_max_age ({self.reid_max_age}s) does not reach past the tracker's "
+                            f"{lost_after}-frame buffer; no tracks will be re-identified.")
+        return ReIdGallery(max_age, self.reid_similarity, self.reid_max_distance, self.reid_min_hits,
+                           lost_after_frames=lost_after)
+
+    def create_shedder(self):
+        if not self.load_shedding:
+            return None
+        return LoadShedder(self.shedding_max_lag, self.shedding_recover_lag, self.shedding_hold, self.shedding_levels)
+
+    def clip_start(self, video_path: str, duration: float):
+        # Epoch seconds of the clip's first frame with absolute_time, otherwise 0 so event times stay
+        # seconds into the video.
+        if not self.absolute_time:
+            return 0.0
+        start, source = clip_start_time(video_path, duration, self.clip_time_sources, self.clip_time_pattern,
+                                        self.clip_timezone)
+        if start is None:
+            logging.warning(f"No start time found for {video_path} from {self.clip_time_sources}; "
+                            f"using seconds into the video.")
+            return 0.0
+        logging.info(f"Clip {video_path} starts at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start))} "
+                     f"(from {source}).")
+        return start
+
+    def event_time(self, cap, clip_start: float, video_time: float) -> float:
+        # The decoder's presentation time is exact for variable frame rate recordings; it is only
+        # known when decoding in this process.
+        if self.absolute_time and not self.decode_process:
+            position = cap.get(cv2.CAP_PROP_POS_MSEC)
+            if position > 0:
+                video_time = position / 1000.0
+        return clip_start + video_time
+
+    def model_tracker_size(self) -> int:
+        # Tracks held by the ultralytics tracker(s), lost and removed ones included.
+        trackers = list(getattr(getattr(self.model, 'predictor', None), 'trackers', None) or [])
+        if self.tile_tracker is not None:
+            trackers.append(self.tile_tracker)
+        return sum(len(getattr(tracker, name, ()))
+                   for tracker in trackers for name in ('tracked_stracks', 'lost_stracks', 'removed_stracks'))
+
+    def find_active_segments(self, video_path: str, fps: float, total_frames: int, roi, frame_size):
+        region = None
+        if roi is not None:
+            width, height = frame_size
+            x1, y1, x2, y2 = roi.rect
+            region = (x1 / width, y1 / height, x2 / width, y2 / height)
+        return find_active_segments(video_path, fps, total_frames, self.activity_scan_fps, self.activity_scan_width,
+                                    self.activity_pixel_delta, self.activity_threshold, self.activity_padding,
+                                    self.activity_merge_gap, region, self.activity_scan_seek)
+
+    def numbered_frames(self, cap, video_path: str, frame_size, start_frame: int, segments=None):
+        # (frame_number, frame) pairs counted from 1, over the rest of the video or, after an
+        # activity scan, over the active [start, end) segments only, seeking between them.
+        if segments is None:
+            segments = [(start_frame, None)]
+        position = start_frame
+        for start, end in segments:
+            start = max(start, start_frame)
+            if end is not None and end <= start:
+                continue
+            if not self.decode_process and start != position:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            frames = self.frame_source(cap, video_path, frame_size, start)
+            try:
+                for position, frame in enumerate(
+                        itertools.islice(frames, None if end is None else end - start), start + 1):
+                    yield position, frame
+            finally:
+                frames.close()
+
+    def frame_source(self, cap, video_path: str, frame_size, start_frame: int):
+        # Resized frames, decoded here or, with decode_process, in a separate process that
+        # hands them over through a shared-memory ring.
+        if self.decode_process:
+            if self.thread_budget is None:
+                return ring_frames(video_path, frame_size, start_frame, self.frame_ring_slots)
+            return ring_frames(video_path, frame_size, start_frame, self.frame_ring_slots,
+                               opencv_threads=self.thread_budget.per_worker('decode', worker_share()),
+                               cores=self.thread_budget.cores_for('decode'))
+        return self._read_frames(cap, frame_size)
+
+    @staticmethod
+    def _read_frames(cap, frame_size):
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            yield cv2.resize(frame, frame_size)
+
+    def track_videos(self, video_files=None):
+        watcher = None
+        if video_files is None:
+            watcher = IngestionWatcher(self.videos_dir, self.db_manager, os.path.basename(self.model_path),
+                                       stable_seconds=self.ingest_stable_seconds)
+            video_files = watcher.poll()
         if not video_files:
-            logging.error("No video files found in the videos directory.")
+            logging.error("No new video files found in the videos directory.")
             return
 
         for video_file in video_files:
-            video_path = os.path.join(self.videos_dir, video_file)
-            output_video_path = os.path.join(self.output_dir, f"output_{os.path.splitext(video_file)[0]}.mp4")
-            logging.info(f"Processing video: {video_file}")
-
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                logging.error(f"Cannot open video file: {video_path}")
-                continue
+            self.process_video(video_file, watcher.hash_for(video_file) if watcher is not None else None)
+
+    def process_video(self, video_file: str, file_hash=None):
+        video_path = os.path.join(self.videos_dir, video_file)
+        output_video_path = os.path.join(self.output_dir, f"output_{os.path.splitext(video_file)[0]}.mp4")
+        model_name = os.path.basename(self.model_path)
+
+        checkpoint = None
+        if file_hash is None and (self.checkpoints.enabled or self.detection_cache is not None):
+            file_hash = compute_file_hash(video_path)
+        if self.checkpoints.enabled:
+            if self.db_manager.is_video_processed(file_hash, model_name):
+                logging.info(f"Skipping {video_file}: already processed with model '{model_name}'.")
+                return
+            checkpoint = self.checkpoints.load(file_hash)
+
+        logging.info(f"Processing video: {video_file}")
+        self.refresh_config()
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            logging.error(f"Cannot open video file: {video_path}")
+            return
 
+        frames = out = detection_log = profiler = None
+        try:
             fps = cap.get(cv2.CAP_PROP_FPS)
             frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
@@ -103,96 +447,250 @@ class VideoTracker:
             new_width = math.ceil(frame_width / 32) * 32
             new_height = math.ceil(frame_height / 32) * 32
 
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_video_path, fourcc, fps, (new_width, new_height))
-
-            track_history = defaultdict(lambda: {'detections': 0, 'positions': []})
-            valid_tracks = set()
-            boat_records = {}
-
-            frame_number = 0
-
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                frame_number += 1
-                current_time_sec = frame_number / fps
-
-                frame_resized = cv2.resize(frame, (new_width, new_height))
+            roi = self.get_roi(video_file, new_width, new_height)
+            clip_start = self.clip_start(video_path, total_frames / fps if fps else 0.0)
 
+            segments = None
+            if checkpoint is not None:
+                segments = checkpoint.get('activity_segments')
+            elif self.activity_scan:
                 try:
-                    results = self.model.track(frame_resized, persist=True, imgsz=(new_width, new_height), conf=0.5)
+                    segments = self.find_active_segments(video_path, fps, total_frames, roi, (new_width, new_height))
                 except Exception as e:
-                    logging.error(f"YOLO tracking failed at frame {frame_number} in {video_file}: {e}")
-                    continue
-
-                if results and len(results) > 0:
-                    result = results[0]
-                    boxes = result.boxes.xywh.cpu().numpy()
-                    track_ids = result.boxes.id.int().cpu().numpy() if result.boxes.id is not None else []
-
-                    for box, track_id in zip(boxes, track_ids):
-                        x_center, y_center, w, h = box
-                        track_id = int(track_id)
-
-                        history = track_history[track_id]
-                        history['detections'] += 1
-                        history['positions'].append((x_center, y_center))
-                        if len(history['positions']) > self.valid_detection_count:
-                            history['positions'].pop(0)
-
-                        if history['detections'] >= self.valid_detection_count:
-                            start_pos = np.array(history['positions'][0])
-                            current_pos = np.array(history['positions'][-1])
-                            movement = np.linalg.norm(current_pos - start_pos)
+                    logging.error(f"Activity scan failed for {video_file}, tracking every frame: {e}")
+
+            if checkpoint is not None:
+                frame_number = checkpoint['frame_number']
+                track_history = checkpoint['track_history']
+                valid_tracks = checkpoint['valid_tracks']
+                boat_records = checkpoint['boat_records']
+                track_id_offset = checkpoint.get('track_id_offset', 0)
+                restore_tracker_state(self.model, checkpoint.get('tracker_state'))
+                reid = checkpoint.get('reid') or self.create_reid(fps)
+                tile_tracker = restore_tiled_tracker_state(checkpoint.get('tiled_tracker_state'))
+                if tile_tracker is not None:
+                    self.tile_tracker = tile_tracker
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                # Keep the frames already written; the resumed part goes to its own file.
+                output_video_path = os.path.join(
+                    self.output_dir, f"output_{os.path.splitext(video_file)[0]}_from_{frame_number:06d}.mp4")
+                logging.info(f"Resuming {video_file} from frame {frame_number}.")
+            else:
+                frame_number = 0
+                track_history = TrackHistoryStore(self.valid_detection_count,
+                                                  timeout_frames=int(self.track_timeout * fps))
+                valid_tracks = set()
+                boat_records = {}
+                track_id_offset = self.track_id_offset
+                reid = self.create_reid(fps)
+
+            tiler = self.get_tiled_detector(video_file, new_width, new_height, roi)
+
+            cached_detections, recorder = self.open_detection_cache(file_hash, roi, new_width, new_height,
+                                                                    resuming=checkpoint is not None, tiler=tiler,
+                                                                    segments=segments)
+            if cached_detections is not None:
+                logging.info(f"Replaying {len(cached_detections)} cached detections for {video_file}.")
+
+            detection_log = self.open_detection_log(
+                video_file, file_hash, fps, (new_width, new_height), (frame_width, frame_height),
+                resume_from_frame=frame_number if checkpoint is not None else None)
+
+            if self.write_annotated_video:
+                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                out = cv2.VideoWriter(output_video_path, fourcc, fps, (new_width, new_height))
+
+            if self.memory_profile_interval > 0:
+                profiler = self.session_profiler()
+                probes = {
+                    'track_history_tracks': lambda: len(track_history),
+                    'track_history_mb': lambda: track_history.positions.nbytes / MB,
+                    'boat_records': lambda: len(boat_records),
+                    'valid_tracks': lambda: len(valid_tracks),
+                    'model_tracker_tracks': self.model_tracker_size,
+                    'reid_gallery': lambda: len(reid.entries) if reid is not None else 0,
+                }
+
+            shedder = self.create_shedder()
+            shed = LEVEL_DEFAULTS
+            self.imgsz_scale = 1.0
+            if shedder is not None:
+                shedder.start(frame_number / fps)
+
+            frames = self.numbered_frames(cap, video_path, (new_width, new_height), frame_number, segments)
+            for frame_number, frame_resized in frames:
+                current_time_sec = frame_number / fps
 
+                detected = cached_detections is not None or frame_number % (self.frame_stride * shed['stride']) == 0
+                if cached_detections is not None:
+                    boxes, track_ids, confidences = cached_detections.frame(frame_number)
+                elif detected:
+                    try:
+                        boxes, track_ids, confidences = self.detect(frame_resized, roi, new_width, new_height, tiler)
+                    except Exception as e:
+                        logging.error(f"YOLO tracking failed at frame {frame_number} in {video_file}: {e}")
+                        continue
+                    if recorder is not None:
+                        recorder.add(frame_number, boxes, track_ids, confidences)
+                else:
+                    boxes, track_ids, confidences = (np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int32),
+                                                     np.zeros(0, dtype=np.float32))
+                if track_id_offset and len(track_ids) > 0:
+                    track_ids = np.asarray(track_ids) + track_id_offset
+
+                if reid is not None and detected and len(track_ids) > 0:
+                    # Before anything is stored, so a re-identified boat keeps its folder and DB row.
+                    track_ids = reid.resolve(track_ids, boxes, frame_resized, frame_number)
+
+                if detection_log is not None and detected:
+                    detection_log.append(frame_number, boxes, track_ids, confidences)
+
+                if len(track_ids) > 0:
+                    centres = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)[:len(track_ids), :2]
+                    states = track_history.update(track_ids, centres, frame_number)
+                    movements = track_history.movements(states)
+
+                    for box, history, movement in zip(boxes, states, movements):
+                        track_id = history.track_id
+                        quality = image_quality(frame_resized, box) if track_id not in boat_records else None
+
+                        if history.detections >= self.valid_detection_count:
                             if movement >= self.movement_threshold:
                                 valid_tracks.add(track_id)
 
                                 if track_id not in boat_records:
                                     boat_records[track_id] = 'launched'
-                                    self.save_boat_to_db(track_id, 'launched', current_time_sec,
-                                                         os.path.basename(self.model_path))
+                                    self.save_boat_to_db(track_id, 'launched',
+                                                         self.event_time(cap, clip_start, current_time_sec), model_name)
                                 elif boat_records[track_id] == 'launched':
                                     boat_records[track_id] = 'retrieved'
-                                    self.update_boat_in_db(track_id, 'retrieved', current_time_sec)
+                                    self.update_boat_in_db(track_id, 'retrieved',
+                                                           self.event_time(cap, clip_start, current_time_sec))
                                     self.remove_detection_images(track_id)
 
-                        x1 = int(x_center - w / 2)
-                        y1 = int(y_center - h / 2)
-                        x2 = int(x_center + w / 2)
-                        y2 = int(y_center + h / 2)
-                        cv2.rectangle(frame_resized, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                        cv2.putText(frame_resized, f'ID: {track_id}', (x1, y1 - 10),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-                        if len(history['positions']) >= 2:
-                            for idx in range(1, len(history['positions'])):
-                                pt1 = (int(history['positions'][idx - 1][0]), int(history['positions'][idx - 1][1]))
-                                pt2 = (int(history['positions'][idx][0]), int(history['positions'][idx][1]))
-                                cv2.line(frame_resized, pt1, pt2, (255, 0, 0), 2)
-
-                        if track_id not in boat_records:
+                        if shed['annotate']:
+                            draw_track(frame_resized, box, track_id, track_history.history(track_id))
+
+                        if track_id not in boat_records and shed['save_images']:
                             track_folder = os.path.join(self.detection_images_dir, f"track_id_{track_id}")
                             ensure_directory(track_folder)
                             frame_filename = f"frame_{frame_number:04d}.jpg"
                             frame_path = os.path.join(track_folder, frame_filename)
                             cv2.imwrite(frame_path, frame_resized)
+                            # Committed with the next boat record, every 100 frames and when the video ends.
+                            self.db_manager.add_detection_image(track_id, frame_number, frame_path, quality,
+                                                                commit=False)
                             logging.info(f"Saved detection image: {frame_path}")
 
-                out.write(frame_resized)
+                if roi is not None and shed['annotate']:
+                    roi.draw(frame_resized)
+
+                # Shed frames are still written, unannotated, so the video keeps its length and timing.
+                if out is not None:
+                    out.write(frame_resized)
+
+                if shedder is not None:
+                    event = shedder.update(frame_number, current_time_sec)
+                    if event is not None:
+                        shed = event['settings']
+                        self.imgsz_scale = shed['imgsz_scale']
+                        self.db_manager.record_load_shedding(video_file, event)
+                        if recorder is not None:
+                            logging.info(f"Load shedding changed detection settings; not caching detections for "
+                                         f"{video_file}.")
+                            recorder = None
 
                 if frame_number % 100 == 0:
+                    self.db_manager.conn.commit()
+                    for track_id in track_history.evict_stale(frame_number):
+                        valid_tracks.discard(track_id)
                     logging.info(f"Processed frame {frame_number}/{total_frames} in {video_file}.")
-
+                    if self.progress_callback is not None:
+                        self.progress_callback(video_file, frame_number, total_frames)
+
+                    changed = self.refresh_config()
+                    track_history.timeout_frames = int(self.track_timeout * fps)
+                    if 'valid_detection_count' in changed:
+                        # The movement window is the detection count, so it follows the new value.
+                        track_history.resize(self.valid_detection_count)
+                    if changed & DETECTION_KEYS:
+                        roi = self.get_roi(video_file, new_width, new_height)
+                        tiler = self.get_tiled_detector(video_file, new_width, new_height, roi)
+                        if recorder is not None or cached_detections is not None:
+                            # The cache entry describes the old settings, so neither finish nor replay it.
+                            logging.info(f"Detection settings changed mid-video; not caching detections for "
+                                         f"{video_file}.")
+                            recorder = cached_detections = None
+
+                if profiler is not None and profiler.is_due(frame_number):
+                    profiler.sample(frame_number, self.profiled_video_seconds + current_time_sec, probes,
+                                    video=video_file)
+
+                if file_hash is not None and self.checkpoints.is_due(frame_number):
+                    if detection_log is not None:
+                        detection_log.flush()
+                    self.db_manager.conn.commit()
+                    self.checkpoints.save(file_hash, {
+                        'video_file': video_file,
+                        'frame_number': frame_number,
+                        'track_history': track_history,
+                        'valid_tracks': valid_tracks,
+                        'boat_records': boat_records,
+                        'track_id_offset': track_id_offset,
+                        'reid': reid,
+                        'activity_segments': segments,
+                        'tracker_state': capture_tracker_state(self.model),
+                        'tiled_tracker_state': (capture_tiled_tracker_state(self.tile_tracker)
+                                                if tiler is not None else None),
+                    })
+        finally:
+            # Also when tracking fails or the progress callback cancels the video part-way.
+            if frames is not None:
+                frames.close()
             cap.release()
-            out.release()
-            logging.info(f"Finished processing video: {video_file}. Output saved to {output_video_path}.")
+            if out is not None:
+                out.release()
+            if detection_log is not None:
+                detection_log.close()
+            self.db_manager.conn.commit()
+
+        if recorder is not None:
+            recorder.finalize(frame_number)
+
+        if profiler is not None:
+            # The report covers the session so far, measured from the first video's baseline.
+            self.profiled_video_seconds += frame_number / fps
+            ensure_directory(self.memory_profile_dir)
+            self.last_memory_report = profiler.write_report(
+                os.path.join(self.memory_profile_dir, f"{os.path.splitext(video_file)[0]}_memory.json"))
+        if shedder is not None:
+            self.last_shedding_report = shedder.report()
+            self.imgsz_scale = 1.0
+            logging.info(f"Load shedding for {video_file}: {self.last_shedding_report['changes']} level changes, "
+                         f"seconds per level {[round(s, 1) for s in self.last_shedding_report['level_seconds']]}.")
+        if reid is not None:
+            logging.info(f"Re-identification merged {reid.relinked} tracker IDs into earlier tracks in {video_file}.")
+        if file_hash is not None:
+            self.db_manager.mark_video_processed(file_hash, model_name, video_file, frame_number)
+            self.checkpoints.clear(file_hash)
+        logging.info(f"Finished processing video: {video_file}. Output saved to {output_video_path}.")
+        if profiler is not None:
+            profiler.check_budget(self.last_memory_report)
+
+    def session_profiler(self) -> MemoryProfiler:
+        # One profiler for the tracker's lifetime, so growth that builds up across videos is measured
+        # against the same baseline. close() stops it.
+        if self.memory_profiler is None:
+            self.memory_profiler = MemoryProfiler(self.memory_profile_interval, self.memory_budget_mb_per_hour)
+            self.memory_profiler.start()
+        return self.memory_profiler
 
     def close(self):
-        self.db_manager.close()
+        try:
+            if self.memory_profiler is not None:
+                self.memory_profiler.stop()
+        finally:
+            self.db_manager.close()
 
     def run(self):
         start_time = time.time()
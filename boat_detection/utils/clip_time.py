@@ -0,0 +1,85 @@
+import os
+import re
+import json
+import shutil
+import logging
+import subprocess
+from datetime import datetime, timezone as dt_timezone
+from typing import Optional, Sequence, Tuple
+
+# Camera and NVR exports usually carry the recording start in the name, e.g.
+# 'slipway_20240615_093000.mp4' or 'cam2 2024-06-15 09-30-00.m4v'.
+DEFAULT_TIME_PATTERN = (r'(?P<year>\d{4})[-_]?(?P<month>\d{2})[-_]?(?P<day>\d{2})[T_ -]?'
+                        r'(?P<hour>\d{2})[-_:.]?(?P<minute>\d{2})(?:[-_:.]?(?P<second>\d{2}))?')
+CLIP_TIME_SOURCES = ('filename', 'metadata', 'mtime')
+
+
+def _zone(timezone: Optional[str]):
+    if timezone is None:
+        return None
+    from zoneinfo import ZoneInfo
+
+    return ZoneInfo(timezone)
+
+
+def parse_filename_time(video_file: str, pattern: str = DEFAULT_TIME_PATTERN,
+                        timezone: Optional[str] = None) -> Optional[float]:
+    # Epoch seconds of the time in the file name, read as wall-clock time in timezone
+    # (the machine's local zone when None).
+    match = re.search(pattern, os.path.splitext(os.path.basename(video_file))[0])
+    if match is None:
+        return None
+    fields = {name: int(value) for name, value in match.groupdict().items() if value is not None}
+    try:
+        moment = datetime(fields['year'], fields['month'], fields['day'], fields.get('hour', 0),
+                          fields.get('minute', 0), fields.get('second', 0), tzinfo=_zone(timezone))
+    except (KeyError, ValueError):
+        return None
+    return moment.timestamp()
+
+
+def container_creation_time(video_path: str) -> Optional[float]:
+    # The creation_time tag most recorders write into the container, read with ffprobe when installed.
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe is None:
+        return None
+    try:
+        output = subprocess.run([ffprobe, '-v', 'quiet', '-print_format', 'json', '-show_format', video_path],
+                                capture_output=True, check=True, timeout=30).stdout
+        value = json.loads(output).get('format', {}).get('tags', {}).get('creation_time')
+    except (subprocess.SubprocessError, OSError, ValueError) as e:
+        logging.warning(f"Could not read container metadata of {video_path}: {e}")
+        return None
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=dt_timezone.utc)
+    return moment.timestamp()
+
+
+def clip_start_time(video_path: str, duration: float, sources: Sequence[str] = CLIP_TIME_SOURCES,
+                    pattern: str = DEFAULT_TIME_PATTERN,
+                    timezone: Optional[str] = None) -> Tuple[Optional[float], Optional[str]]:
+    # (epoch seconds, source) from the first source that has a start time. The file's mtime
+    # marks when the recorder finished writing, so the clip duration is taken off it.
+    for source in sources:
+        if source == 'filename':
+            start = parse_filename_time(video_path, pattern, timezone)
+        elif source == 'metadata':
+            start = container_creation_time(video_path)
+        elif source == 'mtime':
+            start = os.path.getmtime(video_path) - duration
+        else:
+            raise ValueError(f"Unknown clip time source '{source}'. Choose from {list(CLIP_TIME_SOURCES)}.")
+        if start is not None:
+            return start, source
+    return None, None
+
+
+def local_day(timestamp: float, timezone: Optional[str] = None) -> str:
+    # The 'YYYY-MM-DD' day partition an absolute timestamp falls in.
+    return datetime.fromtimestamp(timestamp, _zone(timezone)).strftime('%Y-%m-%d')
@@ -1,4 +1,5 @@
 import glob
+import hashlib
 import cv2
 import shutil
 import yaml
@@ -112,6 +113,19 @@ def save_detection_image(image: any, path: str) -> None:
         raise
 
 
+def image_quality(image: any, box: Tuple[float, float, float, float]) -> float:
+    # Variance of the Laplacian over the box crop: higher means a sharper view of the boat.
+    x_center, y_center, w, h = box
+    x1 = max(0, int(x_center - w / 2))
+    y1 = max(0, int(y_center - h / 2))
+    x2 = min(image.shape[1], int(x_center + w / 2))
+    y2 = min(image.shape[0], int(y_center + h / 2))
+    if x2 <= x1 or y2 <= y1:
+        return 0.0
+    crop = cv2.cvtColor(image[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(crop, cv2.CV_64F).var())
+
+
 def get_all_video_files(videos_dir: str, extensions: Tuple[str, ...] = ('.m4v', '.mp4')) -> List[str]:
     try:
         video_files = [f for f in os.listdir(videos_dir) if f.lower().endswith(extensions)]
@@ -122,6 +136,20 @@ def get_all_video_files(videos_dir: str, extensions: Tuple[str, ...] = ('.m4v',
         raise
 
 
+def compute_file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        logging.debug(f"Computed SHA-256 {file_hash} for {path}.")
+        return file_hash
+    except Exception as e:
+        logging.error(f"Failed to hash file {path}: {e}")
+        raise
+
+
 def calculate_on_water_time(launch_time: float, retrieve_time: float) -> float:
     on_water_time = retrieve_time - launch_time
     logging.debug(f"Calculated on-water time: {on_water_time} seconds.")
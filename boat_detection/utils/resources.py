@@ -0,0 +1,122 @@
+import os
+import cv2
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+THREAD_ROLES = ('decode', 'inference', 'encode', 'comparison')
+DEFAULT_SHARES = {'decode': 0.2, 'inference': 0.5, 'encode': 0.15, 'comparison': 0.15}
+
+# What limit_threads() applied in this process, and how many pool workers share each role's threads.
+_limits = None
+_workers = 1
+
+
+def available_cores() -> List[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cores(cores: int, shares: Dict[str, float]) -> Dict[str, int]:
+    # Whole cores in proportion to the shares (largest remainder), at least one per role; with
+    # fewer cores than roles the budget is exceeded rather than leaving a role without a thread.
+    total = sum(shares[role] for role in THREAD_ROLES) or 1.0
+    quotas = {role: cores * shares[role] / total for role in THREAD_ROLES}
+    split = {role: max(1, int(quotas[role])) for role in THREAD_ROLES}
+    by_remainder = sorted(THREAD_ROLES, key=lambda role: (int(quotas[role]) - quotas[role], THREAD_ROLES.index(role)))
+    leftover = cores - sum(split.values())
+    for role in by_remainder[:max(0, leftover)]:
+        split[role] += 1
+    while sum(split.values()) > cores and max(split.values()) > 1:
+        split[max((role for role in THREAD_ROLES if split[role] > 1), key=lambda role: split[role] - quotas[role])] -= 1
+    return split
+
+
+class ThreadBudget:
+    def __init__(self, cores: int, shares: Optional[Dict[str, float]] = None, affinity: bool = False,
+                 core_ids: Optional[Sequence[int]] = None):
+        shares = dict(DEFAULT_SHARES, **(shares or {}))
+        unknown = set(shares) - set(THREAD_ROLES)
+        if unknown:
+            raise ValueError(f"Unknown CPU budget roles {sorted(unknown)}. Choose from {list(THREAD_ROLES)}.")
+        if cores < 1:
+            raise ValueError(f"CPU budget must be at least 1 core, got {cores}.")
+        self.cores = cores
+        self.split = split_cores(cores, shares)
+        self.affinity = affinity
+
+        # Consecutive cores per role in THREAD_ROLES order, wrapping round when oversubscribed.
+        core_ids = list(core_ids) if core_ids is not None else available_cores()
+        self.core_sets = {}
+        position = 0
+        for role in THREAD_ROLES:
+            self.core_sets[role] = [core_ids[(position + i) % len(core_ids)] for i in range(self.split[role])]
+            position += self.split[role]
+
+    @classmethod
+    def from_config(cls, config) -> Optional['ThreadBudget']:
+        cores = config.get('cpu_budget')
+        if not cores:
+            return None
+        available = available_cores()
+        if cores == 'auto':
+            cores = len(available)
+        elif cores > len(available):
+            logging.warning(f"CPU budget of {cores} cores exceeds the {len(available)} available to this process.")
+        return cls(int(cores), config.get('cpu_shares'), config.get('cpu_affinity', False), available)
+
+    def per_worker(self, role: str, workers: int = 1) -> int:
+        return max(1, self.split[role] // max(1, workers))
+
+    def cores_for(self, *roles: str) -> Optional[List[int]]:
+        if not self.affinity:
+            return None
+        return sorted({core for role in roles for core in self.core_sets[role]})
+
+    def tracker_limits(self, decode_in_process: bool, workers: int = 1) -> Tuple[int, int, Optional[List[int]]]:
+        # (torch threads, OpenCV threads, cores) for one tracking process. OpenCV does the encoding
+        # there, and the decoding too unless a separate decoder process has its own share.
+        roles = ('inference', 'encode', 'decode') if decode_in_process else ('inference', 'encode')
+        opencv_threads = self.per_worker('encode', workers)
+        if decode_in_process:
+            opencv_threads += self.per_worker('decode', workers)
+        return self.per_worker('inference', workers), opencv_threads, self.cores_for(*roles)
+
+    def describe(self) -> str:
+        split = ', '.join(f"{role} {self.split[role]}" for role in THREAD_ROLES)
+        pinned = ', pinned to cores' if self.affinity else ''
+        return f"{self.cores} cores: {split}{pinned}"
+
+
+def limit_threads(torch_threads: Optional[int] = None, opencv_threads: Optional[int] = None,
+                  cores: Optional[Sequence[int]] = None):
+    global _limits
+    if torch_threads is not None:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    if opencv_threads is not None:
+        cv2.setNumThreads(opencv_threads)
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    _limits = (torch_threads, opencv_threads, list(cores) if cores else None)
+    logging.info(f"Thread limits for process {os.getpid()}: torch {torch_threads}, OpenCV {opencv_threads}, "
+                 f"cores {list(cores) if cores else 'any'}.")
+
+
+def threads_limited() -> bool:
+    return _limits is not None
+
+
+def worker_share() -> int:
+    return _workers
+
+
+def init_tracking_worker(config, workers: int):
+    # ProcessPoolExecutor initializer: each tracking worker gets an equal part of every role.
+    global _workers
+    budget = ThreadBudget.from_config(config)
+    if budget is None:
+        return
+    _workers = workers
+    limit_threads(*budget.tracker_limits(not config.get('decode_process', False), workers))
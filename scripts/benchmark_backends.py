@@ -0,0 +1,78 @@
+import os
+import json
+import math
+import argparse
+import logging
+import cv2
+from ultralytics import YOLO
+from boat_detection.tracking.backends import prepare_model, run_backend, compare_outputs, format_report
+from boat_detection.config.config import get_config
+from boat_detection.utils.helpers import ensure_directory
+
+
+def read_frames(video_path: str, count: int):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video file: {video_path}")
+    width = math.ceil(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) / 32) * 32
+    height = math.ceil(int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) / 32) * 32
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (width, height)))
+    cap.release()
+    return frames, (width, height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare speed and track outputs of exported model backends.')
+    parser.add_argument('video_file', help='Video file name inside videos_dir.')
+    parser.add_argument('--frames', type=int, default=300, help='Number of frames to track.')
+    parser.add_argument('--backends', nargs='+', default=['onnx', 'openvino'],
+                        help='Backends to compare against pytorch, e.g. onnx openvino onnx:int8 openvino:int8.')
+    parser.add_argument('--output', default=None, help='Report path (defaults to results_dir/backend_report.json).')
+    args = parser.parse_args()
+
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+    config = get_config(config_path)
+    weights_path = os.path.join(config['models_dir'], config['model_path'])
+    conf = config.get('detection_confidence', 0.5)
+
+    try:
+        frames, frame_size = read_frames(os.path.join(config['videos_dir'], args.video_file), args.frames)
+        imgsz = (frame_size[1], frame_size[0])
+
+        rows = []
+        reference = None
+        reference_time = None
+        for spec in ['pytorch'] + args.backends:
+            backend, _, precision = spec.partition(':')
+            int8 = precision == 'int8'
+            model_path = prepare_model(config, weights_path, backend, int8)
+            model = YOLO(model_path) if backend == 'pytorch' else YOLO(model_path, task='detect')
+            outputs, seconds_per_frame = run_backend(model, frames, imgsz, conf)
+            if reference is None:
+                reference, reference_time = outputs, seconds_per_frame
+            row = {'backend': spec, 'ms_per_frame': seconds_per_frame * 1000,
+                   'speedup': reference_time / seconds_per_frame if seconds_per_frame else 0.0}
+            row.update(compare_outputs(reference, outputs))
+            rows.append(row)
+            logging.info(f"Benchmarked {spec}: {row}")
+
+        report = format_report(rows)
+        print(report)
+        output = args.output or os.path.join(config['results_dir'], 'backend_report.json')
+        ensure_directory(os.path.dirname(os.path.abspath(output)))
+        with open(output, 'w') as file:
+            json.dump({'video_file': args.video_file, 'frames': len(frames), 'imgsz': list(imgsz), 'rows': rows},
+                      file, indent=2)
+        with open(os.path.splitext(output)[0] + '.md', 'w') as file:
+            file.write(report + '\n')
+    except Exception as e:
+        logging.error(f"An error occurred while benchmarking model backends: {e}")
+
+
+if __name__ == "__main__":
+    main()
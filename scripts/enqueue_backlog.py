@@ -0,0 +1,35 @@
+import os
+import time
+import argparse
+import logging
+from boat_detection.service.work_queue import open_work_queue
+from boat_detection.service.worker import enqueue_backlog
+from boat_detection.config.config import get_config
+from boat_detection.utils.helpers import setup_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Queue the video backlog as shard and comparison jobs.')
+    parser.add_argument('--batch', default=None, help='Batch name; re-running with the same name adds nothing.')
+    parser.add_argument('--shards', type=int, default=None, help='Number of shard jobs to split the videos into.')
+    parser.add_argument('--no-compare', action='store_true', help='Do not queue a comparison after the shards.')
+    parser.add_argument('--requeue', action='store_true',
+                        help='Also queue videos an earlier batch already queued for the current model.')
+    args = parser.parse_args()
+
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+    config = get_config(config_path)
+    setup_logging(os.path.join(config['logs_dir'], 'work_queue.log'))
+
+    try:
+        queue = open_work_queue(config)
+        enqueue_backlog(config, queue, args.batch or time.strftime('%Y%m%d-%H%M%S'),
+                        args.shards or config.get('work_queue_shards', 8), compare=not args.no_compare,
+                        requeue=args.requeue)
+        logging.info(f"Work queue: {queue.counts()}.")
+    except Exception as e:
+        logging.error(f"An error occurred while queueing the backlog: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import argparse
+import logging
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.database.reporting import BoatReporter, export_csv, export_parquet, BOAT_COLUMNS, SUMMARY_COLUMNS
+from boat_detection.config.config import get_config
+from boat_detection.utils.helpers import setup_logging, ensure_directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export boat records or daily summaries as CSV or Parquet.')
+    parser.add_argument('report', choices=['boats', 'summary'], help='What to export.')
+    parser.add_argument('output', help='Output file path.')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None,
+                        help='Output format (defaults to the output file extension).')
+    parser.add_argument('--status', action='append', default=None, help='Only boats with this status; repeatable.')
+    parser.add_argument('--model', default=None, help='Only boats tracked with this model.')
+    parser.add_argument('--since', default=None, help='Start of the created_at range (YYYY-MM-DD[ HH:MM:SS] UTC).')
+    parser.add_argument('--until', default=None, help='End of the created_at range, exclusive.')
+    parser.add_argument('--day-from', default=None, help='Only boats launched on or after this day (YYYY-MM-DD).')
+    parser.add_argument('--day-to', default=None, help='Only boats launched on or before this day (YYYY-MM-DD).')
+    args = parser.parse_args()
+
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+    config = get_config(config_path)
+    ensure_directory(config['logs_dir'])
+    setup_logging(os.path.join(config['logs_dir'], 'reports.log'))
+    if (args.day_from or args.day_to) and not config.absolute_time:
+        parser.error("--day-from/--day-to select launch days, which are only recorded with absolute_time enabled.")
+    output_format = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+
+    db_manager = DatabaseManager(db_path=config['database_path'])
+    try:
+        db_manager.initialize_database()
+        reporter = BoatReporter(db_manager, batch_size=config.get('report_batch_size', 1000))
+        if args.report == 'boats':
+            rows = reporter.iter_boats(status=args.status, model=args.model, since=args.since, until=args.until,
+                                       day_from=args.day_from, day_to=args.day_to)
+            columns = BOAT_COLUMNS
+        else:
+            rows = reporter.daily_summary(since=args.since, until=args.until, model=args.model)
+            columns = SUMMARY_COLUMNS
+        export = export_parquet if output_format == 'parquet' else export_csv
+        export(rows, args.output, columns)
+    except Exception as e:
+        logging.error(f"An error occurred while exporting the {args.report} report: {e}")
+    finally:
+        db_manager.close()
+
+
+if __name__ == "__main__":
+    main()
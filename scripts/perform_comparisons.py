@@ -1,21 +1,44 @@
 # import sys
 import os
 import logging
+import argparse
 from boat_detection.comparison.comparator import Comparator
 from boat_detection.database.db_manager import DatabaseManager
-from boat_detection.utils.helpers import load_config, setup_logging
+from boat_detection.config.config import get_config
+from boat_detection.utils.helpers import setup_logging, ensure_directory
+from boat_detection.utils.resources import ThreadBudget, limit_threads
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Match, deduplicate and mark orphan boat tracks.")
+    parser.add_argument('--day-from', help="First launch day (YYYY-MM-DD) to compare; all tracks when omitted.")
+    parser.add_argument('--day-to', help="Last launch day (YYYY-MM-DD) to compare; defaults to --day-from.")
+    args = parser.parse_args()
+
     config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
-    config = load_config(config_path)
+    config = get_config(config_path)
+    ensure_directory(config['logs_dir'])
+    setup_logging(os.path.join(config['logs_dir'], 'comparisons.log'))
+    if (args.day_from or args.day_to) and not config.absolute_time:
+        parser.error("--day-from/--day-to select launch days, which are only recorded with absolute_time enabled.")
+
+    budget = ThreadBudget.from_config(config)
+    if budget is not None:
+        logging.info(f"CPU thread budget: {budget.describe()}.")
+        limit_threads(opencv_threads=budget.split['comparison'], cores=budget.cores_for('comparison'))
 
     db_manager = DatabaseManager(db_path=config['database_path'])
+    db_manager.initialize_database()
 
-    comparator = Comparator(db_manager=db_manager, results_dir=config['detection_images_dir'])
+    comparator = Comparator(db_manager=db_manager, results_dir=config['detection_images_dir'],
+                            image_cache_bytes=config.get('comparison_cache_mb', 256) * 1024 * 1024,
+                            decode_reduction=config.get('comparison_decode_reduction', 1),
+                            use_manifest=config.get('comparison_use_manifest', True),
+                            defer_moves=config.get('defer_image_moves', False),
+                            match_window=config.get('match_window', 86400))
 
     try:
-        comparator.perform_comparisons()
+        comparator.perform_comparisons(args.day_from, args.day_to)
     except Exception as e:
         logging.error(f"An error occurred during comparisons: {e}")
     finally:
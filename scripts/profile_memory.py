@@ -0,0 +1,51 @@
+import os
+import sys
+import argparse
+import logging
+from boat_detection.tracking.video_tracker import VideoTracker
+from boat_detection.tracking.memory_profile import MemoryBudgetExceeded
+from boat_detection.config.config import get_config
+from boat_detection.utils.helpers import setup_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Track videos with memory profiling and check its growth.')
+    parser.add_argument('video_files', nargs='+', help='Video file names inside videos_dir.')
+    parser.add_argument('--interval', type=int, default=None, help='Frames between memory samples.')
+    parser.add_argument('--budget', type=float, default=None, help='Allowed RSS growth in MB per hour of video.')
+    args = parser.parse_args()
+
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+    config = dict(get_config(config_path))
+    config['memory_profile_interval'] = args.interval or config.get('memory_profile_interval') or 1000
+    if args.budget is not None:
+        config['memory_budget_mb_per_hour'] = args.budget
+    setup_logging(os.path.join(config['logs_dir'], 'memory_profile.log'))
+
+    over_budget = []
+    tracker = VideoTracker(config)
+    try:
+        for video_file in args.video_files:
+            # Growth is measured over the whole run so far, so later videos show leaks that build up.
+            try:
+                tracker.process_video(video_file)
+            except MemoryBudgetExceeded:
+                over_budget.append(video_file)
+            report = tracker.last_memory_report
+            if report is None:
+                continue
+            print(f"{video_file}: RSS {report['rss_growth_mb_per_hour']:.1f} MB/h, "
+                  f"traced {report['traced_growth_mb_per_hour']:.1f} MB/h")
+    except Exception as e:
+        logging.error(f"An error occurred during memory profiling: {e}")
+        raise
+    finally:
+        tracker.close()
+
+    if over_budget:
+        print(f"Memory growth over budget for: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+import argparse
+import logging
+from boat_detection.rendering.renderer import VideoRenderer
+from boat_detection.config.config import get_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render an annotated clip from stored detections.')
+    parser.add_argument('video_file', help='Video file name inside videos_dir.')
+    parser.add_argument('--start', type=float, default=0.0, help='Start of the clip in seconds.')
+    parser.add_argument('--end', type=float, default=None, help='End of the clip in seconds.')
+    parser.add_argument('--output', default=None, help='Output path (defaults to output_dir/renders).')
+    args = parser.parse_args()
+
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+    config = get_config(config_path)
+
+    try:
+        renderer = VideoRenderer(config)
+        renderer.render(args.video_file, args.start, args.end, args.output)
+    except Exception as e:
+        logging.error(f"An error occurred while rendering {args.video_file}: {e}")
+
+
+if __name__ == "__main__":
+    main()
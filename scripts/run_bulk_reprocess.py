@@ -0,0 +1,20 @@
+import os
+import logging
+from boat_detection.tracking.bulk import run_bulk_reprocess
+from boat_detection.config.config import get_config
+
+
+def main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+    config = get_config(config_path)
+
+    try:
+        run_bulk_reprocess(config,
+                           num_shards=config.get('bulk_shards', os.cpu_count() or 1),
+                           max_workers=config.get('bulk_workers'))
+    except Exception as e:
+        logging.error(f"An error occurred during bulk reprocessing: {e}")
+
+
+if __name__ == "__main__":
+    main()
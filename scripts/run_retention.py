@@ -0,0 +1,21 @@
+import os
+import logging
+from boat_detection.maintenance.retention import run_retention
+from boat_detection.config.config import get_config
+from boat_detection.utils.helpers import setup_logging, ensure_directory
+
+
+def main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+    config = get_config(config_path)
+    ensure_directory(config['logs_dir'])
+    setup_logging(os.path.join(config['logs_dir'], 'retention.log'))
+
+    try:
+        run_retention(config)
+    except Exception as e:
+        logging.error(f"An error occurred during the retention run: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import os
+import signal
+import asyncio
+import logging
+from boat_detection.service.server import JobService
+from boat_detection.config.config import get_config
+from boat_detection.utils.helpers import setup_logging, ensure_directory
+
+
+async def serve(config: dict):
+    service = JobService(config)
+    await service.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_event_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await service.stop()
+
+
+def main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+    config = get_config(config_path)
+    ensure_directory(config['logs_dir'])
+    setup_logging(os.path.join(config['logs_dir'], 'service.log'))
+
+    try:
+        asyncio.run(serve(config))
+    except Exception as e:
+        logging.error(f"An error occurred in the job service: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,13 @@
 import os
 import logging
 from boat_detection.tracking.video_tracker import VideoTracker
-from boat_detection.utils.helpers import load_config, setup_logging
+from boat_detection.config.config import get_config
+from boat_detection.utils.helpers import setup_logging
 
 
 def main():
     config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
-    config = load_config(config_path)
+    config = get_config(config_path)
 
     tracker = VideoTracker(config)
 
@@ -0,0 +1,30 @@
+import os
+import argparse
+import logging
+from boat_detection.service.work_queue import open_work_queue
+from boat_detection.service.worker import QueueWorker
+from boat_detection.config.config import get_config
+from boat_detection.utils.helpers import setup_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Claim and run jobs from the shared work queue.')
+    parser.add_argument('--kinds', nargs='+', default=None, help='Only claim these job kinds (shard, comparison).')
+    parser.add_argument('--max-jobs', type=int, default=None, help='Stop after this many jobs.')
+    parser.add_argument('--exit-when-idle', action='store_true', help='Stop when no job is claimable.')
+    args = parser.parse_args()
+
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+    config = get_config(config_path)
+    setup_logging(os.path.join(config['logs_dir'], 'work_queue.log'))
+
+    try:
+        worker = QueueWorker(config, open_work_queue(config), kinds=args.kinds)
+        completed = worker.run(max_jobs=args.max_jobs, exit_when_idle=args.exit_when_idle)
+        logging.info(f"Worker {worker.worker_id} completed {completed} jobs.")
+    except Exception as e:
+        logging.error(f"An error occurred in the queue worker: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,9 +15,14 @@ setup(
         'numpy',
         'ultralytics',
         'scikit-image',
+        'scipy',
+        'networkx',
         'PyYAML',
         'python-dotenv'
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+    },
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License',
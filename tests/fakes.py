@@ -0,0 +1,23 @@
+from unittest.mock import MagicMock
+import numpy as np
+
+
+class FakeClock:
+    # Stands in for time.time; tests move it forward by setting now.
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def fake_capture(frames, fps=10.0, size=(64, 64), frame=None):
+    # A cv2.VideoCapture stand-in that yields frames copies of frame (black by default), then ends.
+    width, height = size
+    if frame is None:
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+    cap = MagicMock()
+    cap.isOpened.return_value = True
+    cap.get.side_effect = lambda prop: {5: fps, 3: width, 4: height, 7: frames}.get(prop, 0)
+    cap.read.side_effect = [(True, frame)] * frames + [(False, None)]
+    return cap
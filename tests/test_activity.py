@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import cv2
+import numpy as np
+
+from boat_detection.tracking.activity import active_segments, motion_energy, scan_activity, find_active_segments
+from boat_detection.tracking.video_tracker import VideoTracker
+
+
+def write_video(path, frames=60, active=(30, 40), size=(96, 64)):
+    # A still scene with a block crossing it during the active frames.
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 10.0, size)
+    for index in range(frames):
+        frame = np.full((size[1], size[0], 3), 80, dtype=np.uint8)
+        if active[0] <= index < active[1]:
+            x = (index - active[0]) * 8
+            frame[16:48, x:x + 24] = (255, 255, 255)
+        writer.write(frame)
+    writer.release()
+
+
+class TestActiveSegments(unittest.TestCase):
+    def test_padding_and_merging(self):
+        indices = np.arange(0, 200, 10)
+        energies = np.zeros(len(indices))
+        energies[[3, 5, 15]] = 0.2
+        segments = active_segments(indices, energies, threshold=0.1, padding_frames=5, merge_gap_frames=10,
+                                   total_frames=200)
+        self.assertEqual(segments, [(15, 56), (135, 156)])
+
+    def test_padding_is_clipped_to_the_video(self):
+        indices = np.arange(0, 50, 10)
+        energies = np.array([0.0, 0.5, 0.0, 0.0, 0.0])
+        self.assertEqual(active_segments(indices, energies, 0.1, 20, 0, 45), [(0, 31)])
+        self.assertEqual(active_segments(indices, energies, 0.1, 20, 0, 25), [(0, 25)])
+        self.assertEqual(active_segments(indices, np.zeros(5), 0.1, 20, 0, 45), [])
+
+    def test_motion_energy(self):
+        still = np.zeros((10, 10), dtype=np.uint8)
+        moved = still.copy()
+        moved[:5] = 200
+        self.assertEqual(motion_energy(None, still), 0.0)
+        self.assertEqual(motion_energy(still, still), 0.0)
+        self.assertAlmostEqual(motion_energy(still, moved), 0.5)
+
+
+class TestActivityScan(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(self.videos_dir)
+        self.video_path = os.path.join(self.videos_dir, 'clip.mp4')
+        write_video(self.video_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_scan_finds_the_active_part(self):
+        for seek in (False, True):
+            indices, energies = scan_activity(self.video_path, sample_fps=5, scan_width=48, seek=seek)
+            self.assertEqual(list(indices), list(range(0, 60, 2)))
+            active = indices[energies >= 0.01]
+            self.assertTrue(active.size)
+            self.assertGreaterEqual(active.min(), 30)
+            self.assertLessEqual(active.max(), 42)
+
+        segments = find_active_segments(self.video_path, 10.0, 60, sample_fps=5, scan_width=48, padding=0.5,
+                                        merge_gap=1.0)
+        self.assertEqual(len(segments), 1)
+        start, end = segments[0]
+        self.assertLessEqual(start, 30)
+        self.assertGreaterEqual(end, 40)
+        self.assertLess(end - start, 30)
+
+    def test_region_outside_the_motion_is_inactive(self):
+        segments = find_active_segments(self.video_path, 10.0, 60, sample_fps=5, scan_width=48,
+                                        region=(0.0, 0.8, 1.0, 1.0))
+        self.assertEqual(segments, [])
+
+    def test_tracker_only_runs_on_active_segments(self):
+        config = {
+            'videos_dir': self.videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': self.tmp_dir,
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'write_annotated_video': False,
+            'detection_log': False,
+            'activity_scan': True,
+            'activity_scan_fps': 5,
+            'activity_scan_width': 48,
+            'activity_padding': 0.5,
+            'activity_merge_gap': 1.0,
+        }
+        with patch('boat_detection.tracking.video_tracker.YOLO'):
+            tracker = VideoTracker(config)
+        try:
+            result = MagicMock()
+            result.boxes.id = None
+            tracker.model = MagicMock()
+            tracker.model.track.return_value = [result]
+            progress = []
+            tracker.progress_callback = lambda *args: progress.append(args)
+            tracker.process_video('clip.mp4')
+
+            segments = tracker.find_active_segments(self.video_path, 10.0, 60, None, (96, 64))
+            cap = cv2.VideoCapture(self.video_path)
+            numbered = list(tracker.numbered_frames(cap, self.video_path, (96, 64), 0, segments))
+            cap.release()
+        finally:
+            tracker.close()
+        expected = [number for start, end in segments for number in range(start + 1, end + 1)]
+        self.assertEqual([number for number, _ in numbered], expected)
+        self.assertEqual(tracker.model.track.call_count, len(expected))
+        self.assertLess(len(expected), 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import cv2
+import numpy as np
+
+from boat_detection.tracking.backends import (exported_model_path, build_calibration_set, prepare_model, box_iou,
+                                              compare_outputs, format_report)
+
+
+class TestModelBackends(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.models_dir = os.path.join(self.tmp_dir, 'models')
+        self.images_dir = os.path.join(self.tmp_dir, 'detection_images')
+        os.makedirs(self.models_dir)
+        self.weights = os.path.join(self.models_dir, 'boats.pt')
+        with open(self.weights, 'wb') as file:
+            file.write(b'weights')
+        for track_id in range(3):
+            track_dir = os.path.join(self.images_dir, f"track_id_{track_id}")
+            os.makedirs(track_dir)
+            for index in range(4):
+                cv2.imwrite(os.path.join(track_dir, f"frame_{index:04d}.jpg"), np.zeros((8, 8, 3), dtype=np.uint8))
+        self.config = {'models_dir': self.models_dir, 'detection_images_dir': self.images_dir, 'names': ['boat']}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_exported_model_paths(self):
+        self.assertEqual(exported_model_path('/e', '/m/boats.pt', 'onnx'), '/e/boats_fp32.onnx')
+        self.assertEqual(exported_model_path('/e', '/m/boats.pt', 'openvino', int8=True),
+                         '/e/boats_int8_openvino_model')
+        with self.assertRaises(ValueError):
+            exported_model_path('/e', '/m/boats.pt', 'tensorrt')
+
+    def test_calibration_set_is_sampled_and_described(self):
+        calibration_dir = os.path.join(self.tmp_dir, 'calibration')
+        data_path = build_calibration_set(self.images_dir, calibration_dir, ['boat'], max_images=5)
+        self.assertEqual(len(os.listdir(os.path.join(calibration_dir, 'images'))), 5)
+        with open(data_path) as file:
+            data = json.load(file)
+        self.assertEqual((data['val'], data['names']), ('images', {'0': 'boat'}))
+
+    def test_prepare_model_exports_once(self):
+        self.assertEqual(prepare_model(self.config, self.weights), self.weights)
+
+        def fake_export(**kwargs):
+            path = os.path.join(self.models_dir, 'boats.onnx')
+            with open(path, 'wb') as file:
+                file.write(b'onnx')
+            return path
+
+        with patch('ultralytics.YOLO') as mock_yolo:
+            mock_yolo.return_value.export.side_effect = fake_export
+            first = prepare_model(self.config, self.weights, 'onnx', int8=True)
+            second = prepare_model(self.config, self.weights, 'onnx', int8=True)
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.endswith('boats_int8.onnx') and os.path.exists(first))
+        self.assertEqual(mock_yolo.return_value.export.call_count, 1)
+        kwargs = mock_yolo.return_value.export.call_args.kwargs
+        self.assertTrue(kwargs['int8'] and kwargs['dynamic'])
+        self.assertTrue(kwargs['data'].endswith('calibration.yaml'))
+
+    def test_compare_outputs(self):
+        self.assertAlmostEqual(box_iou([[0, 0, 10, 10]], [[5, 0, 15, 10]])[0, 0], 1 / 3)
+        reference = [(np.array([[0, 0, 10, 10], [20, 20, 30, 30]]), np.array([1, 2])),
+                     (np.zeros((0, 4)), np.zeros(0))]
+        candidate = [(np.array([[21, 20, 31, 30], [0, 0, 10, 10]]), np.array([2, 5])),
+                     (np.array([[50, 50, 60, 60]]), np.array([7]))]
+        metrics = compare_outputs(reference, candidate)
+        self.assertEqual((metrics['recall'], metrics['precision']), (1.0, 2 / 3))
+        self.assertEqual((metrics['id_agreement'], metrics['frame_agreement']), (0.5, 0.5))
+        self.assertIn('| onnx |', format_report([dict(backend='onnx', ms_per_frame=1.0, speedup=2.0, **metrics)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
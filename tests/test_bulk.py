@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from boat_detection.database.db_manager import DatabaseManager, TRACK_ID_NAMESPACE
+from boat_detection.tracking.bulk import shard_videos, shard_config, merge_shards
+
+
+class TestBulkReprocessing(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.shards_dir = os.path.join(self.tmp_dir, 'shards')
+        self.config = {
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'detection_images'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _make_shard(self, shard_index, records):
+        config = shard_config(self.config, shard_index, self.shards_dir)
+        os.makedirs(os.path.dirname(config['database_path']), exist_ok=True)
+        db_manager = DatabaseManager(db_path=config['database_path'])
+        db_manager.initialize_database()
+        for track_id, status, launch_time in records:
+            db_manager.insert_boat_record(track_id, status, launch_time, 'model_A')
+            os.makedirs(os.path.join(config['detection_images_dir'], f"track_id_{track_id}"))
+        db_manager.update_boat_record(records[0][0], 'Match', 50.0, 10.0, match_id=records[-1][0])
+        db_manager.close()
+
+    def test_shard_videos_balances_sizes(self):
+        videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(videos_dir)
+        for name, size in [('a.mp4', 100), ('b.mp4', 60), ('c.mp4', 50), ('d.mp4', 10)]:
+            with open(os.path.join(videos_dir, name), 'wb') as file:
+                file.write(b'0' * size)
+        shards = shard_videos(['a.mp4', 'b.mp4', 'c.mp4', 'd.mp4'], 2, videos_dir)
+        self.assertEqual(shards, [['a.mp4', 'd.mp4'], ['b.mp4', 'c.mp4']])
+
+    def test_shard_videos_more_shards_than_files(self):
+        self.assertEqual(shard_videos(['a.mp4'], 4), [['a.mp4']])
+        with self.assertRaises(ValueError):
+            shard_videos(['a.mp4'], 0)
+
+    def test_merge_namespaces_and_is_idempotent(self):
+        self._make_shard(0, [(1, 'launched', 10.0), (2, 'launched', 20.0)])
+        self._make_shard(1, [(1, 'launched', 30.0)])
+
+        self.assertEqual(merge_shards(self.config, self.shards_dir), 3)
+        self.assertEqual(merge_shards(self.config, self.shards_dir), 0)
+
+        db_manager = DatabaseManager(db_path=self.config['database_path'])
+        records = {r[1]: r for r in db_manager.fetch_all_boat_records()}
+        db_manager.close()
+
+        self.assertEqual(sorted(records), [TRACK_ID_NAMESPACE + 1, TRACK_ID_NAMESPACE + 2, 2 * TRACK_ID_NAMESPACE + 1])
+        self.assertEqual(records[TRACK_ID_NAMESPACE + 1][6], TRACK_ID_NAMESPACE + 2)
+        self.assertEqual(records[2 * TRACK_ID_NAMESPACE + 1][6], 2 * TRACK_ID_NAMESPACE + 1)
+        self.assertTrue(os.path.isdir(os.path.join(self.config['detection_images_dir'],
+                                                   f"track_id_{2 * TRACK_ID_NAMESPACE + 1}")))
+
+    def test_rerun_gets_a_new_namespace(self):
+        self._make_shard(0, [(1, 'launched', 10.0)])
+        self.assertEqual(merge_shards(self.config, self.shards_dir, run_id='run_a'), 1)
+        shutil.rmtree(os.path.join(self.config['detection_images_dir'], f"track_id_{TRACK_ID_NAMESPACE + 1}"))
+        self.assertEqual(merge_shards(self.config, self.shards_dir, run_id='run_b'), 1)
+
+        db_manager = DatabaseManager(db_path=self.config['database_path'])
+        track_ids = sorted(r[1] for r in db_manager.fetch_all_boat_records())
+        shard_path = shard_config(self.config, 0, self.shards_dir)['database_path']
+        merged = db_manager.get_merged_shard(shard_path, 'run_b')
+        db_manager.close()
+        self.assertEqual(track_ids, [TRACK_ID_NAMESPACE + 1, 2 * TRACK_ID_NAMESPACE + 1])
+        self.assertEqual((merged['track_id_offset'], merged['record_count']), (2 * TRACK_ID_NAMESPACE, 1))
+
+    def test_namespace_clears_existing_track_ids(self):
+        db_manager = DatabaseManager(db_path=self.config['database_path'])
+        db_manager.initialize_database()
+        db_manager.insert_boat_record(3 * TRACK_ID_NAMESPACE + 5, 'launched', 1.0, 'model_A')
+        self._make_shard(0, [(1, 'launched', 10.0)])
+        merge_shards(self.config, self.shards_dir, db_manager)
+        track_ids = sorted(r[1] for r in db_manager.fetch_all_boat_records())
+        db_manager.close()
+        self.assertEqual(track_ids, [3 * TRACK_ID_NAMESPACE + 5, 4 * TRACK_ID_NAMESPACE + 1])
+
+    def test_changed_shard_under_the_same_run_fails(self):
+        self._make_shard(0, [(1, 'launched', 10.0)])
+        merge_shards(self.config, self.shards_dir, run_id='run_a')
+        shard_path = shard_config(self.config, 0, self.shards_dir)['database_path']
+        shard_db = DatabaseManager(db_path=shard_path)
+        shard_db.insert_boat_record(2, 'launched', 20.0, 'model_B')
+        shard_db.close()
+        with self.assertRaises(ValueError):
+            merge_shards(self.config, self.shards_dir, run_id='run_a')
+
+    def test_merge_rewrites_manifest_paths(self):
+        config = shard_config(self.config, 0, self.shards_dir)
+        self._make_shard(0, [(4, 'launched', 10.0)])
+        db_manager = DatabaseManager(db_path=config['database_path'])
+        db_manager.add_detection_image(4, 12, os.path.join(config['detection_images_dir'], 'track_id_4',
+                                                           'frame_000012.jpg'), 3.5)
+        db_manager.close()
+
+        merge_shards(self.config, self.shards_dir)
+        merge_shards(self.config, self.shards_dir)
+
+        db_manager = DatabaseManager(db_path=self.config['database_path'])
+        rows = db_manager.get_detection_images(TRACK_ID_NAMESPACE + 4)
+        db_manager.close()
+        expected = os.path.join(self.config['detection_images_dir'], f"track_id_{TRACK_ID_NAMESPACE + 4}",
+                                'frame_000012.jpg')
+        self.assertEqual([(row[1], row[2], row[3]) for row in rows], [(expected, 12, 3.5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
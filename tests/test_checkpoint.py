@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import numpy as np
+
+from boat_detection.tracking.checkpoint import CheckpointManager, capture_tracker_state, restore_tracker_state
+from boat_detection.tracking.track_store import TrackHistoryStore
+from boat_detection.tracking.video_tracker import VideoTracker
+from tests.fakes import fake_capture
+
+
+class TestCheckpointManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.checkpoints = CheckpointManager(os.path.join(self.tmp_dir, 'checkpoints'), interval=50)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_is_due(self):
+        self.assertTrue(self.checkpoints.is_due(100))
+        self.assertFalse(self.checkpoints.is_due(101))
+        self.assertFalse(CheckpointManager(self.tmp_dir, interval=0).is_due(100))
+
+    def test_save_load_clear(self):
+        store = TrackHistoryStore(window=3)
+        store.update([4], np.array([[1.0, 2.0]]), 10)
+        self.checkpoints.save('abc', {'frame_number': 10, 'track_history': store, 'boat_records': {4: 'launched'}})
+
+        state = self.checkpoints.load('abc')
+        self.assertEqual(state['frame_number'], 10)
+        self.assertEqual(state['boat_records'], {4: 'launched'})
+        np.testing.assert_array_equal(state['track_history'].history(4), [[1.0, 2.0]])
+
+        self.checkpoints.clear('abc')
+        self.assertIsNone(self.checkpoints.load('abc'))
+
+    def test_load_corrupt_checkpoint(self):
+        with open(self.checkpoints.path_for('bad'), 'wb') as file:
+            file.write(b'not a pickle')
+        self.assertIsNone(self.checkpoints.load('bad'))
+
+    def test_tracker_state_round_trip(self):
+        model = MagicMock()
+        model.predictor.trackers = [{'frame_id': 7}]
+        tracker_state = capture_tracker_state(model)
+        self.assertIsNotNone(tracker_state)
+
+        new_model = MagicMock()
+        new_model.predictor = None
+        self.assertTrue(restore_tracker_state(new_model, tracker_state))
+        callback = new_model.add_callback.call_args[0][1]
+        predictor = MagicMock()
+        callback(predictor)
+        self.assertEqual(predictor.trackers, [{'frame_id': 7}])
+
+    def test_capture_without_predictor(self):
+        self.assertIsNone(capture_tracker_state(MagicMock()))
+        self.assertFalse(restore_tracker_state(MagicMock(), None))
+
+
+class TestVideoTrackerResume(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(self.videos_dir)
+        with open(os.path.join(self.videos_dir, 'clip.mp4'), 'wb') as file:
+            file.write(b'video bytes')
+
+        self.config = {
+            'videos_dir': self.videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': os.path.join(self.tmp_dir, 'models'),
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'checkpoint_interval': 2,
+            'ingest_stable_seconds': 0,
+        }
+        with patch('boat_detection.tracking.video_tracker.YOLO'):
+            self.tracker = VideoTracker(self.config)
+        self.tracker.model = MagicMock()
+        self.tracker.model.track.return_value = []
+
+    def tearDown(self):
+        self.tracker.close()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoWriter')
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_completed_video_is_skipped(self, mock_capture, mock_writer):
+        mock_capture.return_value = fake_capture(3)
+        self.tracker.track_videos()
+        self.assertEqual(self.tracker.model.track.call_count, 3)
+
+        self.tracker.track_videos()
+        self.assertEqual(mock_capture.call_count, 1)
+        self.assertEqual(os.listdir(self.tracker.checkpoints.checkpoints_dir), [])
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoWriter')
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_resume_from_checkpoint(self, mock_capture, mock_writer):
+        file_hash = 'c3b0ef3bdbd9a0a2a6bd4d7d0ef2e1ebd5cfb3b4bb2a0d8b8d0d8b1a6e3c1b5e'
+        with patch('boat_detection.tracking.video_tracker.compute_file_hash', return_value=file_hash):
+            self.tracker.checkpoints.save(file_hash, {
+                'frame_number': 40,
+                'track_history': TrackHistoryStore(window=5),
+                'valid_tracks': set(),
+                'boat_records': {3: 'launched'},
+                'tracker_state': None,
+            })
+            cap = fake_capture(2)
+            mock_capture.return_value = cap
+            self.tracker.track_videos(['clip.mp4'])
+
+        cap.set.assert_called_once_with(1, 40)
+        output_path = mock_writer.call_args[0][0]
+        self.assertTrue(output_path.endswith('output_clip_from_000040.mp4'))
+        self.assertTrue(self.tracker.db_manager.is_video_processed(file_hash, 'model.pt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch, MagicMock
+import cv2
+import numpy as np
+
+from boat_detection.comparison.comparator import Comparator
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.database.reporting import BoatReporter
+from boat_detection.utils.clip_time import parse_filename_time, clip_start_time, local_day
+from boat_detection.tracking.video_tracker import VideoTracker
+
+JUNE_15 = datetime(2024, 6, 15, 9, 30, tzinfo=timezone.utc).timestamp()
+
+
+class TestClipTime(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parse_filename_time(self):
+        self.assertEqual(parse_filename_time('slipway_20240615_093000.mp4', timezone='UTC'), JUNE_15)
+        self.assertEqual(parse_filename_time('cam2 2024-06-15 09-30.m4v', timezone='UTC'), JUNE_15)
+        self.assertEqual(parse_filename_time('slipway_20240615_093000.mp4', timezone='Europe/London'),
+                         JUNE_15 - 3600)
+        self.assertIsNone(parse_filename_time('clip.mp4'))
+        self.assertIsNone(parse_filename_time('clip_20241345_093000.mp4'))
+
+    def test_clip_start_falls_back_to_mtime(self):
+        path = os.path.join(self.tmp_dir, 'clip.mp4')
+        with open(path, 'wb') as file:
+            file.write(b'video bytes')
+        os.utime(path, (JUNE_15 + 600, JUNE_15 + 600))
+        self.assertEqual(clip_start_time(path, 600.0, ['filename', 'mtime']), (JUNE_15, 'mtime'))
+        self.assertEqual(clip_start_time(path, 600.0, ['filename']), (None, None))
+        with self.assertRaises(ValueError):
+            clip_start_time(path, 600.0, ['exif'])
+
+    def test_local_day(self):
+        late = datetime(2024, 6, 15, 23, 30, tzinfo=timezone.utc).timestamp()
+        self.assertEqual(local_day(late, 'UTC'), '2024-06-15')
+        self.assertEqual(local_day(late, 'Europe/London'), '2024-06-16')
+
+
+class TestDayPartitions(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.images_dir = os.path.join(self.tmp_dir, 'detection_images')
+        self.db_manager = DatabaseManager(db_path=os.path.join(self.tmp_dir, 'boats.db'))
+        self.db_manager.initialize_database()
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _launch(self, track_id, launch_time, seed=0):
+        track_dir = os.path.join(self.images_dir, f"track_id_{track_id}")
+        os.makedirs(track_dir, exist_ok=True)
+        path = os.path.join(track_dir, 'frame_000001.jpg')
+        cv2.imwrite(path, np.random.default_rng(seed).integers(0, 255, (120, 160, 3), dtype=np.uint8))
+        self.db_manager.add_detection_image(track_id, 1, path, 1.0)
+        self.db_manager.insert_boat_record(track_id, 'Launched', launch_time, 'model',
+                                           launch_day=local_day(launch_time, 'UTC'))
+
+    def _statuses(self):
+        self.db_manager.cursor.execute('SELECT track_id, status FROM boats ORDER BY track_id')
+        return dict(self.db_manager.cursor.fetchall())
+
+    def test_launch_day_partitions_summary_and_reports(self):
+        self._launch(1, JUNE_15)
+        self._launch(2, JUNE_15 + 86400)
+        self.db_manager.insert_boat_record(3, 'Launched', 10.0, 'model')
+
+        self.assertEqual(self.db_manager.get_track_ids_by_day('2024-06-15', '2024-06-15'), [1])
+        self.assertEqual(self.db_manager.get_track_ids_by_day('2024-06-15', '2024-06-16'), [1, 2])
+        reporter = BoatReporter(self.db_manager)
+        self.assertEqual([row['track_id'] for row in reporter.iter_boats(day_from='2024-06-16')], [2])
+        days = [row['day'] for row in reporter.daily_summary()]
+        self.assertIn('2024-06-15', days)
+        self.assertIn('2024-06-16', days)
+
+    def test_comparisons_only_touch_the_window(self):
+        self._launch(1, JUNE_15 - 3 * 86400)
+        self._launch(2, JUNE_15)
+        self._launch(3, JUNE_15 + 86400 + 7200)
+        self._launch(4, JUNE_15 + 5 * 86400)
+
+        comparator = Comparator(self.db_manager, self.images_dir, orb_threshold=0.0, ssim_threshold=0.0,
+                                match_window=2 * 86400)
+        comparator.perform_comparisons('2024-06-15')
+
+        statuses = self._statuses()
+        self.assertEqual(statuses[2], 'Match')
+        self.db_manager.cursor.execute('SELECT matchID FROM boats WHERE track_id = 2')
+        self.assertEqual(self.db_manager.cursor.fetchone()[0], 3)
+        self.assertEqual((statuses[1], statuses[4]), ('Launched', 'Launched'))
+
+    def test_neighbouring_days_are_not_marked_orphan(self):
+        self._launch(1, JUNE_15)
+        self._launch(2, JUNE_15 + 86400, seed=1)
+
+        comparator = Comparator(self.db_manager, self.images_dir, orb_threshold=0.99, ssim_threshold=0.99)
+        comparator.perform_comparisons('2024-06-15', '2024-06-15')
+
+        self.assertEqual(self._statuses(), {1: 'Orphan', 2: 'Launched'})
+
+    def test_empty_day_window_warns(self):
+        # Rows tracked without absolute_time have no launch day, so a day range matches nothing.
+        self.db_manager.insert_boat_record(1, 'Launched', 10.0, 'model')
+
+        comparator = Comparator(self.db_manager, self.images_dir)
+        with self.assertLogs(level='WARNING') as logs:
+            comparator.perform_comparisons('2024-06-15')
+
+        self.assertTrue(any('absolute_time' in line for line in logs.output))
+        self.assertEqual(self._statuses(), {1: 'Launched'})
+
+
+class TestVideoTrackerAbsoluteTime(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(videos_dir)
+        self.video_path = os.path.join(videos_dir, 'slipway_20240615_093000.mp4')
+        with open(self.video_path, 'wb') as file:
+            file.write(b'video bytes')
+        config = {
+            'videos_dir': videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': self.tmp_dir,
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'absolute_time': True,
+            'clip_timezone': 'UTC',
+        }
+        with patch('boat_detection.tracking.video_tracker.YOLO'):
+            self.tracker = VideoTracker(config)
+
+    def tearDown(self):
+        self.tracker.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_event_times_are_absolute(self):
+        clip_start = self.tracker.clip_start(self.video_path, 60.0)
+        self.assertEqual(clip_start, JUNE_15)
+
+        cap = MagicMock()
+        cap.get.return_value = 12500.0
+        self.assertEqual(self.tracker.event_time(cap, clip_start, 12.0), JUNE_15 + 12.5)
+        cap.get.return_value = 0.0
+        self.assertEqual(self.tracker.event_time(cap, clip_start, 12.0), JUNE_15 + 12.0)
+
+        self.tracker.save_boat_to_db(7, 'launched', JUNE_15 + 12.5, 'model.pt')
+        self.assertEqual(self.tracker.db_manager.get_track_ids_by_day('2024-06-15', '2024-06-15'), [7])
+
+    def test_relative_time_without_absolute_time(self):
+        self.tracker.absolute_time = False
+        self.assertEqual(self.tracker.clip_start(self.video_path, 60.0), 0.0)
+        self.assertEqual(self.tracker.event_time(MagicMock(), 0.0, 12.0), 12.0)
+        self.tracker.save_boat_to_db(7, 'launched', 12.0, 'model.pt')
+        self.assertEqual(self.tracker.db_manager.get_track_ids_by_day('1970-01-01', '9999-12-31'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
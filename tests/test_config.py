@@ -0,0 +1,181 @@
+import os
+import shutil
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import numpy as np
+import yaml
+
+from boat_detection.config.config import Config, get_config, validate_config
+from boat_detection.tracking.video_tracker import VideoTracker
+from tests.fakes import fake_capture
+
+
+class TestConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.tmp_dir, 'config.yaml')
+        self._write({'videos_dir': 'videos', 'movement_threshold': 100, 'model_path': 'a.pt'})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, values):
+        with open(self.config_path, 'w') as file:
+            yaml.safe_dump(values, file)
+        # Make sure every rewrite looks like a change, however coarse the filesystem clock is.
+        stat = os.stat(self.config_path)
+        self._mtime = getattr(self, '_mtime', stat.st_mtime_ns) + 1_000_000_000
+        os.utime(self.config_path, ns=(self._mtime, self._mtime))
+
+    def test_mapping_access_and_defaults(self):
+        config = Config(self.config_path)
+        self.assertEqual(config['videos_dir'], 'videos')
+        self.assertEqual(config.get('movement_threshold'), 100)
+        self.assertEqual(config['detection_confidence'], 0.5)
+        self.assertEqual(config.get('detection_confidence'), 0.5)
+        self.assertEqual(config.get('detection_confidence', 0.9), 0.5)
+        self.assertIn('detection_confidence', config)
+        self.assertFalse(config['detection_log'])
+        with self.assertRaises(KeyError):
+            config['no_such_key']
+        self.assertIsNone(config.get('no_such_key'))
+        self.assertNotIn('no_such_key', config)
+        self.assertEqual(pickle.loads(pickle.dumps(config))['videos_dir'], 'videos')
+
+    def test_environment_fills_missing_paths(self):
+        with patch.dict(os.environ, {'VIDEOS_DIR': 'env_videos', 'LOGS_DIR': 'env_logs'}):
+            config = Config(self.config_path)
+        self.assertEqual(config['videos_dir'], 'videos')
+        self.assertEqual(config['logs_dir'], 'env_logs')
+
+    def test_invalid_values_are_rejected(self):
+        self.assertEqual(validate_config({'frame_stride': 2, 'detection_confidence': 0.4}), [])
+        self.assertEqual(len(validate_config({'frame_stride': 0, 'detection_confidence': 2,
+                                              'valid_detection_count': True})), 3)
+        self._write({'movement_threshold': -1})
+        with self.assertRaises(ValueError):
+            Config(self.config_path)
+
+    def test_reload_applies_runtime_keys_only(self):
+        config = Config(self.config_path)
+        self.assertEqual(config.reload_if_changed(), set())
+
+        self._write({'videos_dir': 'elsewhere', 'movement_threshold': 40, 'model_path': 'a.pt',
+                     'cameras': {'cam': {'roi': [0, 0, 10, 10]}}})
+        self.assertEqual(config.reload_if_changed(), {'movement_threshold', 'cameras'})
+        self.assertEqual(config['movement_threshold'], 40)
+        self.assertEqual(config['videos_dir'], 'videos')
+        self.assertEqual(config.reload_if_changed(), set())
+
+        self._write({'videos_dir': 'videos', 'model_path': 'a.pt'})
+        self.assertEqual(config.reload_if_changed(), {'movement_threshold', 'cameras'})
+        self.assertEqual(config['movement_threshold'], 100)
+
+    def test_broken_edit_keeps_current_values(self):
+        config = Config(self.config_path)
+        self._write({'movement_threshold': 'far'})
+        self.assertEqual(config.reload_if_changed(), set())
+        with open(self.config_path, 'w') as file:
+            file.write('movement_threshold: [1')
+        os.utime(self.config_path, ns=(self._mtime + 10 ** 9, self._mtime + 10 ** 9))
+        self.assertEqual(config.reload_if_changed(), set())
+        self.assertEqual(config['movement_threshold'], 100)
+
+    def test_get_config_is_cached_per_file(self):
+        config = get_config(self.config_path)
+        self.assertIs(get_config(os.path.join(self.tmp_dir, '.', 'config.yaml')), config)
+
+
+class TestVideoTrackerHotReload(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(videos_dir)
+        with open(os.path.join(videos_dir, 'clip.mp4'), 'wb') as file:
+            file.write(b'video bytes')
+        self.values = {
+            'videos_dir': videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': self.tmp_dir,
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'movement_threshold': 10 ** 6,
+            'valid_detection_count': 2,
+            'write_annotated_video': False,
+            'detection_log': False,
+        }
+        self.config_path = os.path.join(self.tmp_dir, 'config.yaml')
+        self._write(self.values)
+        with patch('boat_detection.tracking.video_tracker.YOLO') as self.mock_yolo:
+            self.tracker = VideoTracker(Config(self.config_path))
+
+        self.position = [20.0]
+        result = MagicMock()
+        result.boxes.xywh.cpu.return_value.numpy.side_effect = lambda: np.array([[self.position[0], 20.0, 8, 8]])
+        result.boxes.id.int.return_value.cpu.return_value.numpy.return_value = np.array([3])
+        result.boxes.conf.cpu.return_value.numpy.return_value = np.array([0.9])
+        self.tracker.model = MagicMock()
+
+        def track(*args, **kwargs):
+            self.position[0] += 1
+            return [result]
+        self.tracker.model.track.side_effect = track
+
+    def tearDown(self):
+        self.tracker.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, values, bump=0):
+        with open(self.config_path, 'w') as file:
+            yaml.safe_dump(values, file)
+        stat = os.stat(self.config_path)
+        os.utime(self.config_path, ns=(stat.st_mtime_ns + bump, stat.st_mtime_ns + bump))
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_threshold_edit_applies_mid_video(self, mock_capture):
+        mock_capture.return_value = fake_capture(150)
+
+        def edit_config(video_file, frame_number, total_frames):
+            self._write({**self.values, 'movement_threshold': 0, 'model_path': 'other.pt'}, bump=10 ** 9)
+        self.tracker.progress_callback = edit_config
+
+        with patch.object(self.tracker, 'save_boat_to_db') as mock_save:
+            self.tracker.process_video('clip.mp4')
+
+        self.assertEqual(self.mock_yolo.call_count, 1)
+        self.assertEqual(self.tracker.movement_threshold, 0)
+        self.assertEqual(self.tracker.model_path, 'model.pt')
+        mock_save.assert_called_once_with(3, 'launched', 10.1, 'model.pt')
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_detection_count_edit_resizes_the_movement_window(self, mock_capture):
+        # One pixel a frame never clears 40 over two detections, but does over the 50 set mid-video.
+        self._write({**self.values, 'movement_threshold': 40}, bump=10 ** 9)
+        mock_capture.return_value = fake_capture(150)
+
+        def edit_config(video_file, frame_number, total_frames):
+            self._write({**self.values, 'movement_threshold': 40, 'valid_detection_count': 50}, bump=2 * 10 ** 9)
+        self.tracker.progress_callback = edit_config
+
+        with patch.object(self.tracker, 'save_boat_to_db') as mock_save:
+            self.tracker.process_video('clip.mp4')
+
+        mock_save.assert_called_once()
+        self.assertAlmostEqual(mock_save.call_args[0][2], 14.8)
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_frame_stride_skips_inference(self, mock_capture):
+        self._write({**self.values, 'frame_stride': 3}, bump=10 ** 9)
+        mock_capture.return_value = fake_capture(30)
+        self.tracker.process_video('clip.mp4')
+        self.assertEqual(self.tracker.frame_stride, 3)
+        self.assertEqual(self.tracker.model.track.call_count, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,6 +22,12 @@ class TestDatabaseManager(unittest.TestCase):
         self.assertEqual(records[0][1], 1)
         self.assertEqual(records[1][1], 2)
 
+    def test_processed_video_ledger(self):
+        self.assertFalse(self.db_manager.is_video_processed('abc123', 'model_A'))
+        self.db_manager.mark_video_processed('abc123', 'model_A', 'clip.mp4', 500)
+        self.assertTrue(self.db_manager.is_video_processed('abc123', 'model_A'))
+        self.assertFalse(self.db_manager.is_video_processed('abc123', 'model_B'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import numpy as np
+
+from boat_detection.tracking.detection_cache import DetectionCache, detection_cache_key, DETECTION_DTYPE
+from boat_detection.tracking.video_tracker import VideoTracker
+from tests.fakes import fake_capture
+
+
+class TestDetectionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = DetectionCache(os.path.join(self.tmp_dir, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_cache_key(self):
+        key = detection_cache_key('video', 'model', {'conf': 0.5, 'roi': None})
+        self.assertEqual(key, detection_cache_key('video', 'model', {'roi': None, 'conf': 0.5}))
+        self.assertNotEqual(key, detection_cache_key('video', 'model', {'conf': 0.4, 'roi': None}))
+        self.assertNotEqual(key, detection_cache_key('video', 'model2', {'conf': 0.5, 'roi': None}))
+
+    def test_record_and_replay(self):
+        recorder = self.cache.recorder('key', {'conf': 0.5})
+        recorder.add(1, np.array([[10, 20, 5, 5], [30, 40, 6, 6]]), np.array([1, 2]), np.array([0.9, 0.8]))
+        recorder.add(2, np.zeros((0, 4)), np.zeros(0), np.zeros(0))
+        recorder.add(3, np.array([[11, 21, 5, 5]]), np.array([1]), np.array([0.7]))
+        recorder.finalize(frame_count=3)
+
+        cached = self.cache.load('key')
+        self.assertEqual(len(cached), 3)
+        self.assertEqual(cached.records.dtype, DETECTION_DTYPE)
+        self.assertEqual(cached.metadata, {'conf': 0.5, 'frame_count': 3})
+
+        boxes, track_ids, confidences = cached.frame(1)
+        np.testing.assert_array_equal(boxes, [[10, 20, 5, 5], [30, 40, 6, 6]])
+        np.testing.assert_array_equal(track_ids, [1, 2])
+        np.testing.assert_allclose(confidences, [0.9, 0.8])
+        self.assertEqual(len(cached.frame(2)[1]), 0)
+        np.testing.assert_array_equal(cached.frame(3)[1], [1])
+
+    def test_missing_entry(self):
+        self.assertIsNone(self.cache.load('missing'))
+
+
+class TestVideoTrackerDetectionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        videos_dir = os.path.join(self.tmp_dir, 'videos')
+        models_dir = os.path.join(self.tmp_dir, 'models')
+        os.makedirs(videos_dir)
+        os.makedirs(models_dir)
+        with open(os.path.join(videos_dir, 'clip.mp4'), 'wb') as file:
+            file.write(b'video bytes')
+        with open(os.path.join(models_dir, 'model.pt'), 'wb') as file:
+            file.write(b'weights')
+
+        self.config = {
+            'videos_dir': videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': models_dir,
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'detection_cache': True,
+            'ingest_stable_seconds': 0,
+        }
+        with patch('boat_detection.tracking.video_tracker.YOLO'):
+            self.tracker = VideoTracker(self.config)
+
+        result = MagicMock()
+        result.boxes.xywh.cpu.return_value.numpy.return_value = np.array([[20.0, 20.0, 8.0, 8.0]])
+        result.boxes.id.int.return_value.cpu.return_value.numpy.return_value = np.array([3])
+        result.boxes.conf.cpu.return_value.numpy.return_value = np.array([0.9])
+        self.tracker.model = MagicMock()
+        self.tracker.model.track.return_value = [result]
+
+    def tearDown(self):
+        self.tracker.close()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoWriter')
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_second_run_replays_cache(self, mock_capture, mock_writer):
+        mock_capture.return_value = fake_capture(4)
+        self.tracker.track_videos()
+        self.assertEqual(self.tracker.model.track.call_count, 4)
+
+        mock_capture.return_value = fake_capture(4)
+        with patch.object(self.tracker, 'save_boat_to_db') as mock_save:
+            self.tracker.movement_threshold = 0
+            self.tracker.valid_detection_count = 2
+            self.tracker.track_videos(['clip.mp4'])
+
+        self.assertEqual(self.tracker.model.track.call_count, 4)
+        mock_save.assert_called_once_with(3, 'launched', 0.2, 'model.pt')
+
+
+if __name__ == '__main__':
+    unittest.main()
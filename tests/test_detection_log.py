@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from boat_detection.tracking.detection_log import DetectionLogWriter, DetectionLogReader, column_path
+
+
+class TestDetectionLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_dir = os.path.join(self.tmp_dir, 'clip')
+        self.metadata = {'video_file': 'clip.mp4', 'fps': 25.0, 'frame_size': [640, 480]}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, frames, resume_from_frame=None):
+        writer = DetectionLogWriter(self.log_dir, self.metadata, resume_from_frame=resume_from_frame)
+        for frame_number in frames:
+            writer.append(frame_number, np.array([[frame_number, 1, 2, 3], [frame_number, 4, 5, 6]]),
+                          np.array([1, 2]), np.array([0.5, 0.6]))
+        writer.close()
+
+    def test_round_trip(self):
+        self._write([1, 2, 5])
+        reader = DetectionLogReader(self.log_dir)
+        self.assertEqual(len(reader), 6)
+        self.assertEqual(reader.metadata['fps'], 25.0)
+        self.assertIsInstance(reader.frames, np.memmap)
+
+        boxes, track_ids, confidences = reader.frame(5)
+        np.testing.assert_array_equal(boxes, [[5, 1, 2, 3], [5, 4, 5, 6]])
+        np.testing.assert_array_equal(track_ids, [1, 2])
+        np.testing.assert_allclose(confidences, [0.5, 0.6])
+        self.assertEqual(len(reader.frame(3)[1]), 0)
+        self.assertEqual(reader.row_range(2, 6), (2, 6))
+
+        frames, boxes = reader.track(2)
+        np.testing.assert_array_equal(frames, [1, 2, 5])
+
+    def test_resume_truncates_later_frames(self):
+        self._write([1, 2, 3, 4])
+        self._write([3, 4, 5], resume_from_frame=2)
+        reader = DetectionLogReader(self.log_dir)
+        np.testing.assert_array_equal(reader.frames, [1, 1, 2, 2, 3, 3, 4, 4, 5, 5])
+
+    def test_fresh_run_overwrites(self):
+        self._write([1, 2, 3])
+        self._write([7])
+        np.testing.assert_array_equal(DetectionLogReader(self.log_dir).frames, [7, 7])
+
+    def test_torn_write_ignored(self):
+        self._write([1, 2])
+        with open(column_path(self.log_dir, 'frame'), 'ab') as file:
+            file.write(np.array([3], dtype='<i4').tobytes())
+        self.assertEqual(len(DetectionLogReader(self.log_dir)), 4)
+
+    def test_empty_log(self):
+        self._write([])
+        reader = DetectionLogReader(self.log_dir)
+        self.assertEqual(len(reader), 0)
+        self.assertEqual(reader.boxes.shape, (0, 4))
+        self.assertEqual(len(reader.frame(1)[0]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+import cv2
+import numpy as np
+
+from boat_detection.tracking.frame_ring import FrameRing, ring_frames
+from boat_detection.tracking.video_tracker import VideoTracker
+
+
+def write_video(path, frames=12, size=(80, 48)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 10.0, size)
+    for index in range(frames):
+        frame = np.full((size[1], size[0], 3), 0, dtype=np.uint8)
+        frame[:, index * 5:index * 5 + 10] = (0, 0, 255)
+        writer.write(frame)
+    writer.release()
+
+
+class TestFrameRing(unittest.TestCase):
+    def setUp(self):
+        self.ring = FrameRing(3, (4, 6, 3))
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_frames_arrive_in_order_and_slots_are_reused(self):
+        def produce():
+            for sequence in range(10):
+                self.ring.write_slot(sequence, timeout=5)[:] = sequence
+                self.ring.publish(sequence)
+            self.ring.finish(10)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        seen = []
+        sequence = 0
+        while True:
+            frame = self.ring.read(sequence, timeout=5)
+            if frame is None:
+                break
+            seen.append(int(frame[0, 0, 0]))
+            self.ring.release(sequence)
+            sequence += 1
+        producer.join()
+        self.assertEqual(seen, list(range(10)))
+
+    def test_producer_waits_for_release(self):
+        for sequence in range(3):
+            self.ring.write_slot(sequence, timeout=1)
+            self.ring.publish(sequence)
+        with self.assertRaises(TimeoutError):
+            self.ring.write_slot(3, timeout=0.01)
+        self.ring.read(0, timeout=1)
+        self.ring.release(0)
+        self.ring.write_slot(3, timeout=0.01)
+
+    def test_attach_shares_the_buffer(self):
+        slots, frame_shape, name = self.ring.spec
+        other = FrameRing(slots, frame_shape, name=name)
+        try:
+            other.write_slot(0)[:] = 7
+            other.publish(0)
+            other.finish(1)
+            np.testing.assert_array_equal(self.ring.read(0, timeout=1), np.full((4, 6, 3), 7))
+            self.assertIsNone(self.ring.read(1, timeout=1))
+        finally:
+            other.close()
+
+    def test_failed_producer_is_reported(self):
+        self.ring.fail()
+        with self.assertRaises(RuntimeError):
+            self.ring.read(0, timeout=1)
+
+
+class TestRingFrames(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmp_dir, 'clip.mp4')
+        write_video(self.video_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _local_frames(self, start_frame=0):
+        cap = cv2.VideoCapture(self.video_path)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        frames = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.resize(frame, (96, 64)))
+        cap.release()
+        return frames
+
+    def test_matches_in_process_decode(self):
+        remote = [frame.copy() for frame in ring_frames(self.video_path, (96, 64), slots=3)]
+        local = self._local_frames()
+        self.assertEqual(len(remote), 12)
+        for a, b in zip(remote, local):
+            np.testing.assert_array_equal(a, b)
+
+        resumed = [frame.copy() for frame in ring_frames(self.video_path, (96, 64), start_frame=5, slots=3)]
+        self.assertEqual(len(resumed), len(self._local_frames(5)))
+
+    def test_missing_video_fails(self):
+        with self.assertRaises((RuntimeError, TimeoutError)):
+            list(ring_frames(os.path.join(self.tmp_dir, 'missing.mp4'), (96, 64), timeout=30))
+
+    def test_tracker_reads_from_decoder_process(self):
+        videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(videos_dir)
+        shutil.copy(self.video_path, videos_dir)
+        config = {
+            'videos_dir': videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': self.tmp_dir,
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'write_annotated_video': False,
+            'detection_log': False,
+            'decode_process': True,
+            'frame_ring_slots': 4,
+        }
+        with patch('boat_detection.tracking.video_tracker.YOLO'):
+            tracker = VideoTracker(config)
+        try:
+            seen = []
+            result = MagicMock()
+            result.boxes.id = None
+
+            def track(frame, **kwargs):
+                seen.append(frame.copy())
+                return [result]
+            tracker.model = MagicMock()
+            tracker.model.track.side_effect = track
+            tracker.process_video('clip.mp4')
+        finally:
+            tracker.close()
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(seen[0].shape, (64, 96, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
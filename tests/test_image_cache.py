@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+import cv2
+import numpy as np
+
+from boat_detection.comparison.image_cache import ImageCache
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.track_dir = os.path.join(self.tmp_dir, 'track_id_1')
+        os.makedirs(self.track_dir)
+        for index in range(3):
+            image = np.full((64, 80, 3), index * 50, dtype=np.uint8)
+            cv2.imwrite(os.path.join(self.track_dir, f"frame_{index:04d}.jpg"), image)
+        with open(os.path.join(self.track_dir, 'notes.txt'), 'w') as file:
+            file.write('not an image')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_read_is_cached(self):
+        cache = ImageCache()
+        path = os.path.join(self.track_dir, 'frame_0000.jpg')
+        first = cache.read(path)
+        second = cache.read(path)
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.current_bytes, first.nbytes)
+
+    def test_reduced_decode(self):
+        cache = ImageCache(reduction=2)
+        image = cache.read(os.path.join(self.track_dir, 'frame_0001.jpg'))
+        self.assertEqual(image.shape, (32, 40, 3))
+        with self.assertRaises(ValueError):
+            ImageCache(reduction=3)
+
+    def test_byte_budget_evicts_least_recent(self):
+        image_bytes = 64 * 80 * 3
+        cache = ImageCache(max_bytes=2 * image_bytes)
+        paths = [os.path.join(self.track_dir, f"frame_{index:04d}.jpg") for index in range(3)]
+        cache.read(paths[0])
+        cache.read(paths[1])
+        cache.read(paths[0])
+        cache.read(paths[2])
+        self.assertLessEqual(cache.current_bytes, 2 * image_bytes)
+        misses = cache.misses
+        cache.read(paths[0])
+        self.assertEqual(cache.misses, misses)
+        cache.read(paths[1])
+        self.assertEqual(cache.misses, misses + 1)
+
+    def test_listing_cache_and_invalidation(self):
+        cache = ImageCache()
+        self.assertEqual(sorted(cache.list_images(self.track_dir)),
+                         ['frame_0000.jpg', 'frame_0001.jpg', 'frame_0002.jpg'])
+        os.remove(os.path.join(self.track_dir, 'frame_0000.jpg'))
+        self.assertEqual(len(cache.list_images(self.track_dir)), 3)
+
+        cache.read(os.path.join(self.track_dir, 'frame_0001.jpg'))
+        cache.invalidate_directory(self.track_dir)
+        self.assertEqual(len(cache.list_images(self.track_dir)), 2)
+        self.assertEqual(cache.current_bytes, sum(len(n) for n in cache.list_images(self.track_dir)) + 64 * 3)
+
+    def test_missing_image(self):
+        cache = ImageCache()
+        self.assertIsNone(cache.read(os.path.join(self.track_dir, 'missing.jpg')))
+        self.assertEqual(cache.current_bytes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.tracking.ingest import IngestionWatcher, QUEUED, DUPLICATE
+from boat_detection.utils.helpers import compute_file_hash
+from tests.fakes import FakeClock
+
+
+class TestIngestionWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(self.videos_dir)
+        self.db_manager = DatabaseManager(db_path=os.path.join(self.tmp_dir, 'boats.db'))
+        self.db_manager.initialize_database()
+        self.clock = FakeClock(1_000_000.0)
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, name, content, age=3600.0):
+        path = os.path.join(self.videos_dir, name)
+        with open(path, 'ab') as file:
+            file.write(content)
+        mtime = self.clock.now - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def _watcher(self):
+        return IngestionWatcher(self.videos_dir, self.db_manager, 'model.pt', stable_seconds=10, clock=self.clock)
+
+    def test_old_files_are_ingested_once(self):
+        self._write('a.mp4', b'aaa')
+        self._write('notes.txt', b'ignored')
+        watcher = self._watcher()
+        self.assertEqual(watcher.poll(), ['a.mp4'])
+        self.assertEqual(watcher.poll(), [])
+        self.assertEqual(self.db_manager.get_ingested_files()['a.mp4'][2:], (watcher.hash_for('a.mp4'), QUEUED))
+
+    def test_growing_file_waits_for_stable_size(self):
+        watcher = self._watcher()
+        self._write('upload.mp4', b'part1', age=0)
+        self.assertEqual(watcher.poll(), [])
+        self.clock.now += 5
+        self._write('upload.mp4', b'part2', age=0)
+        self.assertEqual(watcher.poll(), [])
+        self.clock.now += 5
+        self.assertEqual(watcher.poll(), [])
+        self.clock.now += 6
+        self.assertEqual(watcher.poll(), ['upload.mp4'])
+
+    def test_duplicates_and_processed_content_are_skipped(self):
+        processed = self._write('done.mp4', b'same')
+        self.db_manager.mark_video_processed(compute_file_hash(processed), 'model.pt', 'done.mp4', 10)
+        self._write('copy_of_done.mp4', b'same')
+        self._write('b.mp4', b'bbb')
+        self._write('copy_of_b.mp4', b'bbb')
+
+        self.assertEqual(self._watcher().poll(), ['b.mp4'])
+        statuses = {name: row[3] for name, row in self.db_manager.get_ingested_files().items()}
+        self.assertEqual(statuses, {'b.mp4': QUEUED, 'copy_of_b.mp4': DUPLICATE,
+                                    'copy_of_done.mp4': DUPLICATE, 'done.mp4': DUPLICATE})
+
+    def test_unfinished_work_is_requeued_after_restart(self):
+        self._write('a.mp4', b'aaa')
+        first = self._watcher()
+        self.assertEqual(first.poll(), ['a.mp4'])
+
+        second = self._watcher()
+        self.assertEqual(second.poll(), ['a.mp4'])
+        self.db_manager.mark_video_processed(second.hash_for('a.mp4'), 'model.pt', 'a.mp4', 10)
+        self.assertEqual(self._watcher().poll(), [])
+
+    def test_released_file_is_handed_out_again(self):
+        self._write('a.mp4', b'aaa')
+        watcher = self._watcher()
+        self.assertEqual(watcher.poll(), ['a.mp4'])
+        watcher.release('a.mp4')
+        self.assertEqual(watcher.poll(), ['a.mp4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from boat_detection.tracking.load_shedding import LoadShedder, scale_imgsz
+from boat_detection.tracking.video_tracker import VideoTracker
+from tests.fakes import FakeClock, fake_capture
+
+
+class TestLoadShedder(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(100.0)
+        self.shedder = LoadShedder(max_lag=5.0, recover_lag=1.0, hold=10.0, clock=self.clock)
+        self.shedder.start()
+
+    def at(self, wall, video):
+        self.clock.now = 100.0 + wall
+        return self.shedder.update(int(video * 10), video)
+
+    def test_steps_down_and_back_up(self):
+        self.assertIsNone(self.at(6, 0))  # holding after start
+        event = self.at(12, 2)
+        self.assertEqual((event['from_level'], event['level']), (0, 1))
+        self.assertEqual(self.shedder.settings['stride'], 2)
+        self.assertIsNone(self.at(15, 3))  # holding
+        self.assertEqual(self.at(23, 8)['level'], 2)  # lag 15 and still growing
+        self.assertIsNone(self.at(34, 22))  # lag 12, shrinking: give level 2 time
+        self.assertEqual(self.at(45, 44.5)['level'], 1)
+        self.assertEqual(self.at(56, 55.5)['level'], 0)
+        self.assertIsNone(self.at(70, 70))
+        self.assertEqual(self.shedder.settings, {'stride': 1, 'imgsz_scale': 1.0, 'annotate': True,
+                                                 'save_images': True})
+        report = self.shedder.report()
+        self.assertEqual(report['changes'], 4)
+        self.assertEqual(report['level_seconds'], [26.0, 22.0, 22.0, 0.0, 0.0])
+
+    def test_stops_at_the_last_level(self):
+        for step in range(1, 10):
+            self.at(step * 20, 0)
+        self.assertEqual(self.shedder.level, 4)
+        self.assertFalse(self.shedder.settings['annotate'])
+        self.assertEqual(len(self.shedder.events), 4)
+
+    def test_custom_levels_and_validation(self):
+        shedder = LoadShedder(levels=[{}, {'save_images': False}])
+        self.assertEqual(shedder.levels[1]['stride'], 1)
+        self.assertFalse(shedder.levels[1]['save_images'])
+        with self.assertRaises(ValueError):
+            LoadShedder(max_lag=1.0, recover_lag=2.0)
+
+    def test_scale_imgsz(self):
+        self.assertEqual(scale_imgsz(640, 1.0), 640)
+        self.assertEqual(scale_imgsz(640, 0.75), 480)
+        self.assertEqual(scale_imgsz((1920, 1088), 0.5), (960, 544))
+        self.assertEqual(scale_imgsz(64, 0.1), 32)
+
+
+class TestVideoTrackerLoadShedding(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(videos_dir)
+        with open(os.path.join(videos_dir, 'clip.mp4'), 'wb') as file:
+            file.write(b'video bytes')
+        config = {
+            'videos_dir': videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': self.tmp_dir,
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'write_annotated_video': False,
+            'detection_log': False,
+            'load_shedding': True,
+            'shedding_max_lag': 1.0,
+            'shedding_recover_lag': 0.5,
+            'shedding_hold': 0.0,
+        }
+        with patch('boat_detection.tracking.video_tracker.YOLO'):
+            self.tracker = VideoTracker(config)
+
+    def tearDown(self):
+        self.tracker.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_tiled_inference_is_scaled_too(self):
+        tiler = MagicMock()
+        tiler.detect.return_value = ([], [], [])
+        self.tracker.imgsz_scale = 0.5
+        self.tracker.detect(None, None, 64, 64, tiler)
+        tiler.detect.assert_called_once_with(None, 0.5)
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoWriter')
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_overload_sheds_quality(self, mock_capture, mock_writer):
+        mock_capture.return_value = fake_capture(40)
+
+        clock = FakeClock(100.0)
+        result = MagicMock()
+        result.boxes.id = None
+        imgsz = []
+
+        def slow_track(frame, **kwargs):
+            # Each inference takes a second of a 10 fps video.
+            clock.now += 1.0
+            imgsz.append(kwargs['imgsz'])
+            return [result]
+        self.tracker.model = MagicMock()
+        self.tracker.model.track.side_effect = slow_track
+        self.tracker.write_annotated_video = True
+        with patch('boat_detection.tracking.video_tracker.LoadShedder',
+                   lambda *args: LoadShedder(*args, clock=clock)):
+            self.tracker.process_video('clip.mp4')
+
+        events = self.tracker.db_manager.get_load_shedding_events('clip.mp4')
+        self.assertEqual([event['level'] for event in events], [1, 2, 3, 4])
+        self.assertEqual(events[-1]['settings']['annotate'], False)
+        self.assertEqual(imgsz[0], (64, 64))
+        self.assertEqual(imgsz[-1], (32, 32))
+        self.assertLess(len(imgsz), 40)
+        self.assertEqual(self.tracker.last_shedding_report['level'], 4)
+        self.assertEqual(self.tracker.imgsz_scale, 1.0)
+        self.assertEqual(mock_writer.return_value.write.call_count, 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
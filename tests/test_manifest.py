@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import cv2
+import numpy as np
+
+from boat_detection.comparison.comparator import Comparator
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.utils.helpers import image_quality
+
+
+class TestDetectionImageManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.images_dir = os.path.join(self.tmp_dir, 'detection_images')
+        self.db_manager = DatabaseManager(db_path=os.path.join(self.tmp_dir, 'boats.db'))
+        self.db_manager.initialize_database()
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_track(self, track_id, qualities, seed=0):
+        track_dir = os.path.join(self.images_dir, f"track_id_{track_id}")
+        os.makedirs(track_dir, exist_ok=True)
+        rng = np.random.default_rng(seed)
+        image = rng.integers(0, 255, (120, 160, 3), dtype=np.uint8)
+        paths = []
+        for frame_number, quality in enumerate(qualities, start=1):
+            path = os.path.join(track_dir, f"frame_{frame_number:06d}.jpg")
+            cv2.imwrite(path, image)
+            self.db_manager.add_detection_image(track_id, frame_number, path, quality)
+            paths.append(path)
+        return paths
+
+    def test_images_are_returned_best_first(self):
+        paths = self._write_track(1, [2.0, 9.0, None, 5.0])
+        rows = self.db_manager.get_detection_images(1)
+        self.assertEqual([row[1] for row in rows], [paths[1], paths[3], paths[0], paths[2]])
+        self.assertEqual(self.db_manager.get_manifest_track_ids(), [1])
+
+    def test_classify_only_updates_metadata(self):
+        paths = self._write_track(1, [1.0, 2.0])
+        dest_dir = os.path.join(self.images_dir, 'orphans')
+        self.assertEqual(self.db_manager.classify_detection_images(1, 'Orphan', dest_dir), 2)
+
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+        self.assertEqual(self.db_manager.get_manifest_track_ids(), [])
+        self.assertEqual(self.db_manager.get_manifest_track_ids('Orphan'), [1])
+        pending = self.db_manager.get_pending_image_moves()
+        self.assertEqual(sorted(row[2] for row in pending),
+                         sorted(os.path.join(dest_dir, f"track_id_1_{os.path.basename(p)}") for p in paths))
+
+    def test_delete_detection_images_returns_paths(self):
+        paths = self._write_track(3, [1.0, 2.0])
+        self.assertEqual(sorted(self.db_manager.delete_detection_images(3)), sorted(paths))
+        self.assertEqual(self.db_manager.get_detection_images(3), [])
+
+    def test_comparator_uses_manifest_and_applies_moves(self):
+        paths_1 = self._write_track(1, [1.0])
+        paths_2 = self._write_track(2, [1.0])
+        self.db_manager.insert_boat_record(1, 'Launched', 0.0, 'model')
+        self.db_manager.insert_boat_record(2, 'Launched', 7200.0, 'model')
+
+        comparator = Comparator(self.db_manager, self.images_dir, orb_threshold=0.0, ssim_threshold=0.0)
+        comparator.perform_comparisons()
+
+        match_dir = os.path.join(self.images_dir, 'matches')
+        self.assertEqual(self.db_manager.get_pending_image_moves(), [])
+        for track_id, paths in ((1, paths_1), (2, paths_2)):
+            self.assertFalse(os.path.exists(paths[0]))
+            moved = os.path.join(match_dir, f"track_id_{track_id}_{os.path.basename(paths[0])}")
+            self.assertTrue(os.path.exists(moved))
+            self.assertEqual(self.db_manager.get_detection_images(track_id, 'Match')[0][1], moved)
+
+    def test_descriptors_are_computed_once_per_image(self):
+        for track_id in (1, 2, 3):
+            self._write_track(track_id, [1.0], seed=track_id)
+            self.db_manager.insert_boat_record(track_id, 'Launched', track_id * 7200.0, 'model')
+
+        comparator = Comparator(self.db_manager, self.images_dir, orb_threshold=0.0, ssim_threshold=0.0)
+        with patch.object(Comparator, 'orb_descriptors', wraps=Comparator.orb_descriptors) as descriptors:
+            comparator.perform_comparisons()
+        # Three candidate pairs, but each of the three images is only run through ORB once.
+        self.assertEqual(descriptors.call_count, 3)
+
+    def test_images_are_held_only_inside_the_window(self):
+        # Two launches a day apart: each pair is scored with just its own two tracks in memory.
+        for track_id, launch_time in ((1, 0.0), (2, 7200.0), (3, 200000.0), (4, 207200.0)):
+            self._write_track(track_id, [1.0])
+            self.db_manager.insert_boat_record(track_id, 'Launched', launch_time, 'model')
+
+        comparator = Comparator(self.db_manager, self.images_dir, orb_threshold=0.0, ssim_threshold=0.0)
+        comparator.perform_comparisons()
+
+        self.assertEqual(comparator.last_peak_window, 2)
+        self.assertEqual(self.db_manager.get_manifest_track_ids('Match'), [1, 2, 3, 4])
+
+    def test_comparator_can_defer_moves(self):
+        paths = self._write_track(1, [1.0])
+        self.db_manager.insert_boat_record(1, 'Launched', 0.0, 'model')
+
+        comparator = Comparator(self.db_manager, self.images_dir, defer_moves=True)
+        comparator.perform_comparisons()
+
+        self.assertTrue(os.path.exists(paths[0]))
+        self.assertEqual(len(self.db_manager.get_pending_image_moves()), 1)
+        self.assertEqual(comparator.apply_pending_moves(), 1)
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertEqual(self.db_manager.get_pending_image_moves(), [])
+
+    def test_image_quality_prefers_sharp_crops(self):
+        sharp = np.zeros((100, 100, 3), dtype=np.uint8)
+        sharp[::2, :] = 255
+        blurred = cv2.GaussianBlur(sharp, (15, 15), 5)
+        box = (50, 50, 40, 40)
+        self.assertGreater(image_quality(sharp, box), image_quality(blurred, box))
+
+
+if __name__ == '__main__':
+    unittest.main()
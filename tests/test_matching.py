@@ -0,0 +1,39 @@
+import unittest
+
+from boat_detection.comparison.matching import candidate_pairs, resolve_duplicates, assign_matches
+
+
+class TestMatching(unittest.TestCase):
+    def test_candidate_pairs_respect_window(self):
+        launch_times = {5: 0.0, 3: 100.0, 9: 5000.0, 1: 90000.0}
+        pairs = candidate_pairs(launch_times, 6000.0)
+        self.assertEqual(pairs, [(5, 3, 100.0), (5, 9, 5000.0), (3, 9, 4900.0)])
+        self.assertEqual(len(candidate_pairs(launch_times, None)), 6)
+
+    def test_assignment_beats_greedy_order(self):
+        # Greedy from launch 1 would take 3 and leave 2 with its weak pair to 4.
+        pairs = [(1, 3, 0.9), (1, 4, 0.8), (2, 3, 0.85), (2, 4, 0.1)]
+        self.assertEqual(assign_matches(pairs), [(1, 4, 0.8), (2, 3, 0.85)])
+
+    def test_assignment_is_order_independent(self):
+        pairs = [(1, 3, 0.5), (2, 3, 0.7), (2, 4, 0.4), (5, 6, 0.9)]
+        self.assertEqual(assign_matches(pairs), assign_matches(list(reversed(pairs))))
+        self.assertEqual(assign_matches(pairs), [(1, 3, 0.5), (2, 4, 0.4), (5, 6, 0.9)])
+
+    def test_track_is_used_in_one_match_only(self):
+        pairs = [(1, 2, 0.9), (2, 3, 0.6)]
+        self.assertEqual(assign_matches(pairs), [(1, 2, 0.9)])
+        self.assertEqual(assign_matches([]), [])
+
+    def test_chains_keep_the_best_total(self):
+        # Track 4 retrieves 1 and launches 5; the best set uses 1-4 alone rather than 1-2 and 3-4.
+        pairs = [(1, 2, 0.4), (1, 4, 0.9), (3, 4, 0.2), (4, 5, 0.2)]
+        self.assertEqual(assign_matches(pairs), [(1, 4, 0.9)])
+
+    def test_resolve_duplicates_keeps_earlier_track(self):
+        duplicates = resolve_duplicates([(1, 2, 0.9), (2, 3, 0.8), (1, 3, 0.5)])
+        self.assertEqual(duplicates, {2: 1, 3: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
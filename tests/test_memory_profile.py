@@ -0,0 +1,128 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import tracemalloc
+from unittest.mock import patch, MagicMock
+import numpy as np
+
+from boat_detection.tracking.memory_profile import (MemoryProfiler, MemoryBudgetExceeded, subsystem_for, rss_bytes,
+                                                     MB)
+from boat_detection.tracking.video_tracker import VideoTracker
+from tests.fakes import fake_capture
+
+
+class TestMemoryProfiler(unittest.TestCase):
+    def test_subsystem_attribution(self):
+        self.assertEqual(subsystem_for('/x/boat_detection/tracking/track_store.py'), 'history')
+        self.assertEqual(subsystem_for('/site-packages/ultralytics/trackers/byte_tracker.py'), 'tracker')
+        self.assertEqual(subsystem_for('/site-packages/ultralytics/nn/tasks.py'), 'model')
+        self.assertEqual(subsystem_for('/usr/lib/python3/multiprocessing/queues.py'), 'queues')
+        self.assertEqual(subsystem_for('/somewhere/else.py'), 'other')
+        self.assertGreater(rss_bytes(), 0)
+
+    def test_growth_is_measured_per_video_hour(self):
+        profiler = MemoryProfiler(interval_frames=10, budget_mb_per_hour=1.0)
+        profiler.start()
+        hoard = []
+        try:
+            for step in range(1, 5):
+                hoard.append(np.ones(MB // 8 * step))
+                profiler.sample(step * 10, step * 360.0, {'hoard': lambda: len(hoard)})
+        finally:
+            profiler.stop()
+        report = profiler.report()
+        self.assertEqual(len(report['samples']), 4)
+        self.assertAlmostEqual(report['probe_growth_per_hour']['hoard'], 10.0)
+        # 1, 2, 3 and 4 MB more per 0.1 h of video: far above a 1 MB/h budget.
+        self.assertGreater(report['traced_growth_mb_per_hour'], 20)
+        self.assertTrue(report['top_growth'])
+        profiler.samples = [dict(sample, rss_mb=100.0 + index * 5) for index, sample in enumerate(profiler.samples)]
+        with self.assertRaises(MemoryBudgetExceeded):
+            profiler.check_budget()
+
+    def test_is_due(self):
+        self.assertTrue(MemoryProfiler(100).is_due(200))
+        self.assertFalse(MemoryProfiler(100).is_due(150))
+        self.assertFalse(MemoryProfiler(0).is_due(100))
+
+
+class TestVideoTrackerMemoryProfile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(videos_dir)
+        with open(os.path.join(videos_dir, 'clip.mp4'), 'wb') as file:
+            file.write(b'video bytes')
+        config = {
+            'videos_dir': videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': self.tmp_dir,
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'write_annotated_video': False,
+            'detection_log': False,
+            'memory_profile_interval': 5,
+        }
+        with patch('boat_detection.tracking.video_tracker.YOLO'):
+            self.tracker = VideoTracker(config)
+        result = MagicMock()
+        result.boxes.id = None
+        self.tracker.model = MagicMock()
+        self.tracker.model.track.return_value = [result]
+        self.tracker.model.predictor.trackers = [MagicMock(tracked_stracks=[1, 2], lost_stracks=[3],
+                                                           removed_stracks=[])]
+
+    def tearDown(self):
+        self.tracker.close()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_report_is_written(self, mock_capture):
+        mock_capture.return_value = fake_capture(20)
+
+        self.tracker.process_video('clip.mp4')
+
+        path = os.path.join(self.tmp_dir, 'results', 'memory_profiles', 'clip_memory.json')
+        with open(path) as file:
+            report = json.load(file)
+        self.assertEqual([sample['frame'] for sample in report['samples']], [5, 10, 15, 20])
+        self.assertEqual(report['samples'][-1]['probes']['model_tracker_tracks'], 3)
+        self.assertEqual(report['samples'][-1]['probes']['boat_records'], 0)
+        self.assertTrue(report['within_budget'])
+        self.assertEqual(self.tracker.last_memory_report['budget_mb_per_hour'], None)
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_growth_is_measured_across_videos(self, mock_capture):
+        with open(os.path.join(self.tracker.videos_dir, 'clip2.mp4'), 'wb') as file:
+            file.write(b'more video bytes')
+        mock_capture.side_effect = [fake_capture(20), fake_capture(20)]
+
+        self.tracker.process_video('clip.mp4')
+        self.assertTrue(tracemalloc.is_tracing())
+        self.tracker.process_video('clip2.mp4')
+
+        samples = self.tracker.last_memory_report['samples']
+        self.assertEqual([sample['video'] for sample in samples], ['clip.mp4'] * 4 + ['clip2.mp4'] * 4)
+        self.assertEqual([sample['video_seconds'] for sample in samples], [0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0])
+        self.tracker.close()
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_budget_is_enforced(self, mock_capture):
+        mock_capture.return_value = fake_capture(20)
+        self.tracker.memory_budget_mb_per_hour = 1.0
+        rss = iter(range(100 * MB, 200 * MB, 10 * MB))
+
+        with patch('boat_detection.tracking.memory_profile.rss_bytes', lambda: next(rss)):
+            with self.assertRaises(MemoryBudgetExceeded):
+                self.tracker.process_video('clip.mp4')
+        self.assertFalse(self.tracker.last_memory_report['within_budget'])
+
+
+if __name__ == '__main__':
+    unittest.main()
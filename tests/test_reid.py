@@ -0,0 +1,168 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import numpy as np
+
+from boat_detection.tracking.reid import ReIdGallery, appearance_embedding
+from boat_detection.tracking.video_tracker import VideoTracker
+from tests.fakes import fake_capture
+
+
+def scene(boats, size=(128, 128)):
+    # boats: list of ((x, y) centre, BGR colour); each boat is a 20x12 two-tone block.
+    frame = np.full((size[1], size[0], 3), 90, dtype=np.uint8)
+    for (x, y), colour in boats:
+        frame[y - 6:y, x - 10:x + 10] = colour
+        frame[y:y + 6, x - 10:x + 10] = 255
+    return frame
+
+
+class TestReIdGallery(unittest.TestCase):
+    def test_embedding_separates_colours(self):
+        red = appearance_embedding(scene([((40, 40), (0, 0, 220))]), (40, 40, 20, 12))
+        red_elsewhere = appearance_embedding(scene([((90, 80), (0, 0, 220))]), (90, 80, 20, 12))
+        blue = appearance_embedding(scene([((40, 40), (220, 0, 0))]), (40, 40, 20, 12))
+        self.assertAlmostEqual(float(np.dot(red, red_elsewhere)), 1.0, places=5)
+        self.assertLess(float(np.dot(red, blue)), 0.85)
+        self.assertIsNone(appearance_embedding(scene([]), (0, 0, 1, 1)))
+
+    def _run(self, gallery, sightings, size=(128, 128)):
+        # sightings: {frame_number: [(raw_id, (x, y), colour)]}
+        resolved = {}
+        for frame_number in sorted(sightings):
+            boats = sightings[frame_number]
+            frame = scene([(centre, colour) for _, centre, colour in boats], size)
+            ids = np.array([raw_id for raw_id, _, _ in boats])
+            boxes = np.array([[x, y, 20, 12] for _, (x, y), _ in boats], dtype=np.float32)
+            resolved[frame_number] = list(gallery.resolve(ids, boxes, frame, frame_number))
+        return resolved
+
+    def test_new_id_after_short_gap_is_relinked(self):
+        sightings = {f: [(3, (40, 40), (0, 0, 220))] for f in range(1, 6)}
+        sightings.update({f: [(8, (44, 40), (0, 0, 220))] for f in range(9, 12)})
+        gallery = ReIdGallery(max_age_frames=10)
+        resolved = self._run(gallery, sightings)
+        self.assertEqual(resolved[9], [3])
+        self.assertEqual(resolved[11], [3])
+        self.assertEqual(gallery.relinked, 1)
+
+    def test_no_relink_after_max_age_or_for_other_boats(self):
+        sightings = {f: [(3, (40, 40), (0, 0, 220))] for f in range(1, 6)}
+        sightings[30] = [(8, (40, 40), (0, 0, 220))]
+        self.assertEqual(self._run(ReIdGallery(max_age_frames=10), sightings)[30], [8])
+
+        sightings = {f: [(3, (40, 40), (0, 0, 220))] for f in range(1, 6)}
+        sightings[7] = [(8, (40, 40), (220, 0, 0))]
+        self.assertEqual(self._run(ReIdGallery(max_age_frames=10), sightings)[7], [8])
+
+        sightings = {f: [(3, (20, 20), (0, 0, 220))] for f in range(1, 6)}
+        sightings[7] = [(8, (100, 100), (0, 0, 220))]
+        self.assertEqual(self._run(ReIdGallery(max_age_frames=10, max_distance=30), sightings)[7], [8])
+
+    def test_unconfirmed_and_visible_tracks_are_not_targets(self):
+        sightings = {1: [(3, (40, 40), (0, 0, 220))], 3: [(8, (40, 40), (0, 0, 220))]}
+        self.assertEqual(self._run(ReIdGallery(max_age_frames=10), sightings)[3], [8])
+
+        sightings = {f: [(3, (20, 20), (0, 0, 220))] for f in range(1, 6)}
+        sightings[6] = [(3, (20, 20), (0, 0, 220)), (8, (80, 80), (0, 0, 220))]
+        self.assertEqual(self._run(ReIdGallery(max_age_frames=10), sightings)[6], [3, 8])
+
+    def test_each_lost_track_is_claimed_once(self):
+        sightings = {f: [(3, (40, 40), (0, 0, 220))] for f in range(1, 6)}
+        sightings[7] = [(8, (40, 40), (0, 0, 220)), (9, (90, 90), (0, 0, 220))]
+        self.assertEqual(sorted(self._run(ReIdGallery(max_age_frames=10), sightings)[7]), [3, 9])
+
+    def test_tracks_within_the_tracker_buffer_are_not_lost(self):
+        sightings = {f: [(3, (40, 40), (0, 0, 220))] for f in range(1, 6)}
+        sightings[7] = [(8, (60, 40), (0, 0, 220))]
+        self.assertEqual(self._run(ReIdGallery(max_age_frames=10, lost_after_frames=5), sightings)[7], [8])
+
+    def test_original_id_reappearing_keeps_ids_apart(self):
+        sightings = {f: [(3, (40, 40), (0, 0, 220))] for f in range(1, 6)}
+        sightings[7] = [(8, (60, 40), (0, 0, 220))]
+        sightings[8] = [(3, (40, 40), (0, 0, 220)), (8, (62, 40), (0, 0, 220))]
+        sightings[9] = [(3, (40, 40), (0, 0, 220)), (8, (64, 40), (0, 0, 220))]
+        gallery = ReIdGallery(max_age_frames=10, lost_after_frames=1)
+        resolved = self._run(gallery, sightings)
+        self.assertEqual(resolved[7], [3])
+        self.assertEqual(resolved[8], [3, 8])
+        self.assertEqual(resolved[9], [3, 8])
+        self.assertEqual(gallery.aliases, {})
+
+    def test_default_distance_gate(self):
+        sightings = {f: [(3, (20, 20), (0, 0, 220))] for f in range(1, 6)}
+        sightings[7] = [(8, (500, 300), (0, 0, 220))]
+        self.assertEqual(self._run(ReIdGallery(max_age_frames=10), sightings, (640, 360))[7], [8])
+        sightings[7] = [(8, (150, 100), (0, 0, 220))]
+        self.assertEqual(self._run(ReIdGallery(max_age_frames=10), sightings, (640, 360))[7], [3])
+
+
+class TestVideoTrackerReId(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(videos_dir)
+        with open(os.path.join(videos_dir, 'clip.mp4'), 'wb') as file:
+            file.write(b'video bytes')
+        config = {
+            'videos_dir': videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': self.tmp_dir,
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'write_annotated_video': False,
+            'detection_log': False,
+            'movement_threshold': 10 ** 6,
+            'reid_enabled': True,
+            'reid_max_age': 1.0,
+            'reid_lost_after': 2,
+        }
+        with patch('boat_detection.tracking.video_tracker.YOLO'):
+            self.tracker = VideoTracker(config)
+
+        # The tracker loses the boat for frames 5-7 and then calls it track 12.
+        self.frame_ids = {f: 4 for f in range(1, 5)}
+        self.frame_ids.update({f: 12 for f in range(8, 12)})
+        self.calls = [0]
+
+        def track(*args, **kwargs):
+            self.calls[0] += 1
+            raw_id = self.frame_ids.get(self.calls[0])
+            result = MagicMock()
+            if raw_id is None:
+                result.boxes.id = None
+                return [result]
+            result.boxes.xywh.cpu.return_value.numpy.return_value = np.array([[40.0, 40.0, 20.0, 12.0]])
+            result.boxes.id.int.return_value.cpu.return_value.numpy.return_value = np.array([raw_id])
+            result.boxes.conf.cpu.return_value.numpy.return_value = np.array([0.9])
+            return [result]
+        self.tracker.model = MagicMock()
+        self.tracker.model.track.side_effect = track
+
+    def tearDown(self):
+        self.tracker.close()
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_relinked_track_keeps_one_folder(self, mock_capture):
+        mock_capture.return_value = fake_capture(11, fps=4.0, size=(128, 128), frame=scene([((40, 40), (0, 0, 220))]))
+
+        with patch.object(self.tracker.db_manager, 'add_detection_image',
+                          wraps=self.tracker.db_manager.add_detection_image) as add_image:
+            self.tracker.process_video('clip.mp4')
+        # Manifest rows are batched into the tracker's own commits rather than committed per image.
+        self.assertTrue(all(call.kwargs.get('commit') is False for call in add_image.call_args_list))
+
+        images_dir = self.tracker.detection_images_dir
+        self.assertEqual(sorted(os.listdir(images_dir)), ['track_id_4'])
+        self.assertEqual(len(os.listdir(os.path.join(images_dir, 'track_id_4'))), 8)
+        self.assertEqual(self.tracker.db_manager.get_manifest_track_ids(), [4])
+
+
+if __name__ == '__main__':
+    unittest.main()
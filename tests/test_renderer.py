@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import cv2
+import numpy as np
+
+from boat_detection.rendering.renderer import VideoRenderer, chunk_ranges
+from boat_detection.tracking.detection_log import DetectionLogWriter
+
+
+class TestVideoRenderer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config = {
+            'videos_dir': os.path.join(self.tmp_dir, 'videos'),
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'render_chunk_seconds': 1,
+            'render_workers': 1,
+        }
+        os.makedirs(self.config['videos_dir'])
+
+        writer = cv2.VideoWriter(os.path.join(self.config['videos_dir'], 'clip.mp4'),
+                                 cv2.VideoWriter_fourcc(*'mp4v'), 10.0, (64, 64))
+        for _ in range(30):
+            writer.write(np.full((64, 64, 3), 128, dtype=np.uint8))
+        writer.release()
+
+        log = DetectionLogWriter(os.path.join(self.config['results_dir'], 'detection_logs', 'clip'),
+                                 {'video_file': 'clip.mp4', 'fps': 10.0, 'frame_size': [64, 64]})
+        for frame_number in range(1, 31):
+            log.append(frame_number, np.array([[20 + frame_number, 30, 10, 10]]), np.array([1]), np.array([0.9]))
+        log.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_chunk_ranges(self):
+        self.assertEqual(chunk_ranges(1, 26, 10), [(1, 11), (11, 21), (21, 26)])
+        with self.assertRaises(ValueError):
+            chunk_ranges(1, 10, 0)
+
+    def test_render_range(self):
+        renderer = VideoRenderer(self.config)
+        output_path = renderer.render('clip.mp4', start_sec=0.5, end_sec=2.8)
+
+        cap = cv2.VideoCapture(output_path)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        ret, frame = cap.read()
+        cap.release()
+
+        self.assertEqual(frame_count, 23)
+        self.assertTrue(ret)
+        self.assertEqual(frame.shape, (64, 64, 3))
+        self.assertEqual([f for f in os.listdir(renderer.render_dir) if '.part' in f], [])
+
+    def test_opencv_backend_renders_one_chunk(self):
+        renderer = VideoRenderer(dict(self.config, render_workers=4))
+        with patch('boat_detection.rendering.renderer.render_chunk') as render_chunk, \
+                patch('boat_detection.rendering.renderer.os.replace'):
+            renderer.render('clip.mp4')
+        render_chunk.assert_called_once()
+        self.assertEqual(render_chunk.call_args.args[3:5], (1, 31))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            VideoRenderer(dict(self.config, render_backend='gif'))
+
+
+if __name__ == '__main__':
+    unittest.main()
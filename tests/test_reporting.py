@@ -0,0 +1,112 @@
+import os
+import csv
+import shutil
+import tempfile
+import unittest
+
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.database.reporting import BoatReporter, export_csv, export_parquet, SUMMARY_COLUMNS
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class TestBoatReporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_manager = DatabaseManager(db_path=os.path.join(self.tmp_dir, 'boats.db'))
+        self.db_manager.initialize_database()
+        self.reporter = BoatReporter(self.db_manager, batch_size=3)
+
+        for track_id in range(1, 11):
+            model = 'a.pt' if track_id <= 7 else 'b.pt'
+            self.db_manager.insert_boat_record(track_id, 'launched', float(track_id), model)
+        self.db_manager.cursor.executemany(
+            'UPDATE boats SET created_at = ? WHERE track_id = ?',
+            [('2026-05-01 10:00:00' if track_id <= 4 else '2026-05-02 10:00:00', track_id)
+             for track_id in range(1, 11)])
+        self.db_manager.conn.commit()
+        self.db_manager.update_boat_record(1, 'retrieved', 61.0, 60.0)
+        self.db_manager.update_boat_record(2, 'retrieved', 122.0, 120.0)
+        self.db_manager.cursor.execute("UPDATE boats SET status = 'Match', matchID = 1 WHERE track_id = 2")
+        self.db_manager.cursor.execute("UPDATE boats SET status = 'Orphan' WHERE track_id IN (3, 5, 6)")
+        self.db_manager.conn.commit()
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_keyset_pages_cover_all_rows_once(self):
+        rows, after_id = self.reporter.page()
+        self.assertEqual([row['track_id'] for row in rows], [1, 2, 3])
+        rows, after_id = self.reporter.page(after_id)
+        self.assertEqual([row['track_id'] for row in rows], [4, 5, 6])
+        self.assertEqual([row['track_id'] for row in self.reporter.iter_boats()], list(range(1, 11)))
+
+    def test_filters(self):
+        self.assertEqual([row['track_id'] for row in self.reporter.iter_boats(status='Orphan')], [3, 5, 6])
+        self.assertEqual([row['track_id'] for row in self.reporter.iter_boats(status=['Match', 'retrieved'])], [1, 2])
+        self.assertEqual([row['track_id'] for row in self.reporter.iter_boats(model='b.pt')], [8, 9, 10])
+        self.assertEqual([row['track_id'] for row in self.reporter.iter_boats(since='2026-05-02', model='a.pt')],
+                         [5, 6, 7])
+        self.assertEqual([row['track_id'] for row in self.reporter.iter_boats(until='2026-05-02')], [1, 2, 3, 4])
+
+    def test_daily_summary_is_maintained_incrementally(self):
+        summary = {row['day']: row for row in self.reporter.daily_summary()}
+        self.assertEqual(sorted(summary), ['2026-05-01', '2026-05-02'])
+        first = summary['2026-05-01']
+        self.assertEqual((first['launches'], first['matches'], first['orphans']), (4, 1, 1))
+        self.assertAlmostEqual(first['mean_on_water_time'], 90.0)
+        self.assertAlmostEqual(first['orphan_rate'], 0.25)
+        second = summary['2026-05-02']
+        self.assertEqual((second['launches'], second['orphans']), (6, 2))
+        self.assertIsNone(second['mean_on_water_time'])
+        self.assertEqual([row['launches'] for row in self.reporter.daily_summary(model='b.pt')], [3])
+
+        # Deleting (e.g. archiving) keeps the history; re-initialising does not double count.
+        self.db_manager.delete_boat_record(3)
+        self.db_manager.initialize_database()
+        self.assertEqual(self.reporter.daily_summary(until='2026-05-02')[0]['launches'], 4)
+
+    def test_summary_backfills_existing_rows(self):
+        self.db_manager.cursor.execute('DROP TABLE daily_boat_summary')
+        self.db_manager.conn.commit()
+        self.db_manager.initialize_database()
+        launches = [row['launches'] for row in self.reporter.daily_summary()]
+        self.assertEqual(launches, [4, 6])
+
+    def test_summary_migration_keeps_archived_days(self):
+        # Summaries kept by a trigger from before launch days are rebuilt only for days with rows left.
+        for track_id in range(1, 5):
+            self.db_manager.delete_boat_record(track_id)
+        self.db_manager.cursor.execute('DROP TRIGGER boats_summary_insert')
+        self.db_manager.cursor.execute('CREATE TRIGGER boats_summary_insert AFTER INSERT ON boats BEGIN SELECT 1; END')
+        self.db_manager.conn.commit()
+        self.db_manager.initialize_database()
+        launches = {row['day']: row['launches'] for row in self.reporter.daily_summary()}
+        self.assertEqual(launches, {'2026-05-01': 4, '2026-05-02': 6})
+
+    def test_export_csv(self):
+        path = os.path.join(self.tmp_dir, 'boats.csv')
+        self.assertEqual(export_csv(self.reporter.iter_boats(status='Orphan'), path), 3)
+        with open(path, newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual([row['track_id'] for row in rows], ['3', '5', '6'])
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_export_parquet_in_batches(self):
+        path = os.path.join(self.tmp_dir, 'boats.parquet')
+        self.assertEqual(export_parquet(self.reporter.iter_boats(), path, batch_size=4), 10)
+        parquet = pq.ParquetFile(path)
+        self.assertEqual(parquet.metadata.num_row_groups, 3)
+        self.assertEqual(parquet.read().column('track_id').to_pylist(), list(range(1, 11)))
+
+        path = os.path.join(self.tmp_dir, 'summary.parquet')
+        self.assertEqual(export_parquet(self.reporter.daily_summary(), path, SUMMARY_COLUMNS), 2)
+        self.assertEqual(pq.read_table(path).column('orphan_rate').to_pylist()[0], 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+import cv2
+import yaml
+
+from boat_detection.config.config import Config
+from boat_detection.rendering.renderer import VideoRenderer
+from boat_detection.service.server import JobService
+from boat_detection.utils import resources
+from boat_detection.utils.resources import (ThreadBudget, THREAD_ROLES, split_cores, limit_threads,
+                                            init_tracking_worker, threads_limited, worker_share)
+
+
+def worker_limits():
+    return resources._limits, worker_share()
+
+
+class TestThreadBudget(unittest.TestCase):
+    def setUp(self):
+        self.opencv_threads = cv2.getNumThreads()
+        self.saved = resources._limits, resources._workers
+
+    def tearDown(self):
+        cv2.setNumThreads(self.opencv_threads)
+        resources._limits, resources._workers = self.saved
+
+    def test_split_uses_every_core_once(self):
+        for cores in range(4, 33):
+            split = split_cores(cores, resources.DEFAULT_SHARES)
+            self.assertEqual(sum(split.values()), cores)
+            self.assertTrue(all(threads >= 1 for threads in split.values()))
+        self.assertEqual(split_cores(8, resources.DEFAULT_SHARES),
+                         {'decode': 2, 'inference': 4, 'encode': 1, 'comparison': 1})
+        self.assertEqual(split_cores(2, resources.DEFAULT_SHARES), {role: 1 for role in THREAD_ROLES})
+
+    def test_shares_and_core_sets(self):
+        budget = ThreadBudget(8, {'inference': 1.0, 'decode': 0, 'encode': 0, 'comparison': 0}, affinity=True,
+                              core_ids=range(8))
+        self.assertEqual(budget.split, {'decode': 1, 'inference': 5, 'encode': 1, 'comparison': 1})
+        self.assertEqual(budget.core_sets['decode'], [0])
+        self.assertEqual(budget.cores_for('inference', 'encode'), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(budget.tracker_limits(decode_in_process=True), (5, 2, [0, 1, 2, 3, 4, 5, 6]))
+        self.assertEqual(budget.tracker_limits(decode_in_process=False, workers=2), (2, 1, [1, 2, 3, 4, 5, 6]))
+        self.assertIn('inference 5', budget.describe())
+        self.assertIsNone(ThreadBudget(8).cores_for('decode'))
+        with self.assertRaises(ValueError):
+            ThreadBudget(8, {'training': 1.0})
+
+    def test_from_config(self):
+        self.assertIsNone(ThreadBudget.from_config({}))
+        budget = ThreadBudget.from_config({'cpu_budget': 'auto'})
+        self.assertEqual(budget.cores, len(resources.available_cores()))
+        self.assertEqual(ThreadBudget.from_config({'cpu_budget': 6}).cores, 6)
+
+    def test_limit_threads(self):
+        with patch('torch.set_num_threads') as set_torch_threads:
+            limit_threads(3, 2)
+        set_torch_threads.assert_called_once_with(3)
+        self.assertEqual(cv2.getNumThreads(), 2)
+        self.assertTrue(threads_limited())
+
+    def test_tracking_workers_split_the_budget(self):
+        config = {'cpu_budget': 8, 'decode_process': True}
+        with ProcessPoolExecutor(max_workers=1, initializer=init_tracking_worker, initargs=(config, 2)) as executor:
+            limits, workers = executor.submit(worker_limits).result()
+        self.assertEqual(limits, (2, 1, None))
+        self.assertEqual(workers, 2)
+
+    def test_service_sizes_comparison_pool_from_budget(self):
+        config = {'videos_dir': '.', 'model_path': 'model.pt', 'cpu_budget': 12}
+        self.assertEqual(JobService(config).comparison_workers, 2)
+        self.assertEqual(JobService(dict(config, service_comparison_workers=1)).comparison_workers, 1)
+        self.assertEqual(JobService({'videos_dir': '.', 'model_path': 'model.pt'}).comparison_workers, 1)
+
+    def test_config_defaults_do_not_override_the_budget(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        config_path = os.path.join(tmp_dir, 'config.yaml')
+        with open(config_path, 'w') as file:
+            yaml.safe_dump({'videos_dir': tmp_dir, 'output_dir': tmp_dir, 'results_dir': tmp_dir,
+                            'model_path': 'model.pt', 'cpu_budget': 8}, file)
+        with patch('boat_detection.utils.resources.available_cores', return_value=list(range(16))), \
+                patch('os.cpu_count', return_value=16):
+            config = Config(config_path)
+            budget = ThreadBudget.from_config(config)
+            self.assertEqual(VideoRenderer(config).workers, budget.split['encode'])
+            self.assertEqual(JobService(config).comparison_workers, budget.split['comparison'])
+        self.assertEqual(budget.split['encode'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import cv2
+import numpy as np
+
+from boat_detection.database.db_manager import DatabaseManager
+from boat_detection.maintenance.retention import RetentionEngine, sqlite_timestamp, DAY
+
+NOW = 1_800_000_000.0
+
+
+class TestRetentionEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.images_dir = os.path.join(self.tmp_dir, 'detection_images')
+        self.output_dir = os.path.join(self.tmp_dir, 'output')
+        os.makedirs(self.output_dir)
+        self.db_path = os.path.join(self.tmp_dir, 'boats.db')
+        self.db_manager = DatabaseManager(db_path=self.db_path)
+        self.db_manager.initialize_database()
+        self.config = {
+            'detection_images_dir': self.images_dir,
+            'output_dir': self.output_dir,
+            'database_path': self.db_path,
+            'retention_maintenance_interval_days': None,
+        }
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _engine(self, **overrides):
+        return RetentionEngine({**self.config, **overrides}, self.db_manager, clock=lambda: NOW)
+
+    def _write_image(self, path, age_days=0, seed=0):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image = np.random.default_rng(seed).integers(0, 255, (96, 128, 3), dtype=np.uint8)
+        cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 98])
+        mtime = NOW - age_days * DAY
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def _add_classified(self, track_id, category, folder, qualities, age_days=0):
+        paths = []
+        for frame_number, quality in enumerate(qualities, start=1):
+            path = os.path.join(self.images_dir, folder, f"track_id_{track_id}_frame_{frame_number}.jpg")
+            self._write_image(path, age_days, seed=frame_number)
+            self.db_manager.add_detection_image(track_id, frame_number, path, quality)
+            paths.append(path)
+        self.db_manager.cursor.execute('UPDATE detection_images SET category = ?, created_at = ? WHERE track_id = ?',
+                                       (category, sqlite_timestamp(NOW - age_days * DAY), track_id))
+        self.db_manager.conn.commit()
+        return paths
+
+    def test_expire_images_by_category_age(self):
+        old = self._add_classified(1, 'Duplicate', 'duplicates', [1.0], age_days=40)
+        recent = self._add_classified(2, 'Duplicate', 'duplicates', [1.0], age_days=5)
+        kept_match = self._add_classified(3, 'Match', 'matches', [1.0], age_days=40)
+        legacy = self._write_image(os.path.join(self.images_dir, 'duplicates', 'track_id_9_frame_1.jpg'), 90)
+        stale_track = self._write_image(os.path.join(self.images_dir, 'track_id_7', 'frame_000001.jpg'), 20)
+
+        engine = self._engine(retention_image_max_age_days={'Duplicate': 30, 'Match': None, 'Track': 10})
+        self.assertEqual(engine.expire_images(NOW), 3)
+
+        self.assertFalse(os.path.exists(old[0]) or os.path.exists(legacy) or os.path.exists(stale_track))
+        self.assertFalse(os.path.isdir(os.path.dirname(stale_track)))
+        self.assertTrue(os.path.exists(recent[0]) and os.path.exists(kept_match[0]))
+        self.assertEqual(self.db_manager.get_detection_images(1, 'Duplicate'), [])
+        self.assertEqual(len(self.db_manager.get_detection_images(2, 'Duplicate')), 1)
+
+    def test_unknown_category_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self._engine(retention_image_max_age_days={'Launched': 3})
+
+    def test_keep_best_images_per_track(self):
+        paths = self._add_classified(1, 'Match', 'matches', [2.0, 9.0, None, 5.0])
+        live = self._write_image(os.path.join(self.images_dir, 'track_id_2', 'frame_000001.jpg'))
+        for frame_number in range(1, 4):
+            self.db_manager.add_detection_image(2, frame_number, f"{live}.{frame_number}", 1.0)
+
+        self.assertEqual(self._engine(retention_keep_per_track=2).prune_tracks(), 2)
+        self.assertEqual([row[1] for row in self.db_manager.get_detection_images(1, 'Match')], [paths[1], paths[3]])
+        self.assertFalse(os.path.exists(paths[0]) or os.path.exists(paths[2]))
+        self.assertEqual(len(self.db_manager.get_detection_images(2)), 3)
+
+    def test_recompress_old_images_to_webp(self):
+        old = self._add_classified(1, 'Orphan', 'orphans', [1.0, 2.0], age_days=20)
+        recent = self._add_classified(2, 'Orphan', 'orphans', [1.0], age_days=1)
+        old_size = sum(os.path.getsize(path) for path in old)
+
+        recompressed, saved = self._engine(retention_recompress_after_days=14).recompress_images(NOW)
+        self.assertEqual(recompressed, 2)
+        rows = self.db_manager.get_detection_images(1, 'Orphan')
+        new_paths = [row[1] for row in rows]
+        self.assertTrue(all(path.endswith('.webp') and os.path.exists(path) for path in new_paths))
+        self.assertFalse(any(os.path.exists(path) for path in old))
+        self.assertEqual(old_size - sum(os.path.getsize(path) for path in new_paths), saved)
+        self.assertTrue(os.path.exists(recent[0]))
+        self.assertTrue(all(os.path.getmtime(path) == NOW - 20 * DAY for path in new_paths))
+
+        self.assertEqual(self._engine(retention_recompress_after_days=14).recompress_images(NOW), (0, 0))
+        engine = self._engine(retention_image_max_age_days={'Orphan': 10})
+        self.assertEqual(engine.expire_images(NOW), 2)
+
+    def test_expire_output_videos(self):
+        renders = os.path.join(self.output_dir, 'renders')
+        os.makedirs(renders)
+        paths = {}
+        for name, age in (('output_a.mp4', 40), (os.path.join('renders', 'b.mp4'), 40), ('output_c.mp4', 1)):
+            paths[name] = os.path.join(self.output_dir, name)
+            open(paths[name], 'wb').close()
+            os.utime(paths[name], (NOW - age * DAY, NOW - age * DAY))
+
+        self.assertEqual(self._engine(retention_output_max_age_days=30).expire_outputs(NOW), 2)
+        self.assertEqual([name for name, path in paths.items() if os.path.exists(path)], ['output_c.mp4'])
+
+    def test_archive_finished_records_by_month(self):
+        for track_id, status in ((1, 'Match'), (2, 'Match'), (3, 'Launched'), (4, 'Orphan'), (5, 'Duplicate')):
+            self.db_manager.insert_boat_record(track_id, status, float(track_id), 'model.pt')
+        created = {1: '2026-01-10 08:00:00', 2: '2026-01-20 08:00:00', 3: '2026-01-15 08:00:00',
+                   4: '2026-02-03 08:00:00', 5: sqlite_timestamp(NOW)}
+        self.db_manager.cursor.executemany('UPDATE boats SET created_at = ? WHERE track_id = ?',
+                                           [(value, key) for key, value in created.items()])
+        self.db_manager.conn.commit()
+
+        archive_dir = os.path.join(self.tmp_dir, 'archive')
+        engine = self._engine(retention_archive_after_days=90, retention_archive_dir=archive_dir)
+        self.assertEqual(engine.archive_records(NOW), 3)
+
+        self.assertEqual(sorted(row[1] for row in self.db_manager.fetch_all_boat_records()), [3, 5])
+        for month, expected in (('2026_01', [1, 2]), ('2026_02', [4])):
+            with sqlite3.connect(os.path.join(archive_dir, f"boats_{month}.db")) as conn:
+                self.assertEqual([row[0] for row in conn.execute('SELECT track_id FROM boats ORDER BY track_id')],
+                                 expected)
+        self.assertEqual(engine.archive_records(NOW), 0)
+
+    def test_maintenance_runs_on_schedule(self):
+        engine = self._engine(retention_maintenance_interval_days=7)
+        self.assertEqual(engine.run_maintenance(NOW), ['vacuum', 'analyze'])
+        self.assertEqual(engine.run_maintenance(NOW + 6 * DAY), [])
+        self.assertEqual(engine.run_maintenance(NOW + 7 * DAY), ['vacuum', 'analyze'])
+
+    def test_run_with_defaults_changes_nothing(self):
+        paths = self._add_classified(1, 'Match', 'matches', [1.0, 2.0], age_days=400)
+        summary = self._engine().run()
+        self.assertEqual(summary['expired_images'] + summary['pruned_images'] + summary['recompressed_images'], 0)
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+
+class TestBoatsCreatedAtMigration(unittest.TestCase):
+    def test_created_at_is_added_to_existing_database(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            db_path = os.path.join(tmp_dir, 'old.db')
+            with sqlite3.connect(db_path) as conn:
+                conn.execute('''CREATE TABLE boats (id INTEGER PRIMARY KEY AUTOINCREMENT, track_id INTEGER UNIQUE,
+                                status TEXT NOT NULL, launch_time REAL, retrieve_time REAL, on_water_time REAL,
+                                matchID INTEGER, model TEXT)''')
+                conn.execute("INSERT INTO boats (track_id, status, launch_time, model) "
+                             "VALUES (1, 'Launched', 1.0, 'm')")
+
+            db_manager = DatabaseManager(db_path=db_path)
+            try:
+                db_manager.initialize_database()
+                db_manager.insert_boat_record(2, 'Launched', 2.0, 'm')
+                db_manager.cursor.execute('SELECT track_id, created_at FROM boats ORDER BY track_id')
+                rows = db_manager.cursor.fetchall()
+                self.assertEqual([row[0] for row in rows], [1, 2])
+                self.assertTrue(all(row[1] for row in rows))
+                db_manager.initialize_database()
+            finally:
+                db_manager.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+
+from boat_detection.tracking.roi import RegionOfInterest, get_camera_config
+
+
+class TestRegionOfInterest(unittest.TestCase):
+    def setUp(self):
+        self.polygon = [[100, 50], [300, 50], [300, 250], [100, 250]]
+        self.roi = RegionOfInterest(self.polygon, (640, 480))
+
+    def test_bounding_rect_and_imgsz(self):
+        self.assertEqual(self.roi.rect, (100, 50, 301, 251))
+        self.assertEqual(self.roi.imgsz, (224, 224))
+
+    def test_crop(self):
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        crop = self.roi.crop(frame)
+        self.assertEqual(crop.shape, (201, 201, 3))
+
+    def test_to_frame_coords(self):
+        boxes = np.array([[10, 20, 30, 40]], dtype=np.float32)
+        mapped = self.roi.to_frame_coords(boxes)
+        np.testing.assert_array_equal(mapped, [[110, 70, 30, 40]])
+        np.testing.assert_array_equal(boxes, [[10, 20, 30, 40]])
+
+    def test_contains(self):
+        points = np.array([[150, 100], [50, 100], [299, 249], [400, 400]])
+        np.testing.assert_array_equal(self.roi.contains(points), [True, False, True, False])
+
+    def test_triangle_mask(self):
+        roi = RegionOfInterest([[0, 0], [200, 0], [0, 200]], (640, 480))
+        np.testing.assert_array_equal(roi.contains(np.array([[10, 10], [190, 190]])), [True, False])
+
+    def test_invalid_polygon(self):
+        with self.assertRaises(ValueError):
+            RegionOfInterest([[0, 0], [10, 10]], (640, 480))
+        with self.assertRaises(ValueError):
+            RegionOfInterest([[700, 500], [800, 500], [800, 600]], (640, 480))
+
+    def test_get_camera_config(self):
+        cameras = {'Exmouth Marina': {'roi': self.polygon, 'imgsz': 320}}
+        self.assertEqual(get_camera_config(cameras, '06-02-2022 10 C Exmouth Marina.m4v')['imgsz'], 320)
+        self.assertEqual(get_camera_config(cameras, 'other.mp4'), {})
+        self.assertEqual(get_camera_config(None, 'other.mp4'), {})
+        roi = RegionOfInterest.from_camera_config(cameras['Exmouth Marina'], (640, 480))
+        self.assertEqual(roi.imgsz, 320)
+        self.assertIsNone(RegionOfInterest.from_camera_config({}, (640, 480)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+
+from boat_detection.database.db_manager import DatabaseManager, TRACK_ID_NAMESPACE
+from boat_detection.service import jobs
+from boat_detection.service.jobs import (JobCancelled, COMPLETED, FAILED, CANCELLED, TRACKING, COMPARISON,
+                                         run_tracking_job)
+from boat_detection.service.server import JobService
+from boat_detection.utils.helpers import compute_file_hash
+from tests.fakes import fake_capture
+
+
+class TestJobService(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(self.videos_dir)
+        self._touch('existing.mp4')
+        self.config = {'videos_dir': self.videos_dir, 'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+                       'model_path': 'model.pt', 'service_port': 0, 'service_poll_interval': 3600,
+                       'ingest_stable_seconds': 0}
+        db_manager = DatabaseManager(db_path=self.config['database_path'])
+        db_manager.initialize_database()
+        db_manager.mark_video_processed(compute_file_hash(os.path.join(self.videos_dir, 'existing.mp4')),
+                                        'model.pt', 'existing.mp4', 100)
+        db_manager.close()
+        self.tracked = []
+        self.compared = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _touch(self, name, content=b'0'):
+        with open(os.path.join(self.videos_dir, name), 'wb') as file:
+            file.write(content)
+
+    def fake_tracking(self, config, job_id, video_file, progress_queue, cancelled, file_hash=None):
+        progress_queue.put((job_id, 50, 100))
+        while not self.release.wait(0.01):
+            if job_id in cancelled:
+                raise JobCancelled(job_id)
+        if video_file == 'broken.mp4':
+            raise RuntimeError('decode error')
+        self.tracked.append(video_file)
+        return video_file
+
+    def fake_comparison(self, config):
+        self.compared.set()
+
+    def _service(self):
+        return JobService(self.config, tracking_executor=ThreadPoolExecutor(2),
+                          comparison_executor=ThreadPoolExecutor(1),
+                          tracking_fn=self.fake_tracking, comparison_fn=self.fake_comparison)
+
+    def _run(self, scenario):
+        async def main():
+            service = self._service()
+            await service.start()
+            try:
+                return await scenario(service)
+            finally:
+                await service.stop()
+        return asyncio.run(main())
+
+    async def _request(self, service, method, path, body=None):
+        host, port = service.address[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(data)}\r\n\r\n"
+                     .encode('latin-1') + data)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b'\r\n\r\n')
+        return int(head.split()[1]), json.loads(payload)
+
+    async def _wait(self, job):
+        await asyncio.gather(job.task, return_exceptions=True)
+
+    def test_scan_queues_only_new_videos_then_compares(self):
+        async def scenario(service):
+            self._touch('new.mp4', b'new')
+            self._touch('copy.mp4')
+            jobs = await service.scan_videos()
+            self.assertEqual([job.video_file for job in jobs], ['new.mp4'])
+            self.assertEqual(jobs[0].file_hash, compute_file_hash(os.path.join(self.videos_dir, 'new.mp4')))
+            self.assertEqual(await service.scan_videos(), [])
+            await self._wait(jobs[0])
+            comparisons = [job for job in service.jobs.values() if job.kind == COMPARISON]
+            self.assertEqual(len(comparisons), 1)
+            await self._wait(comparisons[0])
+            return jobs[0].state, comparisons[0].state
+
+        self.assertEqual(self._run(scenario), (COMPLETED, COMPLETED))
+        self.assertEqual(self.tracked, ['new.mp4'])
+        self.assertTrue(self.compared.is_set())
+
+    def test_http_api_submit_status_and_errors(self):
+        async def scenario(service):
+            status, created = await self._request(service, 'POST', '/jobs', {'video_file': 'existing.mp4'})
+            self.assertEqual(status, 201)
+            self.assertEqual(created['type'], TRACKING)
+            await self._wait(service.jobs[created['id']])
+
+            status, job = await self._request(service, 'GET', f"/jobs/{created['id']}")
+            self.assertEqual((status, job['state'], job['progress']), (200, COMPLETED, 1.0))
+            self.assertEqual((await self._request(service, 'GET', '/jobs/999'))[0], 404)
+            self.assertEqual((await self._request(service, 'POST', '/jobs', {'video_file': 'nope.mp4'}))[0], 400)
+            self.assertEqual((await self._request(service, 'POST', '/jobs', {'type': 'bogus'}))[0], 400)
+            self.assertEqual((await self._request(service, 'PUT', '/jobs'))[0], 405)
+            status, health = await self._request(service, 'GET', '/health')
+            return status, health['status']
+
+        self.assertEqual(self._run(scenario), (200, 'ok'))
+
+    def test_failed_job_records_error(self):
+        async def scenario(service):
+            self._touch('broken.mp4')
+            job = service.submit(TRACKING, 'broken.mp4')
+            await self._wait(job)
+            return job.state, job.error
+
+        self.assertEqual(self._run(scenario), (FAILED, 'decode error'))
+
+    def test_cancel_running_and_queued_jobs(self):
+        self.release.clear()
+        self.config['service_tracking_workers'] = 1
+
+        async def scenario(service):
+            running = service.submit(TRACKING, 'existing.mp4')
+            queued = service.submit(TRACKING, 'existing.mp4')
+            while running.progress == 0.0:
+                await asyncio.sleep(0.05)
+            self.assertEqual(running.progress, 0.5)
+
+            status, _ = await self._request(service, 'DELETE', f"/jobs/{queued.job_id}")
+            self.assertEqual(status, 200)
+            service.cancel(running.job_id)
+            await self._wait(running)
+            await self._wait(queued)
+            return running.state, queued.state
+
+        self.assertEqual(self._run(scenario), (CANCELLED, CANCELLED))
+        self.assertEqual(self.tracked, [])
+
+
+class TestTrackingWorker(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(videos_dir)
+        with open(os.path.join(videos_dir, 'clip.mp4'), 'wb') as file:
+            file.write(b'video bytes')
+        self.config = {
+            'videos_dir': videos_dir,
+            'output_dir': os.path.join(self.tmp_dir, 'output'),
+            'results_dir': os.path.join(self.tmp_dir, 'results'),
+            'logs_dir': os.path.join(self.tmp_dir, 'logs'),
+            'detection_images_dir': os.path.join(self.tmp_dir, 'results', 'detection_images'),
+            'models_dir': self.tmp_dir,
+            'model_path': 'model.pt',
+            'database_path': os.path.join(self.tmp_dir, 'boats.db'),
+            'service_tracking_workers': 2,
+        }
+
+    def tearDown(self):
+        if jobs._tracker is not None:
+            jobs._tracker.close()
+            jobs._tracker = None
+        shutil.rmtree(self.tmp_dir)
+
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoWriter')
+    @patch('boat_detection.tracking.video_tracker.cv2.VideoCapture')
+    def test_cancelled_job_releases_resources(self, mock_capture, mock_writer):
+        cap = fake_capture(300)
+        mock_capture.return_value = cap
+        result = MagicMock()
+        result.boxes.id = None
+        cancelled = {}
+
+        class Progress:
+            def put(self, item):
+                cancelled[item[0]] = True
+
+        with patch('boat_detection.tracking.video_tracker.YOLO') as mock_yolo:
+            mock_yolo.return_value.track.return_value = [result]
+            with self.assertRaises(JobCancelled):
+                run_tracking_job(self.config, 'job-1', 'clip.mp4', Progress(), cancelled)
+
+        cap.release.assert_called_once()
+        mock_writer.return_value.release.assert_called_once()
+        self.assertEqual(cap.read.call_count, 200)
+        self.assertIsNone(jobs._tracker.progress_callback)
+
+    def test_worker_processes_reserve_separate_namespaces(self):
+        with patch('boat_detection.tracking.video_tracker.YOLO'):
+            run_tracking_job(self.config, 'job-1', 'missing.mp4', None, {})
+        self.assertEqual(jobs._tracker.track_id_offset, TRACK_ID_NAMESPACE)
+        second = DatabaseManager(db_path=self.config['database_path'])
+        self.assertEqual(second.reserve_track_id_namespace('other worker'), 2 * TRACK_ID_NAMESPACE)
+        second.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+import torch
+
+from boat_detection.tracking.roi import RegionOfInterest
+from boat_detection.tracking.tiling import (tile_grid, tiles_from_config, merge_tile_detections, TiledDetector,
+                                            TileDetections, create_tracker)
+
+
+def fake_result(xyxy, conf):
+    result = MagicMock()
+    result.boxes.__len__.return_value = len(conf)
+    result.boxes.xyxy = torch.tensor(xyxy, dtype=torch.float32).reshape(-1, 4)
+    result.boxes.conf = torch.tensor(conf, dtype=torch.float32)
+    result.boxes.cls = torch.zeros(len(conf))
+    return result
+
+
+class TestTiling(unittest.TestCase):
+    def test_tile_grid_covers_frame_with_overlap(self):
+        tiles = tile_grid((1000, 600), 400, overlap=0.25)
+        self.assertEqual(sorted({t[0] for t in tiles}), [0, 300, 600])
+        self.assertEqual(sorted({t[1] for t in tiles}), [0, 200])
+        self.assertTrue(all(t[2] - t[0] == 400 and t[3] - t[1] == 400 for t in tiles))
+        self.assertEqual(tile_grid((300, 200), 640), [(0, 0, 300, 200)])
+        with self.assertRaises(ValueError):
+            tile_grid((300, 200), 640, overlap=1.0)
+
+    def test_tiles_from_camera_config(self):
+        self.assertEqual(tiles_from_config([[0, 0, 500, 500], [900, 0, 1200, 300]], (1000, 600), 640, 0.2),
+                         [(0, 0, 500, 500), (900, 0, 1000, 300)])
+        self.assertEqual(len(tiles_from_config({'size': 500, 'overlap': 0.0}, (1000, 500), 640, 0.2)), 2)
+
+    def test_roi_skips_tiles(self):
+        roi = RegionOfInterest([[0, 0], [350, 0], [350, 350], [0, 350]], (1000, 600))
+        detector = TiledDetector.for_frame(MagicMock(), (1000, 600), MagicMock(), roi=roi, tile_size=400,
+                                           overlap=0.25)
+        self.assertEqual(detector.tiles, [(0, 0, 400, 400), (300, 0, 700, 400), (0, 200, 400, 600),
+                                          (300, 200, 700, 600)])
+
+    def test_merge_suppresses_overlaps_and_clipped_boxes(self):
+        boxes = np.array([[0, 0, 100, 50], [2, 0, 102, 50], [60, 0, 100, 50], [300, 0, 340, 40]])
+        scores = np.array([0.9, 0.8, 0.7, 0.6])
+        classes = np.array([0, 0, 0, 0])
+        self.assertEqual(merge_tile_detections(boxes, scores, classes).tolist(), [0, 3])
+        self.assertEqual(merge_tile_detections(boxes, scores, np.array([0, 1, 0, 0])).tolist(), [0, 1, 3])
+
+    def test_detect_batches_tiles_and_tracks_in_frame_coordinates(self):
+        model = MagicMock()
+        # The boat sits across the tile seam: both tiles see it, the second one clipped.
+        model.predict.return_value = [fake_result([[350, 100, 400, 140]], [0.9]),
+                                      fake_result([[50, 100, 100, 140]], [0.8])]
+        detector = TiledDetector(model, [(0, 0, 400, 400), (300, 0, 700, 400)], 400, 0.5, create_tracker())
+        frame = np.zeros((400, 700, 3), dtype=np.uint8)
+        for _ in range(2):
+            boxes, track_ids, confidences = detector.detect(frame)
+
+        crops = model.predict.call_args[0][0]
+        self.assertEqual([crop.shape for crop in crops], [(400, 400, 3), (400, 400, 3)])
+        self.assertEqual(model.predict.call_args.kwargs['imgsz'], 400)
+        self.assertEqual(len(track_ids), 1)
+        np.testing.assert_allclose(boxes[0], [375, 120, 50, 40], atol=1)
+        self.assertAlmostEqual(float(confidences[0]), 0.9, places=5)
+
+        # Load shedding shrinks the per-tile inference size.
+        detector.detect(frame, imgsz_scale=0.5)
+        self.assertEqual(model.predict.call_args.kwargs['imgsz'], 192)
+
+    def test_tile_detections_indexing(self):
+        detections = TileDetections(np.array([[0, 0, 10, 20], [5, 5, 9, 9]]), np.array([0.9, 0.1]), np.array([0, 0]))
+        subset = detections[np.array([True, False])]
+        self.assertEqual(len(subset), 1)
+        np.testing.assert_allclose(subset.xywh, [[5, 10, 10, 20]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+
+from boat_detection.tracking.track_store import TrackHistoryStore
+
+
+class TestTrackHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.store = TrackHistoryStore(window=3, capacity=2, timeout_frames=10)
+
+    def test_update_and_history(self):
+        for frame_number, x in enumerate([0, 10, 20, 30], start=1):
+            self.store.update([1], np.array([[x, 5]]), frame_number)
+        state = self.store.get(1)
+        self.assertEqual(state.detections, 4)
+        np.testing.assert_array_equal(self.store.history(1), [[10, 5], [20, 5], [30, 5]])
+
+    def test_movements_match_window(self):
+        for frame_number, x in enumerate([0, 30, 60, 90], start=1):
+            states = self.store.update([1, 2], np.array([[x, 0], [0, x / 3]]), frame_number)
+        movements = self.store.movements(states)
+        np.testing.assert_allclose(movements, [60, 20])
+
+    def test_movement_with_partial_history(self):
+        self.store.update([7], np.array([[0, 0]]), 1)
+        states = self.store.update([7], np.array([[3, 4]]), 2)
+        np.testing.assert_allclose(self.store.movements(states), [5])
+
+    def test_resize_keeps_newest_positions(self):
+        for frame_number, x in enumerate([0, 10, 20, 30], start=1):
+            self.store.update([1], np.array([[x, 0]]), frame_number)
+        self.store.resize(2)
+        np.testing.assert_array_equal(self.store.history(1), [[20, 0], [30, 0]])
+        self.assertEqual(self.store.get(1).detections, 3)
+
+        self.store.resize(4)
+        self.assertEqual(self.store.get(1).detections, 2)
+        states = self.store.update([1], np.array([[40, 0]]), 5)
+        np.testing.assert_array_equal(self.store.history(1), [[20, 0], [30, 0], [40, 0]])
+        np.testing.assert_allclose(self.store.movements(states), [20])
+        with self.assertRaises(ValueError):
+            self.store.resize(0)
+
+    def test_grows_beyond_capacity(self):
+        states = self.store.update([1, 2, 3, 4, 5], np.arange(10).reshape(5, 2), 1)
+        self.assertEqual(len(self.store), 5)
+        self.assertEqual(len({s.slot for s in states}), 5)
+        np.testing.assert_array_equal(self.store.history(5), [[8, 9]])
+
+    def test_evict_stale_reuses_slot(self):
+        self.store.update([1], np.array([[0, 0]]), 1)
+        self.store.update([2], np.array([[0, 0]]), 20)
+        slot = self.store.get(1).slot
+        self.assertEqual(self.store.evict_stale(20), [1])
+        self.assertNotIn(1, self.store)
+        self.assertIn(2, self.store)
+        state = self.store.update([3], np.array([[1, 1]]), 21)[0]
+        self.assertEqual(state.slot, slot)
+        np.testing.assert_array_equal(self.store.history(3), [[1, 1]])
+
+    def test_empty_update(self):
+        self.assertEqual(self.store.update([], np.zeros((0, 2)), 1), [])
+        self.assertEqual(len(self.store.movements([])), 0)
+        self.assertEqual(self.store.history(99).shape, (0, 2))
+
+    def test_invalid_window(self):
+        with self.assertRaises(ValueError):
+            TrackHistoryStore(window=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,243 @@
+import os
+import shutil
+import tempfile
+import time
+import threading
+import unittest
+from unittest.mock import patch
+
+from boat_detection.service.work_queue import (SQLiteWorkQueue, MemoryWorkQueue, open_work_queue, SHARD,
+                                               COMPARISON_BATCH, PENDING, LEASED, DONE, FAILED)
+from boat_detection.service.worker import QueueWorker, enqueue_backlog
+from tests.fakes import FakeClock
+
+
+class WorkQueueContract:
+    # Run against every backend: both must behave the same.
+    def make_queue(self, clock, max_attempts=2):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.clock = FakeClock()
+        self.queue = self.make_queue(self.clock)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_enqueue_is_idempotent(self):
+        first = self.queue.enqueue(SHARD, {'videos': ['a.mp4']}, 'b1:shard:0', 'b1')
+        self.assertEqual(self.queue.enqueue(SHARD, {'videos': ['other.mp4']}, 'b1:shard:0', 'b1'), first)
+        self.assertEqual(len(self.queue.jobs()), 1)
+        self.assertEqual(self.queue.jobs()[0]['payload'], {'videos': ['a.mp4']})
+
+    def test_later_stages_wait_for_earlier_ones(self):
+        self.queue.enqueue(COMPARISON_BATCH, {}, 'b1:comparison', 'b1', stage=1)
+        self.queue.enqueue(SHARD, {'shard_index': 0}, 'b1:shard:0', 'b1')
+        self.queue.enqueue(SHARD, {'shard_index': 1}, 'b1:shard:1', 'b1')
+
+        first = self.queue.claim('w1', 60)
+        second = self.queue.claim('w2', 60)
+        self.assertEqual((first.key, second.key), ('b1:shard:0', 'b1:shard:1'))
+        self.assertIsNone(self.queue.claim('w3', 60))
+        self.assertTrue(self.queue.complete(first, {'merged': 3}))
+        self.assertIsNone(self.queue.claim('w3', 60))
+        self.queue.complete(second)
+        self.assertEqual(self.queue.claim('w3', 60).key, 'b1:comparison')
+        self.assertEqual(self.queue.jobs(kind=SHARD)[0]['result'], {'merged': 3})
+
+    def test_kind_filter(self):
+        self.queue.enqueue(SHARD, {}, 'b1:shard:0', 'b1')
+        self.queue.enqueue(COMPARISON_BATCH, {}, 'b2:comparison', 'b2', stage=1)
+        self.assertEqual(self.queue.claim('w1', 60, kinds=[COMPARISON_BATCH]).key, 'b2:comparison')
+        self.assertIsNone(self.queue.claim('w1', 60, kinds=[COMPARISON_BATCH]))
+
+    def test_expired_lease_is_retried_and_fenced(self):
+        self.queue.enqueue(SHARD, {}, 'b1:shard:0', 'b1')
+        dead = self.queue.claim('w1', 60)
+        self.clock.now += 30
+        self.assertTrue(self.queue.heartbeat(dead, 60))
+        self.clock.now += 61
+        retry = self.queue.claim('w2', 60)
+        self.assertEqual((retry.key, retry.attempt), ('b1:shard:0', 2))
+        # The first worker wakes up late: none of its updates may land.
+        self.assertFalse(self.queue.heartbeat(dead, 60))
+        self.assertFalse(self.queue.complete(dead, 'stale'))
+        self.assertFalse(self.queue.fail(dead, 'stale'))
+        self.assertTrue(self.queue.complete(retry, 'fresh'))
+        job = self.queue.jobs()[0]
+        self.assertEqual((job['state'], job['result'], job['worker']), (DONE, 'fresh', 'w2'))
+
+    def test_attempts_are_limited(self):
+        self.queue.enqueue(SHARD, {}, 'b1:shard:0', 'b1')
+        item = self.queue.claim('w1', 60)
+        self.assertTrue(self.queue.fail(item, 'decode error'))
+        self.assertEqual(self.queue.counts()[PENDING], 1)
+        self.queue.claim('w1', 60)
+        self.clock.now += 120
+        self.assertIsNone(self.queue.claim('w2', 60))
+        job = self.queue.jobs()[0]
+        self.assertEqual((job['state'], job['attempts'], job['error']), (FAILED, 2, 'lease expired'))
+
+    def test_failed_shards_do_not_block_the_comparison(self):
+        self.queue.enqueue(SHARD, {}, 'b1:shard:0', 'b1')
+        self.queue.enqueue(COMPARISON_BATCH, {}, 'b1:comparison', 'b1', stage=1)
+        for _ in range(2):
+            self.queue.fail(self.queue.claim('w1', 60), 'broken')
+        self.assertEqual(self.queue.claim('w1', 60).kind, COMPARISON_BATCH)
+        self.assertEqual(self.queue.counts('b1'), {PENDING: 0, LEASED: 1, DONE: 0, FAILED: 1})
+
+
+class TestSQLiteWorkQueue(WorkQueueContract, unittest.TestCase):
+    def make_queue(self, clock, max_attempts=2):
+        return SQLiteWorkQueue(os.path.join(self.tmp_dir, 'queue.db'), max_attempts, clock=clock)
+
+    def test_concurrent_claims_never_share_a_job(self):
+        for index in range(40):
+            self.queue.enqueue(SHARD, {'shard_index': index}, f"b1:shard:{index}", 'b1')
+        claimed = []
+
+        def claim_all(worker):
+            queue = SQLiteWorkQueue(self.queue.path, clock=self.clock)
+            while True:
+                item = queue.claim(worker, 60)
+                if item is None:
+                    return
+                claimed.append(item.key)
+
+        threads = [threading.Thread(target=claim_all, args=(f"w{index}",)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(claimed), sorted(f"b1:shard:{index}" for index in range(40)))
+
+
+class TestMemoryWorkQueue(WorkQueueContract, unittest.TestCase):
+    def make_queue(self, clock, max_attempts=2):
+        return MemoryWorkQueue(max_attempts, clock=clock)
+
+
+class TestQueueWorker(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.videos_dir = os.path.join(self.tmp_dir, 'videos')
+        os.makedirs(self.videos_dir)
+        for name, size in (('a.mp4', 30), ('b.mp4', 20), ('c.mp4', 10)):
+            with open(os.path.join(self.videos_dir, name), 'wb') as file:
+                file.write(b'0' * size)
+        self.config = {'videos_dir': self.videos_dir, 'results_dir': os.path.join(self.tmp_dir, 'results'),
+                       'database_path': os.path.join(self.tmp_dir, 'boats.db'), 'work_queue_heartbeat': 0.01,
+                       'work_queue_poll_interval': 0}
+        self.queue = MemoryWorkQueue(max_attempts=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_open_work_queue(self):
+        self.assertIsInstance(open_work_queue(self.config), SQLiteWorkQueue)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'work_queue.db')))
+        self.assertIsInstance(open_work_queue(dict(self.config, work_queue_backend='memory')), MemoryWorkQueue)
+        with self.assertRaises(ValueError):
+            open_work_queue(dict(self.config, work_queue_backend='redis'))
+
+    def test_enqueue_backlog(self):
+        enqueue_backlog(self.config, self.queue, 'b1', 2)
+        shards = self.queue.jobs(kind=SHARD)
+        self.assertEqual([job['payload']['videos'] for job in shards], [['a.mp4'], ['b.mp4', 'c.mp4']])
+        self.assertEqual([job['payload']['shard_index'] for job in shards], [0, 1])
+        self.assertEqual(self.queue.jobs(kind=COMPARISON_BATCH)[0]['stage'], 1)
+
+        enqueue_backlog(self.config, self.queue, 'b1', 2)
+        self.assertEqual(len(self.queue.jobs()), 3)
+        with open(os.path.join(self.videos_dir, 'd.mp4'), 'wb') as file:
+            file.write(b'0')
+        enqueue_backlog(self.config, self.queue, 'b2', 2)
+        self.assertEqual([(job['payload']['shard_index'], job['payload']['videos'])
+                          for job in self.queue.jobs(batch='b2', kind=SHARD)], [(0, ['d.mp4'])])
+
+    def test_enqueue_backlog_requeues_for_a_new_model(self):
+        enqueue_backlog(dict(self.config, model_path='models/v1.pt'), self.queue, 'b1', 1, compare=False)
+        self.assertEqual(enqueue_backlog(dict(self.config, model_path='models/v1.pt'), self.queue, 'b2', 1), [])
+        enqueue_backlog(dict(self.config, model_path='models/v2.pt'), self.queue, 'b3', 1, compare=False)
+        enqueue_backlog(dict(self.config, model_path='models/v2.pt'), self.queue, 'b4', 1, compare=False,
+                        requeue=True)
+        self.assertEqual([(job['batch'], job['payload']['model'], job['payload']['videos'])
+                          for job in self.queue.jobs(kind=SHARD)],
+                         [('b1', 'v1.pt', ['a.mp4', 'b.mp4', 'c.mp4']), ('b3', 'v2.pt', ['a.mp4', 'b.mp4', 'c.mp4']),
+                          ('b4', 'v2.pt', ['a.mp4', 'b.mp4', 'c.mp4'])])
+
+    def test_worker_runs_shards_then_comparison(self):
+        enqueue_backlog(self.config, self.queue, 'b1', 2)
+        calls = []
+        failures = {'count': 0}
+
+        def shard(config, item, lease):
+            if item.payload['shard_index'] == 1 and not failures['count']:
+                failures['count'] += 1
+                raise RuntimeError('worker crashed')
+            calls.append((item.key, item.attempt))
+            return {'merged': len(item.payload['videos'])}
+
+        def comparison(config, item, lease):
+            calls.append((item.key, item.attempt))
+
+        worker = QueueWorker(self.config, self.queue, 'w1', handlers={SHARD: shard, COMPARISON_BATCH: comparison})
+        self.assertEqual(worker.run(exit_when_idle=True), 3)
+        self.assertEqual(calls, [('b1:shard:0', 1), ('b1:shard:1', 2), ('b1:comparison', 1)])
+        self.assertEqual(self.queue.counts('b1')[DONE], 3)
+
+    def test_worker_abandons_a_lost_lease(self):
+        self.queue.enqueue(SHARD, {}, 'b1:shard:0', 'b1')
+
+        def shard(config, item, lease):
+            # Another worker takes the job over while this one is still running it.
+            self.queue._jobs[0]['attempts'] += 1
+            while not lease.lost:
+                time.sleep(0.01)
+
+        worker = QueueWorker(self.config, self.queue, 'w1', handlers={SHARD: shard})
+        self.assertFalse(worker.run_one())
+        self.assertEqual(self.queue.jobs()[0]['state'], LEASED)
+
+    def test_shard_job_tracks_and_merges_each_attempt_separately(self):
+        enqueue_backlog(self.config, self.queue, 'b1', 1, compare=False)
+        with patch('boat_detection.service.worker.track_shard') as track_shard, \
+                patch('boat_detection.service.worker.merge_shards', return_value=4) as merge_shards:
+            worker = QueueWorker(self.config, self.queue, 'w1')
+            self.assertTrue(worker.run_one())
+        shard_dir = os.path.join(self.tmp_dir, 'results', 'queue_shards', 'b1', 'shard_000', 'attempt_01')
+        track_shard.assert_called_once_with(self.config, 0, ['a.mp4', 'b.mp4', 'c.mp4'], shard_dir)
+        merge_shards.assert_called_once_with(self.config, shard_dir)
+        self.assertEqual(self.queue.jobs()[0]['result'], {'merged': 4, 'shard_dir': shard_dir})
+
+    def test_queue_shards_merge_after_bulk_shards(self):
+        from boat_detection.database.db_manager import DatabaseManager, TRACK_ID_NAMESPACE
+        from boat_detection.tracking.bulk import shard_config
+
+        db_manager = DatabaseManager(db_path=self.config['database_path'])
+        db_manager.initialize_database()
+        db_manager.insert_boat_record(TRACK_ID_NAMESPACE + 1, 'launched', 1.0, 'model')
+        db_manager.close()
+
+        def track_shard(config, shard_index, videos, shards_dir):
+            shard = shard_config(dict(config, detection_images_dir=os.path.join(self.tmp_dir, 'images'),
+                                      logs_dir=self.tmp_dir), shard_index, shards_dir)
+            os.makedirs(os.path.dirname(shard['database_path']))
+            shard_db = DatabaseManager(db_path=shard['database_path'])
+            shard_db.initialize_database()
+            shard_db.insert_boat_record(1, 'launched', 5.0, 'model')
+            shard_db.close()
+
+        config = dict(self.config, detection_images_dir=os.path.join(self.tmp_dir, 'images'), logs_dir=self.tmp_dir)
+        enqueue_backlog(config, self.queue, 'b1', 1, compare=False)
+        with patch('boat_detection.service.worker.track_shard', track_shard):
+            self.assertTrue(QueueWorker(config, self.queue, 'w1').run_one())
+        db_manager = DatabaseManager(db_path=self.config['database_path'])
+        self.assertEqual(sorted(r[1] for r in db_manager.fetch_all_boat_records()),
+                         [TRACK_ID_NAMESPACE + 1, 2 * TRACK_ID_NAMESPACE + 1])
+        db_manager.close()
+
+
+if __name__ == '__main__':
+    unittest.main()